@@ -0,0 +1,148 @@
+"""작업자 답변 모델 cascade (작은 모델 -> 근거 검사 -> 필요할 때만 큰 모델)
+
+CASCADE_POLICY 에서 "cascade" 로 지정한 작업자는 먼저 CASCADE_SMALL_MODEL 로 답한다.
+답변이 grounding_score 검사를 통과하면 그대로 쓰고, 실패하면 CASCADE_LARGE_MODEL 로 다시 답한다.
+두 번째 답변이 나올 수 있으므로 cascade 작업자의 토큰은 스트리밍하지 않고 최종 답변만 내보낸다.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Callable
+
+from langchain_core.callbacks import get_usage_metadata_callback
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from ..core.config import (
+    CASCADE_GROUNDING_THRESHOLD,
+    CASCADE_LARGE_MODEL,
+    CASCADE_POLICY,
+    CASCADE_SMALL_MODEL,
+)
+from ..core.metrics import register_metrics
+from .grounding import grounding_score
+
+# USD / 1M 토큰 (input, output). 비용 절감 추정에만 쓴다.
+MODEL_PRICES = {
+    "gpt-5.1": (1.25, 10.0),
+    "gpt-5": (1.25, 10.0),
+    "gpt-5-mini": (0.25, 2.0),
+    "gpt-5-nano": (0.05, 0.4),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+
+def route_policy(route: str) -> str:
+    return CASCADE_POLICY.get(route, "large")
+
+
+def model_size(config: dict | None) -> str:
+    """작업자 그래프 안에서 사용할 답변 모델 크기 (config["configurable"]["model_size"])"""
+    return ((config or {}).get("configurable") or {}).get("model_size", "large")
+
+
+def size_config(size: str) -> dict:
+    return {"configurable": {"model_size": size}}
+
+
+def _price(model_name: str) -> tuple[float, float]:
+    # 응답의 model_name 은 "gpt-5.1-2025-11-13" 처럼 날짜가 붙어 있다
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model_name.startswith(name):
+            return MODEL_PRICES[name]
+    return (0.0, 0.0)
+
+
+def usage_cost(usage: dict, small_as_large: bool = False) -> float:
+    """get_usage_metadata_callback 결과의 비용.
+
+    small_as_large 면 작은 답변 모델의 토큰을 큰 모델 가격으로 계산한다 (큰 모델만 썼을 때의 추정 비용).
+    """
+    total = 0.0
+    for model_name, metadata in usage.items():
+        if small_as_large and model_name.startswith(CASCADE_SMALL_MODEL):
+            model_name = CASCADE_LARGE_MODEL
+        input_price, output_price = _price(model_name)
+        total += (
+            metadata.get("input_tokens", 0) * input_price
+            + metadata.get("output_tokens", 0) * output_price
+        ) / 1_000_000
+    return total
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = defaultdict(
+            lambda: {
+                "requests": 0,
+                "escalations": 0,
+                "seconds": 0.0,
+                "cost_usd": 0.0,
+                "large_only_cost_usd": 0.0,
+            }
+        )
+
+    def record(self, route: str, escalated: bool, seconds: float, cost: float, large_only_cost: float) -> None:
+        with self._lock:
+            stats = self._routes[route]
+            stats["requests"] += 1
+            stats["escalations"] += int(escalated)
+            stats["seconds"] += seconds
+            stats["cost_usd"] += cost
+            stats["large_only_cost_usd"] += large_only_cost
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                requests = stats["requests"]
+                result[route] = {
+                    "policy": route_policy(route),
+                    "requests": requests,
+                    "escalation_rate": stats["escalations"] / requests if requests else 0.0,
+                    "avg_latency_s": stats["seconds"] / requests if requests else 0.0,
+                    "cost_usd": stats["cost_usd"],
+                    # 모든 요청을 큰 모델로 처리했을 때의 추정 비용과의 차이
+                    "cost_saved_usd": stats["large_only_cost_usd"] - stats["cost_usd"],
+                }
+            return result
+
+
+cascade_stats = CascadeStats()
+register_metrics("model_cascade", cascade_stats.stats)
+
+
+def answer_and_sources(messages: list) -> tuple[str, list[str]]:
+    """에이전트 실행 결과 메시지에서 (최종 답변, 근거 문서 목록)을 꺼낸다. 근거는 도구 출력이다."""
+    answer = messages[-1].content if messages and isinstance(messages[-1], AIMessage) else ""
+    sources = [m.content for m in messages if isinstance(m, ToolMessage) and isinstance(m.content, str)]
+    return answer, sources
+
+
+def last_question(messages: list) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content
+    return ""
+
+
+def run_cascade(route: str, question: str, invoke: Callable[[str], list]) -> str:
+    """invoke(size) 는 "small" / "large" 모델로 작업자를 실행하고 결과 메시지 목록을 반환한다."""
+    started = time.perf_counter()
+    with get_usage_metadata_callback() as small_usage:
+        answer, sources = answer_and_sources(invoke("small"))
+    cost = usage_cost(small_usage.usage_metadata)
+    # 같은 토큰을 큰 모델로 처리했다면 들었을 비용 (절감액 추정용)
+    large_only_cost = usage_cost(small_usage.usage_metadata, small_as_large=True)
+
+    escalated = not grounding_score(answer, sources, question).passed(CASCADE_GROUNDING_THRESHOLD)
+    if escalated:
+        with get_usage_metadata_callback() as large_usage:
+            answer, _ = answer_and_sources(invoke("large"))
+        large_cost = usage_cost(large_usage.usage_metadata)
+        cost += large_cost
+        large_only_cost = large_cost
+
+    cascade_stats.record(route, escalated, time.perf_counter() - started, cost, large_only_cost)
+    return answer
@@ -0,0 +1,77 @@
+"""대화(conversation) 단위 LangGraph 체크포인터
+
+thread_id = conversation.id 로 supervisor 그래프 상태를 저장해 두고,
+매 턴에는 새 HumanMessage 만 보내서 이전 상태를 이어서 사용한다.
+"""
+from sqlalchemy.engine import make_url
+
+from ..core.config import CHECKPOINT_BACKEND, CHECKPOINT_SQLITE_PATH, CHECKPOINT_URL
+from .supervisor import builder
+from .supervisor import graph as default_graph
+
+_checkpointer = None
+_resource = None  # 커넥션 풀 / sqlite 커넥션 (종료 시 닫기)
+_graph = default_graph
+
+
+async def init_checkpointer() -> None:
+    global _checkpointer, _resource, _graph
+
+    if CHECKPOINT_BACKEND == "postgres":
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        from psycopg.rows import dict_row
+        from psycopg_pool import AsyncConnectionPool
+
+        # psycopg 는 SQLAlchemy 드라이버 표기(postgresql+psycopg2://)를 모르므로 제거한다
+        conninfo = (
+            make_url(CHECKPOINT_URL)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        _resource = AsyncConnectionPool(
+            conninfo,
+            max_size=10,
+            open=False,
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        )
+        await _resource.open()
+        _checkpointer = AsyncPostgresSaver(_resource)
+        await _checkpointer.setup()
+    elif CHECKPOINT_BACKEND == "sqlite":
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        _resource = await aiosqlite.connect(CHECKPOINT_SQLITE_PATH)
+        _checkpointer = AsyncSqliteSaver(_resource)
+        await _checkpointer.setup()
+    else:
+        return
+
+    _graph = builder.compile(checkpointer=_checkpointer)
+
+
+async def close_checkpointer() -> None:
+    global _checkpointer, _resource, _graph
+
+    if _resource is not None:
+        await _resource.close()
+    _checkpointer = None
+    _resource = None
+    _graph = default_graph
+
+
+def has_checkpointer() -> bool:
+    return _checkpointer is not None
+
+
+def get_chat_graph():
+    return _graph
+
+
+def thread_config(conversation_id: int) -> dict:
+    return {"configurable": {"thread_id": str(conversation_id)}}
+
+
+async def delete_thread(conversation_id: int) -> None:
+    if _checkpointer is not None:
+        await _checkpointer.adelete_thread(str(conversation_id))
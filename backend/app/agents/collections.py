@@ -0,0 +1,75 @@
+"""langchain_postgres(PGVector) 컬렉션 메타데이터 헬퍼
+
+컬렉션 버전은 langchain_pg_collection.cmetadata 의 "version" 키에 저장한다.
+인제스트(문서 적재) 쪽에서 문서를 바꾼 뒤 bump_collection_version 을 호출하면
+버전을 키로 쓰는 캐시/인덱스가 자동으로 무효화된다.
+"""
+from functools import lru_cache
+
+from langchain_core.documents import Document
+from sqlalchemy import create_engine, text
+
+from ..core.cache import TTLCache
+from ..core.config import COLLECTION_VERSION_TTL_SECONDS, CONNECTION_STRING
+
+_versions = TTLCache(maxsize=128, ttl=COLLECTION_VERSION_TTL_SECONDS)
+
+
+@lru_cache
+def get_vector_engine():
+    return create_engine(CONNECTION_STRING, pool_pre_ping=True)
+
+
+def get_collection_version(collection: str) -> int:
+    version = _versions.get(collection)
+    if version is not None:
+        return version
+
+    with get_vector_engine().connect() as conn:
+        version = conn.execute(
+            text(
+                "SELECT COALESCE((cmetadata->>'version')::int, 0) "
+                "FROM langchain_pg_collection WHERE name = :name"
+            ),
+            {"name": collection},
+        ).scalar()
+
+    version = version or 0
+    _versions.set(collection, version)
+    return version
+
+
+def bump_collection_version(collection: str) -> int:
+    """컬렉션 문서를 바꾼 뒤 호출한다. 새 버전을 반환한다."""
+    with get_vector_engine().begin() as conn:
+        version = conn.execute(
+            text(
+                "UPDATE langchain_pg_collection "
+                "SET cmetadata = jsonb_set("
+                "  COALESCE(cmetadata::jsonb, '{}'::jsonb), '{version}',"
+                "  to_jsonb(COALESCE((cmetadata->>'version')::int, 0) + 1)"
+                ")::json "
+                "WHERE name = :name "
+                "RETURNING (cmetadata->>'version')::int"
+            ),
+            {"name": collection},
+        ).scalar()
+
+    _versions.pop(collection)
+    return version
+
+
+def load_collection_documents(collection: str) -> list[Document]:
+    """컬렉션의 모든 청크(본문 + 메타데이터)를 읽어온다. 임베딩은 읽지 않는다."""
+    with get_vector_engine().connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT e.id, e.document, e.cmetadata "
+                "FROM langchain_pg_embedding e "
+                "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
+                "WHERE c.name = :name"
+            ),
+            {"name": collection},
+        ).all()
+    return [Document(id=row.id, page_content=row.document, metadata=row.cmetadata or {}) for row in rows]
+
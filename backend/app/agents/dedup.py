@@ -0,0 +1,192 @@
+"""검색 문서 근접 중복(near-duplicate) 제거
+
+MultiQueryRetriever 는 page_content 가 완전히 같은 문서만 합친다. 하지만 실제로는 겹치는 청크
+(chunk_overlap), 조문 직접 조회 결과와 같은 조문의 벡터 검색 청크, 같은 기사를 옮긴 웹 검색 결과처럼
+거의 같은 문서가 여러 개 generate / 환각 검사 프롬프트에 들어간다.
+
+- 정규화: NFKC (①, 전각 문자 등) 후 공백과 문장부호를 모두 제거한다.
+  한국어는 띄어쓰기가 문서마다 달라서 공백을 남기면 같은 문장도 다른 shingle 이 된다.
+- shingle: 음절 3-gram. 한글 음절 하나가 영어 단어 일부 이상의 정보를 담고 있어서
+  단어 단위보다 조사/어미 차이에 덜 민감하다.
+- MinHash(DEDUP_NUM_PERM 개 해시)로 Jaccard 유사도를 추정한다.
+  유사도가 DEDUP_THRESHOLD 이상이거나, 한 문서가 다른 문서에 DEDUP_CONTAINMENT 이상 포함되면 중복으로 본다.
+  포함 관계일 때는 더 긴 문서를, 아니면 먼저 나온(순위가 높은) 문서를 남긴다.
+"""
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..core.config import DEDUP_CONTAINMENT, DEDUP_ENABLED, DEDUP_NUM_PERM, DEDUP_THRESHOLD
+from ..core.metrics import register_metrics
+
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_TEXT = re.compile(r"[\s\W_]+")
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+except ImportError:  # tiktoken 은 langchain-openai 의존성이라 보통 설치되어 있다
+
+    def count_tokens(text: str) -> int:
+        # o200k 기준 한국어는 대략 음절 1.5~2개가 토큰 하나
+        return len(text) // 2
+
+
+_P = np.uint64(_MERSENNE_PRIME)
+_LOW32 = np.uint64((1 << 32) - 1)
+_LOW29 = np.uint64((1 << 29) - 1)
+_29, _32, _61 = np.uint64(29), np.uint64(32), np.uint64(61)
+
+_rng = np.random.default_rng(20240101)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=DEDUP_NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, n: int = SHINGLE_SIZE) -> set[str]:
+    compact = _NON_TEXT.sub("", unicodedata.normalize("NFKC", text)).lower()
+    if len(compact) < n:
+        return {compact} if compact else set()
+    return {compact[i : i + n] for i in range(len(compact) - n + 1)}
+
+
+def minhash(shingle_set: set[str]) -> np.ndarray:
+    if not shingle_set:
+        return np.full(DEDUP_NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64, count=len(shingle_set)
+    )
+    # (a * h + b) mod p. crc32 값은 32비트라 이미 p 보다 작다
+    permuted = _mod_mersenne(_mulmod_mersenne(hashes[:, None], _PERM_A[None, :]) + _PERM_B[None, :])
+    return permuted.min(axis=0)
+
+
+def _mod_mersenne(x: np.ndarray) -> np.ndarray:
+    """x < 2**64 를 p = 2**61 - 1 로 나눈 나머지. 2**61 ≡ 1 (mod p) 이라 상위 비트를 더해 접는다."""
+    x = (x & _P) + (x >> _61)
+    x = (x & _P) + (x >> _61)
+    return np.where(x >= _P, x - _P, x)
+
+
+def _mulmod_mersenne(h: np.ndarray, a: np.ndarray) -> np.ndarray:
+    """h < 2**32, a < 2**61 일 때 a * h mod p 를 uint64 범위 안에서 계산한다.
+
+    a 를 상위 29비트 / 하위 32비트로 나눠 곱하면 각 곱이 2**64 를 넘지 않는다.
+    a * h = (h * a_hi) * 2**32 + h * a_lo 이고, t = h * a_hi 를 t_hi * 2**29 + t_lo 로 나누면
+    t * 2**32 = t_hi * 2**61 + t_lo * 2**32 ≡ t_hi + t_lo * 2**32 (mod p) 이다.
+    """
+    high = h * (a >> _32)
+    low = _mod_mersenne(h * (a & _LOW32))
+    high = (high >> _29) + ((high & _LOW29) << _32)
+    return _mod_mersenne(high + low)
+
+
+def _is_duplicate(jaccard: float, size_a: int, size_b: int) -> tuple[bool, bool]:
+    """(중복 여부, b 가 a 를 포함하는 쪽인지). 포함 정도는 Jaccard 와 집합 크기로 추정한다."""
+    if jaccard >= DEDUP_THRESHOLD:
+        return True, size_b > size_a
+    if jaccard <= 0:
+        return False, False
+    # |A∩B| = J(|A|+|B|)/(1+J)
+    intersection = jaccard * (size_a + size_b) / (1 + jaccard)
+    smaller = min(size_a, size_b)
+    if smaller and intersection / smaller >= DEDUP_CONTAINMENT:
+        return True, size_b > size_a
+    return False, False
+
+
+class DedupStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.documents_in = 0
+        self.documents_removed = 0
+        self.tokens_in = 0
+        self.tokens_removed = 0
+        self.seconds = 0.0
+        # generate / 환각 검사 단계별 (호출 수, 누적 시간). 중복 제거 전후 지연 비교용
+        self._stages: dict[str, list] = defaultdict(lambda: [0, 0.0])
+
+    @contextmanager
+    def timed(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stages[stage][0] += 1
+                self._stages[stage][1] += time.perf_counter() - started
+
+    def record(self, documents_in: int, documents_removed: int, tokens_in: int, tokens_removed: int, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.documents_in += documents_in
+            self.documents_removed += documents_removed
+            self.tokens_in += tokens_in
+            self.tokens_removed += tokens_removed
+            self.seconds += seconds
+
+    def stats(self) -> dict:
+        requests = self.requests
+        return {
+            "enabled": DEDUP_ENABLED,
+            "requests": requests,
+            "documents_removed": self.documents_removed,
+            "tokens_removed": self.tokens_removed,
+            "tokens_removed_per_request": self.tokens_removed / requests if requests else 0.0,
+            "token_reduction": self.tokens_removed / self.tokens_in if self.tokens_in else 0.0,
+            "dedup_ms_avg": self.seconds * 1000 / requests if requests else 0.0,
+            **{f"{stage}_ms_avg": seconds * 1000 / calls for stage, (calls, seconds) in self._stages.items()},
+        }
+
+
+dedup_stats = DedupStats()
+register_metrics("context_dedup", dedup_stats.stats)
+
+
+def dedupe_documents(docs: list[Document]) -> list[Document]:
+    """근접 중복 문서를 제거한다. 남은 문서의 순서는 원래 순위를 따른다."""
+    if not DEDUP_ENABLED or len(docs) < 2:
+        return docs
+
+    started = time.perf_counter()
+    shingle_sets = [shingles(doc.page_content) for doc in docs]
+    signatures = np.stack([minhash(s) for s in shingle_sets])
+
+    # kept: 결과 자리(원래 순위) -> 그 자리를 차지한 문서 인덱스
+    kept: list[int] = []
+    for i in range(len(docs)):
+        duplicate = False
+        for slot, j in enumerate(kept):
+            jaccard = float(np.mean(signatures[i] == signatures[j]))
+            is_duplicate, i_contains_j = _is_duplicate(jaccard, len(shingle_sets[j]), len(shingle_sets[i]))
+            if is_duplicate:
+                if i_contains_j:
+                    kept[slot] = i
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(i)
+
+    tokens = [count_tokens(doc.page_content) for doc in docs]
+    removed = set(range(len(docs))) - set(kept)
+    dedup_stats.record(
+        documents_in=len(docs),
+        documents_removed=len(removed),
+        tokens_in=sum(tokens),
+        tokens_removed=sum(tokens[i] for i in removed),
+        seconds=time.perf_counter() - started,
+    )
+    return [docs[i] for i in kept]
@@ -0,0 +1,161 @@
+"""동시에 들어온 질의 임베딩을 모아서 한 번에 보내는 마이크로 배처(micro-batcher)
+
+요청마다 UpstageEmbeddings.embed_query 로 HTTP 호출을 하나씩 보내면, 동시 요청이 많을 때
+호출 수만큼 왕복 지연과 rate limit 을 쓴다.
+
+BatchingEmbeddings.embed_query 는 질의를 큐에 넣고 Future 를 기다린다.
+수집 스레드는 첫 질의가 들어온 뒤 EMBEDDING_BATCH_WINDOW_MS 동안(또는 EMBEDDING_BATCH_MAX_SIZE 개가
+찰 때까지) 모은 질의를 embed_documents 한 번으로 보내고 각 Future 에 결과를 넣는다.
+API 호출은 별도 스레드 풀에서 하므로 호출이 진행 중이어도 다음 배치를 모은다.
+
+embed_documents 로 보내므로 질의/문서 임베딩이 같은 모델(예: "embedding-passage")일 때만 쓴다.
+llm.get_embeddings 는 EMBEDDING_BATCH_MODELS 에 있는 모델만 감싼다.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+from ..core.config import EMBEDDING_BATCH_MAX_INFLIGHT, EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_WINDOW_MS
+
+# 배치 크기 분포 구간 (상한 포함)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class EmbeddingBatchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.api_calls = 0
+        self.texts_sent = 0
+        self.errors = 0
+        self.wait_seconds = 0.0
+        self.batch_sizes = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.batch_sizes_over = 0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_batch(self, size: int, texts: int, wait_seconds: float) -> None:
+        with self._lock:
+            self.api_calls += 1
+            self.texts_sent += texts
+            self.wait_seconds += wait_seconds
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self.batch_sizes[bucket] += 1
+                    break
+            else:
+                self.batch_sizes_over += 1
+
+    def stats(self) -> dict:
+        histogram = {f"<={bucket}": count for bucket, count in self.batch_sizes.items()}
+        histogram[f">{BATCH_SIZE_BUCKETS[-1]}"] = self.batch_sizes_over
+        return {
+            "window_ms": EMBEDDING_BATCH_WINDOW_MS,
+            "max_batch": EMBEDDING_BATCH_MAX_SIZE,
+            "queries": self.queries,
+            "api_calls": self.api_calls,
+            # 질의마다 호출했을 때보다 줄어든 임베딩 API 호출
+            "api_calls_saved": self.queries - self.api_calls,
+            "avg_batch_size": self.queries / self.api_calls if self.api_calls else 0.0,
+            "batch_size_histogram": histogram,
+            "avg_wait_ms": self.wait_seconds * 1000 / self.queries if self.queries else 0.0,
+            "errors": self.errors,
+        }
+
+
+class _Pending:
+    __slots__ = ("text", "future", "enqueued")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchingEmbeddings(Embeddings):
+    """embed_query 를 window_ms 동안 모아 embed_documents 한 번으로 보낸다. embed_documents 는 그대로 넘긴다."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch: int = EMBEDDING_BATCH_MAX_SIZE,
+        max_inflight: int = EMBEDDING_BATCH_MAX_INFLIGHT,
+    ):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = EmbeddingBatchStats()
+        self._queue: queue.Queue[_Pending] = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="embedding-batch")
+        self._collector: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        if self._collector is None:
+            with self._lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(
+                        target=self._collect, name=f"embedding-batch-{self.model}", daemon=True
+                    )
+                    self._collector.start()
+        pending = _Pending(text)
+        self.stats.add(queries=1)
+        self._queue.put(pending)
+        return pending.future
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            # 창이 끝났을 때 이미 쌓여 있는 질의도 최대 크기까지 함께 보낸다
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch: list[_Pending]) -> None:
+        # 같은 배치 안의 같은 질의는 한 번만 보낸다
+        texts = list(dict.fromkeys(pending.text for pending in batch))
+        started = time.monotonic()
+        self.stats.record_batch(len(batch), len(texts), sum(started - p.enqueued for p in batch))
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"embedding count mismatch: sent {len(texts)}, got {len(vectors)}")
+        except Exception as e:
+            self.stats.add(errors=1)
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for pending in batch:
+            pending.future.set_result(by_text[pending.text])
@@ -0,0 +1,106 @@
+"""LLM 없이 계산하는 답변 근거(grounding) 점수
+
+- 문자 n-gram 겹침: 답변의 문자 3-gram 중 근거 문서(검색 결과, 도구 출력)에 있는 비율.
+  한국어는 조사/어미 때문에 단어 단위 비교가 잘 맞지 않아서 공백을 뺀 문자 n-gram 을 쓴다.
+- 숫자 일치: 답변에 나온 숫자(금액, 세율, 조문 번호) 중 근거 문서나 질문에 있는 비율.
+  "1천400만원", "1,400만원", "14,000,000원" 은 모두 같은 금액(14000000)으로 비교한다.
+- 불확실 표현("확인할 수 없", "정보가 없" 등)이 있으면 점수와 상관없이 실패로 본다.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+
+NGRAM_SIZE = 3
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# 숫자 + 한국어 단위 (1억5천만, 1천400만, 84만, 2천). "조" 는 조문 번호(제55조)와 겹쳐서 단위로 보지 않는다
+AMOUNT_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?\s*(?:[억만천백]\s*(?:\d[\d,]*(?:\.\d+)?)?\s*)+")
+AMOUNT_PART = re.compile(r"(\d[\d,]*(?:\.\d+)?)?\s*([억만천백])?")
+LARGE_UNITS = {"억": 10**8, "만": 10**4}
+SMALL_UNITS = {"천": 1000, "백": 100}
+UNCERTAIN_MARKERS = (
+    "확인할 수 없",
+    "알 수 없",
+    "정보가 없",
+    "찾을 수 없",
+    "모르겠",
+    "제공되지 않",
+    "I don't know",
+)
+
+
+@dataclass
+class GroundingResult:
+    score: float
+    ngram_overlap: float
+    number_support: float
+    uncertain: bool
+
+    def passed(self, threshold: float) -> bool:
+        return not self.uncertain and self.score >= threshold
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> set[str]:
+    compact = re.sub(r"\s+", "", text)
+    return {compact[i : i + n] for i in range(len(compact) - n + 1)}
+
+
+def similarity(a: str, b: str) -> float:
+    """두 질의의 문자 n-gram Jaccard 유사도 (NFKC 정규화, 대소문자/공백 무시)"""
+    a, b = (unicodedata.normalize("NFKC", text).lower() for text in (a, b))
+    a_grams, b_grams = char_ngrams(a), char_ngrams(b)
+    if not a_grams or not b_grams:
+        return float(a.split() == b.split())
+    return len(a_grams & b_grams) / len(a_grams | b_grams)
+
+
+def parse_korean_amount(expression: str) -> int:
+    """ "1억5천만" -> 150000000, "1천400만" -> 14000000 """
+    total = section = 0
+    for number, unit in AMOUNT_PART.findall(expression):
+        if not number and not unit:
+            continue
+        value = float(number.replace(",", "")) if number else 0
+        if unit in SMALL_UNITS:
+            section += (value or 1) * SMALL_UNITS[unit]
+        elif unit in LARGE_UNITS:
+            total += ((section + value) or 1) * LARGE_UNITS[unit]
+            section = 0
+        else:
+            section += value
+    return int(total + section)
+
+
+def normalize_amounts(text: str) -> str:
+    return AMOUNT_PATTERN.sub(lambda m: f"{parse_korean_amount(m.group())} ", text)
+
+
+def extract_numbers(text: str) -> set[str]:
+    return {m.group().replace(",", "").rstrip(".") for m in NUMBER_PATTERN.finditer(normalize_amounts(text))}
+
+
+def grounding_score(answer: str, sources: list[str], question: str = "") -> GroundingResult:
+    """answer 가 sources(+question) 에 얼마나 근거하는지 0~1 점수로 계산한다.
+
+    근거 문서가 없으면(일반 대화 등) 겹침을 계산할 수 없으므로 불확실 표현만 본다.
+    """
+    uncertain = not answer.strip() or any(marker in answer for marker in UNCERTAIN_MARKERS)
+    if not sources:
+        return GroundingResult(score=1.0, ngram_overlap=1.0, number_support=1.0, uncertain=uncertain)
+
+    source_text = "\n".join(sources)
+    answer_ngrams = char_ngrams(answer)
+    source_ngrams = char_ngrams(source_text) | char_ngrams(question)
+    ngram_overlap = len(answer_ngrams & source_ngrams) / len(answer_ngrams) if answer_ngrams else 0.0
+
+    answer_numbers = extract_numbers(answer)
+    known_numbers = extract_numbers(source_text) | extract_numbers(question)
+    number_support = (
+        len(answer_numbers & known_numbers) / len(answer_numbers) if answer_numbers else 1.0
+    )
+
+    return GroundingResult(
+        score=(ngram_overlap + number_support) / 2,
+        ngram_overlap=ngram_overlap,
+        number_support=number_support,
+        uncertain=uncertain,
+    )
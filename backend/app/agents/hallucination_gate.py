@@ -0,0 +1,205 @@
+"""LLM 환각 검사 전에 하는 로컬 근거(grounding) 사전 검사
+
+legacy 그래프의 check_hallucination 은 항상 문서 전체 + 답변을 small_llm 에 보낸다.
+grounding_score(문자 n-gram 겹침 + 숫자/금액 일치)가
+
+- high 이상이면 LLM 없이 "not hallucinated"
+- low 미만이면 LLM 없이 "hallucinated"
+- 그 사이(애매한 구간)이거나 답변이 불확실한 표현(uncertain)이면 LLM 검사기를 호출한다.
+
+LLM 검사기를 호출할 때마다 (점수, LLM 판정)을 GROUNDING_LOG_PATH 에 JSONL 로 남기고,
+로컬로 결정한 경우도 GROUNDING_AUDIT_RATE 비율로 LLM 을 함께 호출해서 기록한다.
+scripts/calibrate_grounding.py 가 이 로그로 low / high 를 다시 정해 GROUNDING_CALIBRATION_PATH 에 저장한다.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from ..core.config import (
+    GROUNDING_AUDIT_RATE,
+    GROUNDING_CALIBRATION_PATH,
+    GROUNDING_LOG_PATH,
+    GROUNDING_PRECHECK_ENABLED,
+    GROUNDING_PRECHECK_HIGH,
+    GROUNDING_PRECHECK_LOW,
+)
+from ..core.metrics import register_metrics
+from .grounding import GroundingResult, grounding_score
+
+logger = logging.getLogger(__name__)
+
+GROUNDED = "not hallucinated"
+HALLUCINATED = "hallucinated"
+
+
+def load_thresholds() -> tuple[float, float]:
+    """보정 파일이 있으면 그 값을, 없으면 환경 변수 값을 쓴다."""
+    try:
+        with open(GROUNDING_CALIBRATION_PATH, encoding="utf-8") as f:
+            calibration = json.load(f)
+        return float(calibration["low"]), float(calibration["high"])
+    except FileNotFoundError:
+        return GROUNDING_PRECHECK_LOW, GROUNDING_PRECHECK_HIGH
+    except (ValueError, KeyError) as e:
+        logger.warning("invalid grounding calibration %s: %s", GROUNDING_CALIBRATION_PATH, e)
+        return GROUNDING_PRECHECK_LOW, GROUNDING_PRECHECK_HIGH
+
+
+class GateStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.local_grounded = 0
+        self.local_hallucinated = 0
+        self.llm_calls = 0
+        self.audits = 0
+        self.audit_disagreements = 0
+        self.precheck_seconds = 0.0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        low, high = thresholds
+        decided = self.local_grounded + self.local_hallucinated
+        return {
+            "enabled": GROUNDING_PRECHECK_ENABLED,
+            "low": low,
+            "high": high,
+            "checks": self.checks,
+            "local_grounded": self.local_grounded,
+            "local_hallucinated": self.local_hallucinated,
+            # 로컬로 결정해서 부르지 않은 LLM 검사 (감사용 호출은 빼고 센다)
+            "llm_calls_avoided": decided - self.audits,
+            "llm_calls": self.llm_calls,
+            "audit_disagreement_rate": self.audit_disagreements / self.audits if self.audits else 0.0,
+            "precheck_us_avg": self.precheck_seconds * 1_000_000 / self.checks if self.checks else 0.0,
+        }
+
+
+thresholds = load_thresholds()
+gate_stats = GateStats()
+register_metrics("hallucination_precheck", gate_stats.stats)
+_log_lock = threading.Lock()
+
+
+def _log(result: GroundingResult, local: str | None, verdict: str) -> None:
+    if not GROUNDING_LOG_PATH:
+        return
+    record = {
+        "ts": time.time(),
+        "score": result.score,
+        "ngram_overlap": result.ngram_overlap,
+        "number_support": result.number_support,
+        "uncertain": result.uncertain,
+        "local": local,
+        "llm": verdict,
+        # 로컬로 결정한 경우는 감사 비율만큼만 기록되므로 보정할 때 가중치를 준다
+        "weight": 1 / GROUNDING_AUDIT_RATE if local is not None else 1.0,
+    }
+    try:
+        with _log_lock:
+            Path(GROUNDING_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+            with open(GROUNDING_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.warning("failed to write grounding log: %s", e)
+
+
+def calibrate(records: list[dict], max_error: float = 0.02, min_samples: int = 20) -> dict:
+    """로그 레코드({"score", "llm", "weight"})로 low / high 를 정한다.
+
+    high: score >= high 구간에서 LLM 이 "hallucinated" 라고 한 비율이 max_error 이하인 가장 낮은 값
+    low: score < low 구간에서 LLM 이 "not hallucinated" 라고 한 비율이 max_error 이하인 가장 높은 값
+    각 구간에 min_samples 개 이상 있어야 하고, 없으면 그 쪽은 로컬로 결정하지 않는다.
+    로컬로 결정한 구간은 감사 비율만큼만 기록되므로 weight(1 / 감사 비율)로 보정해서 센다.
+    """
+    labeled = sorted(
+        (r["score"], r["llm"] == GROUNDED, r.get("weight", 1.0))
+        for r in records
+        if r.get("llm") in (GROUNDED, HALLUCINATED)
+    )
+    # prefix[i] = 앞에서 i 개 레코드의 (개수, 가중 합, 가중 grounded 합)
+    prefix = [(0, 0.0, 0.0)]
+    for _, grounded, weight in labeled:
+        count, total, grounded_total = prefix[-1]
+        prefix.append((count + 1, total + weight, grounded_total + weight * grounded))
+    count_all, total_all, grounded_all = prefix[-1]
+    starts = {}
+    for i, (score, _, _) in enumerate(labeled):
+        starts.setdefault(score, i)
+
+    high = None
+    for score, i in starts.items():
+        count, total, grounded = (count_all - prefix[i][0], total_all - prefix[i][1], grounded_all - prefix[i][2])
+        if count >= min_samples and (total - grounded) / total <= max_error:
+            high = score
+            break
+
+    low = 0.0
+    for score, i in reversed(starts.items()):
+        count, total, grounded = prefix[i]
+        if high is not None and score > high:
+            continue
+        if count >= min_samples and grounded / total <= max_error:
+            low = score
+            break
+
+    high = high if high is not None else 1.01
+    decided = sum(weight for score, _, weight in labeled if score >= high or score < low)
+    errors = sum(
+        weight
+        for score, grounded, weight in labeled
+        if (score >= high and not grounded) or (score < low and grounded)
+    )
+    return {
+        "low": low,
+        "high": high,
+        "samples": count_all,
+        # 이 로그(가중치 반영)에 적용했을 때 LLM 없이 결정하는 비율과 LLM 판정과 다른 비율
+        "local_share": decided / total_all if total_all else 0.0,
+        "disagreement": errors / decided if decided else 0.0,
+    }
+
+
+def local_verdict(result: GroundingResult, low: float, high: float) -> str | None:
+    # "모르겠다" 류의 답변은 점수와 상관없이 LLM 검사기에 맡긴다
+    if result.uncertain:
+        return None
+    if result.score >= high:
+        return GROUNDED
+    if result.score < low:
+        return HALLUCINATED
+    return None
+
+
+def check_hallucination(answer: str, sources: list[str], question: str, grade: Callable[[], str]) -> str:
+    """grade() 는 LLM 검사기를 호출해서 "hallucinated" / "not hallucinated" 를 반환한다."""
+    if not GROUNDING_PRECHECK_ENABLED:
+        return grade()
+
+    started = time.perf_counter()
+    result = grounding_score(answer, sources, question)
+    local = local_verdict(result, *thresholds)
+    gate_stats.add(checks=1, precheck_seconds=time.perf_counter() - started)
+
+    if local is not None:
+        gate_stats.add(**{"local_grounded" if local == GROUNDED else "local_hallucinated": 1})
+        if random.random() >= GROUNDING_AUDIT_RATE:
+            return local
+        verdict = grade()
+        gate_stats.add(llm_calls=1, audits=1, audit_disagreements=int(verdict.strip() != local))
+        _log(result, local, verdict.strip())
+        # 감사 호출이어도 결정은 로컬 판정으로 한다 (감사 여부에 따라 동작이 달라지지 않도록)
+        return local
+
+    verdict = grade()
+    gate_stats.add(llm_calls=1)
+    _log(result, None, verdict.strip())
+    return verdict
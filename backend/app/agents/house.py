@@ -5,21 +5,27 @@ load_dotenv()
 import os
 from langchain_openai import ChatOpenAI
 from langchain_postgres import PGVector
-from langchain_upstage import UpstageEmbeddings
 from langgraph.graph import StateGraph, MessagesState
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_classic import hub
 
+from ..core.config import CASCADE_LARGE_MODEL, CASCADE_SMALL_MODEL
+from .cascade import model_size
+from .llm import get_embeddings
+from .retrieval_cache import cached_retriever
+
 CONNECTION_STRING = os.getenv("CONNECTION_STRING")
 
-embedding = UpstageEmbeddings(model="embedding-passage")
+embedding = get_embeddings("embedding-passage")
 
 
 # ChatOpenAI를 활용해서 사용할 LLM을 선언한다
-llm = ChatOpenAI(model="gpt-5.1")
+llm = ChatOpenAI(model=CASCADE_LARGE_MODEL)
 small_llm = ChatOpenAI(model="gpt-4o-mini")
+# 최종 답변/세액 계산 모델. config["configurable"]["model_size"] 로 고른다 (cascade.py 참고)
+answer_llms = {"small": ChatOpenAI(model=CASCADE_SMALL_MODEL), "large": llm}
 
 index_name = "house-tax-index"
 # 벡터 저장소는 Chroma를 사용해도 무방하다.
@@ -32,7 +38,7 @@ vectorstore = PGVector(
     use_jsonb=True,  # 메타데이터를 JSONB로 저장 (더 나은 성능과 유연성 제공)
 )
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+retriever = cached_retriever(vectorstore, index_name, k=3)
 
 
 # MessagesState를 사용하여 그래프를 초기화한다.
@@ -196,12 +202,16 @@ def get_market_value_rate(question: str) -> str:
 
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnablePassthrough
 
 
 @tool
 def get_house_tax(
-    tax_base_equation: str, market_value_rate: str, tax_deductible: str, question: str
+    tax_base_equation: str,
+    market_value_rate: str,
+    tax_deductible: str,
+    question: str,
+    config: RunnableConfig,
 ) -> str:
     """수집된 모든 정보를 사용하여 최종 종합부동산세액을 계산합니다.
 
@@ -243,7 +253,7 @@ def get_house_tax(
             "tax_deductible": RunnableLambda(lambda _: tax_deductible),
         }
         | house_tax_prompt
-        | llm
+        | answer_llms[model_size(config)]
         | StrOutputParser()
     )
 
@@ -259,20 +269,21 @@ tool_list = [
     get_market_value_rate,
     get_house_tax,
 ]
-llm_with_tools = llm.bind_tools(tool_list)
+llms_with_tools = {size: model.bind_tools(tool_list) for size, model in answer_llms.items()}
 tool_node = ToolNode(tool_list)
 
 
 from langchain_core.messages import SystemMessage
 
 
-def agent(state: MessagesState) -> MessagesState:
+def agent(state: MessagesState, config: RunnableConfig) -> MessagesState:
     """
     에이전트 함수는 주어진 상태에서 메시지를 가져와
     LLM과 도구를 사용하여 응답 메시지를 생성합니다.
 
     Args:
         state (MessagesState): 메시지 상태를 포함하는 state.
+        config (RunnableConfig): configurable.model_size 로 답변 모델(small/large)을 고른다.
 
     Returns:
         MessagesState: 응답 메시지를 포함하는 새로운 state.
@@ -286,7 +297,7 @@ def agent(state: MessagesState) -> MessagesState:
     """
     system_message = SystemMessage(content=system_message_content)
     messages = [system_message] + state["messages"]
-    response = llm_with_tools.invoke(messages)
+    response = llms_with_tools[model_size(config)].invoke(messages)
     return {"messages": [response]}
 
 
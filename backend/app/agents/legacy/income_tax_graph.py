@@ -8,29 +8,60 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
 from langgraph.graph import END, START, StateGraph
 from langchain_core.documents import Document
-from langchain_tavily import TavilySearch
 from langchain_postgres import PGVector
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from ...core.config import CONNECTION_STRING
+from ...core.config import (
+    CONNECTION_STRING,
+    LEGACY_INCOME_TAX_CHUNKING,
+    LEGACY_STATUTE_COLLECTION,
+    STATUTE_CHILD_K,
+    STATUTE_MAX_PARENTS,
+)
+from ..dedup import dedup_stats, dedupe_documents
+from ..hallucination_gate import check_hallucination as gate_hallucination
 from ..llm import get_embeddings, get_llm
+from ..statute_chunker import pgvector_parent_child_retriever
+from ..statute_index import pgvector_statute_retriever
+from ..web_search import WebSearch
 
 llm = get_llm()
 small_llm = get_llm(small=True)
 embedding_function = get_embeddings()
 
+# structure: scripts/ingest_statute.py 로 적재한 조문 구조 청크 컬렉션 (자식 검색 -> 부모 조문)
+collection_name = (
+    LEGACY_STATUTE_COLLECTION if LEGACY_INCOME_TAX_CHUNKING == "structure" else "income_tax_recursive_splitter"
+)
+
 vectorstore = PGVector(
     embeddings=embedding_function,  # 임베딩 함수
     connection=CONNECTION_STRING,  # PostgreSQL 연결 문자열
-    collection_name="income_tax_recursive_splitter",  # 컬렉션 이름
+    collection_name=collection_name,  # 컬렉션 이름
     distance_strategy="cosine",  # 코사인 유사도 사용
     pre_delete_collection=False,  # 기존 컬렉션 삭제 여부
     use_jsonb=True,  # 메타데이터를 JSONB로 저장 (더 나은 성능과 유연성 제공)
 )
 
-base_retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+# rewrite 가 만든 "제X조 제X항" 형태의 질의는 조문 번호로 바로 찾는다
+if LEGACY_INCOME_TAX_CHUNKING == "structure":
+    # 직접 조회 결과도 자식 청크이므로 부모 조문 복원(STATUTE_MAX_PARENTS)을 바깥에 둔다
+    base_retriever = pgvector_parent_child_retriever(
+        pgvector_statute_retriever(
+            vectorstore.as_retriever(search_kwargs={"k": STATUTE_CHILD_K}),
+            collection_name,
+            ("소득세법",),
+            k=STATUTE_CHILD_K,
+        ),
+        collection_name,
+        STATUTE_MAX_PARENTS,
+    )
+else:
+    base_retriever = pgvector_statute_retriever(
+        vectorstore.as_retriever(search_kwargs={"k": 3}), collection_name, ("소득세법",), k=3
+    )
 
 QUERY_PROMPT = PromptTemplate(
     input_variables=["question"],
@@ -62,7 +93,8 @@ graph_builder = StateGraph(AgentState)
 
 # 1번
 def retrieve(state: AgentState):
-    docs = retriever_multi.invoke(state["query"])
+    # 여러 질의로 찾은 결과에서 겹치는 청크를 프롬프트에 넣기 전에 걸러낸다
+    docs = dedupe_documents(retriever_multi.invoke(state["query"]))
     return {"context": docs}
 
 
@@ -110,40 +142,32 @@ transform_query_prompt = PromptTemplate.from_template(
     최적화된 검색 질의:"""
 )
 
-def web_search(state: AgentState) -> list[Document]:
-    transform_chain = transform_query_prompt | small_llm | StrOutputParser()
-    optimized_query = transform_chain.invoke({"query": state["query"]})
-    
-    search = TavilySearch(
-        max_results=3,
-        include_answer=True,  # 답변 포함 여부
-        include_raw_content=False,  # 원본 내용 포함 여부
-        include_images=False,  # 이미지 포함 여부
-        search_depth="advanced",  # "basic" 또는 "advanced"
-        exclude_domains=None,  # 필요하면 제외 도메인 지정 가능
-    )
+transform_chain = transform_query_prompt | small_llm | StrOutputParser()
 
-    web_results = search.invoke({"query": optimized_query})
+# 재시도 루프에서 같은 질문이 다시 들어오면 재작성/검색 결과를 재사용한다
+web_searcher = WebSearch(rewrite=lambda query: transform_chain.invoke({"query": query}))
 
-    documents = [
-        Document(page_content=r["content"], metadata={"source": r["url"]})
-        for r in web_results["results"]
-    ]
 
-    return {"context": documents}
+def web_search(state: AgentState) -> list[Document]:
+    # 같은 내용을 옮겨 실은 페이지가 자주 섞여 있다
+    documents = dedupe_documents(web_searcher.search(state["query"]))
+    # hallucinated / unhelpful 판정 후 다시 들어오는 경로라서 여기서 재시도 횟수를 센다
+    retry_count = state.get("retry_count", 0) + 1
+    return {"context": documents, "retry_count": retry_count}
 
 
 # 3번
 def generate(state: AgentState):
     rag_chain = generate_prompt | llm
-    response = rag_chain.invoke(
-        {
-            "question": state["query"],
-            "context": state["context"],
-            "chat_history": state["chat_history"],
-        },
-        config={"tags": ["final_answer"]},
-    )
+    with dedup_stats.timed("generate"):
+        response = rag_chain.invoke(
+            {
+                "question": state["query"],
+                "context": state["context"],
+                "chat_history": state["chat_history"],
+            },
+            config={"tags": ["final_answer"]},
+        )
     return {"answer": response.content}
 
 
@@ -201,11 +225,16 @@ def check_hallucination(
 
     context = [doc.page_content for doc in state["context"]]
     hallucination_chain = hallucination_prompt | small_llm | StrOutputParser()
-    response = hallucination_chain.invoke(
-        {"student_answer": state["answer"], "documents": context},
-        config={"tags": ["hallucination_check"]},
-    )
-    return response
+
+    def grade() -> str:
+        with dedup_stats.timed("hallucination_check"):
+            return hallucination_chain.invoke(
+                {"student_answer": state["answer"], "documents": context},
+                config={"tags": ["hallucination_check"]},
+            )
+
+    # 근거가 분명하거나 분명히 없는 답변은 LLM 검사기 없이 판정한다
+    return gate_hallucination(state["answer"], context, state["query"], grade)
 
 
 helpfulness_prompt = hub.pull("langchain-ai/rag-answer-helpfulness")
@@ -14,7 +14,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from ...core.config import REAL_ESTATE_TAX_COLLECTION_DIR
+from ..dedup import dedup_stats, dedupe_documents
+from ..hallucination_gate import check_hallucination as gate_hallucination
 from ..llm import get_embeddings, get_llm
+from ..statute_index import StatuteRetriever
 
 llm = get_llm()
 small_llm = get_llm(small=True)
@@ -26,7 +29,22 @@ vector_store = Chroma(
     persist_directory=str(REAL_ESTATE_TAX_COLLECTION_DIR),
 )
 
-base_retriever = vector_store.as_retriever(search_kwargs={"k": 3})
+
+def load_real_estate_documents() -> list[Document]:
+    result = vector_store.get(include=["documents", "metadatas"])
+    return [
+        Document(id=doc_id, page_content=content, metadata=metadata or {})
+        for doc_id, content, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+    ]
+
+
+# rewrite 가 만든 "제X조 제X항" 형태의 질의는 조문 번호로 바로 찾는다
+base_retriever = StatuteRetriever(
+    retriever=vector_store.as_retriever(search_kwargs={"k": 3}),
+    load_documents=load_real_estate_documents,
+    laws=("종합부동산세법", "종부세법"),
+    k=3,
+)
 
 QUERY_PROMPT = PromptTemplate(
     input_variables=["question"],
@@ -58,7 +76,8 @@ dictionary = ["사람과 관련된 표현 -> 거주자"]
 
 
 def retrieve(state: AgentState):
-    docs = retriever.invoke(state["query"])
+    # 여러 질의로 찾은 결과에서 겹치는 청크를 프롬프트에 넣기 전에 걸러낸다
+    docs = dedupe_documents(retriever.invoke(state["query"]))
     return {"context": docs}
 
 
@@ -91,14 +110,15 @@ Context: {context}""",
 
 def generate(state: AgentState):
     rag_chain = generate_prompt | llm
-    response = rag_chain.invoke(
-        {
-            "question": state["query"],
-            "context": state["context"],
-            "chat_history": state["chat_history"],
-        },
-        config={"tags": ["final_answer"]},
-    )
+    with dedup_stats.timed("generate"):
+        response = rag_chain.invoke(
+            {
+                "question": state["query"],
+                "context": state["context"],
+                "chat_history": state["chat_history"],
+            },
+            config={"tags": ["final_answer"]},
+        )
     return {"answer": response.content}
 
 
@@ -154,11 +174,16 @@ def check_hallucination(
 
     context = [doc.page_content for doc in state["context"]]
     hallucination_chain = hallucination_prompt | small_llm | StrOutputParser()
-    response = hallucination_chain.invoke(
-        {"student_answer": state["answer"], "documents": context},
-        config={"tags": ["hallucination_check"]},
-    )
-    return response
+
+    def grade() -> str:
+        with dedup_stats.timed("hallucination_check"):
+            return hallucination_chain.invoke(
+                {"student_answer": state["answer"], "documents": context},
+                config={"tags": ["hallucination_check"]},
+            )
+
+    # 근거가 분명하거나 분명히 없는 답변은 LLM 검사기 없이 판정한다
+    return gate_hallucination(state["answer"], context, state["query"], grade)
 
 
 helpfulness_prompt = hub.pull("langchain-ai/rag-answer-helpfulness")
@@ -1,3 +1,5 @@
+import threading
+
 from langchain_openai import (
     AzureChatOpenAI,
     AzureOpenAIEmbeddings,
@@ -7,11 +9,15 @@ from langchain_openai import (
 from langchain_upstage import UpstageEmbeddings
 
 from ..core.config import (
+    EMBEDDING_BATCH_MODELS,
+    EMBEDDING_BATCH_WINDOW_MS,
     OPENAI_EMBEDDING_MODEL,
     OPENAI_MODEL,
     OPENAI_SMALL_MODEL,
     UPSTAGE_EMBEDDING_MODEL,
 )
+from ..core.metrics import register_metrics
+from .embedding_batch import BatchingEmbeddings
 
 
 def get_llm(small: bool = True):
@@ -20,5 +26,26 @@ def get_llm(small: bool = True):
     return ChatOpenAI(model=OPENAI_MODEL, temperature=0)
 
 
-def get_embeddings():
-    return UpstageEmbeddings(model=UPSTAGE_EMBEDDING_MODEL)
+# 모델 -> 프로세스에서 같이 쓰는 임베딩
+# EMBEDDING_BATCH_MODELS 의 모델은 동시 요청의 질의 임베딩을 한 배치로 모은다
+_embeddings: dict[str, UpstageEmbeddings | BatchingEmbeddings] = {}
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings(model: str = UPSTAGE_EMBEDDING_MODEL):
+    with _embeddings_lock:
+        if model not in _embeddings:
+            embeddings = UpstageEmbeddings(model=model)
+            batched = EMBEDDING_BATCH_WINDOW_MS > 0 and model in EMBEDDING_BATCH_MODELS
+            _embeddings[model] = BatchingEmbeddings(embeddings) if batched else embeddings
+    return _embeddings[model]
+
+
+register_metrics(
+    "embedding_batch",
+    lambda: {
+        model: embeddings.stats.stats()
+        for model, embeddings in _embeddings.items()
+        if isinstance(embeddings, BatchingEmbeddings)
+    },
+)
@@ -0,0 +1,165 @@
+"""pgvector 컬렉션을 메모리 맵(mmap) 파일로 내보내서 프로세스 안에서 검색하는 로컬 인덱스
+
+세법 코퍼스는 작고 거의 바뀌지 않으므로 검색마다 Postgres 를 왕복할 필요가 없다.
+파일은 OS 페이지 캐시를 통해 모든 uvicorn 워커가 복사 없이 공유한다.
+
+LOCAL_INDEX_DIR/<collection>/v<version>/
+    vectors.npy   float32 (n, dims), L2 정규화 -> 내적 = 코사인 유사도
+    chunks.bin    청크 JSON({"id", "content", "metadata"})을 이어 붙인 UTF-8
+    offsets.npy   int64 (n + 1), chunks.bin 안의 각 청크 시작 위치
+
+새 버전을 내보내면 바로 전 버전만 남기고 더 오래된 버전 디렉터리는 지운다. 다른 워커의 버전 캐시
+(COLLECTION_VERSION_TTL_SECONDS)가 아직 전 버전을 가리킬 수 있어서 전 버전은 남겨 둔다.
+이미 열어 둔 mmap 은 파일을 지워도 마지막 참조가 사라질 때까지 읽을 수 있다.
+"""
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+from sqlalchemy import text
+
+from ..core.config import LOCAL_INDEX_DIR
+from .collections import get_collection_version, get_vector_engine
+
+
+def index_path(collection: str, version: int) -> Path:
+    return Path(LOCAL_INDEX_DIR) / collection / f"v{version}"
+
+
+def export_collection(collection: str, version: int) -> Path:
+    """컬렉션을 로컬 인덱스 파일로 내보낸다. 임시 디렉터리에 쓴 뒤 rename 하므로 원자적이다."""
+    target = index_path(collection, version)
+    if target.exists():
+        return target
+
+    with get_vector_engine().connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT e.id, e.document, e.cmetadata, e.embedding::text AS embedding "
+                "FROM langchain_pg_embedding e "
+                "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
+                "WHERE c.name = :name ORDER BY e.id"
+            ),
+            {"name": collection},
+        ).all()
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=".export-"))
+    try:
+        vectors = np.array([json.loads(row.embedding) for row in rows], dtype=np.float32)
+        if len(rows):
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        np.save(tmp / "vectors.npy", vectors)
+
+        offsets = [0]
+        with open(tmp / "chunks.bin", "wb") as f:
+            for row in rows:
+                record = json.dumps(
+                    {"id": row.id, "content": row.document, "metadata": row.cmetadata or {}},
+                    ensure_ascii=False,
+                ).encode()
+                f.write(record)
+                offsets.append(offsets[-1] + len(record))
+        np.save(tmp / "offsets.npy", np.array(offsets, dtype=np.int64))
+
+        os.rename(tmp, target)
+    except OSError:
+        # 다른 워커가 먼저 같은 버전을 내보낸 경우
+        if not target.exists():
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def prune_versions(collection: str, current: int) -> list[Path]:
+    """current 와 바로 전 버전(current - 1)만 남기고 지운 경로를 반환한다."""
+    root = Path(LOCAL_INDEX_DIR) / collection
+    removed = []
+    for path in root.glob("v*") if root.exists() else []:
+        version = path.name[1:]
+        if version.isdigit() and int(version) < current - 1:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+    return removed
+
+
+class LocalIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        # mmap_mode="r": 파일을 메모리로 복사하지 않고 페이지 캐시를 공유한다
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self._chunks_file = open(path / "chunks.bin", "rb")
+        self._chunks = (
+            mmap.mmap(self._chunks_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.offsets[-1] > 0
+            else b""
+        )
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def document(self, i: int) -> Document:
+        record = json.loads(self._chunks[self.offsets[i] : self.offsets[i + 1]])
+        return Document(id=record["id"], page_content=record["content"], metadata=record["metadata"])
+
+    def search(self, query: list[float], k: int) -> list[tuple[Document, float]]:
+        """brute force 코사인 유사도 top-k (수천 청크 규모에서는 HNSW 보다 충분히 빠르다)"""
+        if len(self) == 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        scores = self.vectors @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.document(int(i)), float(scores[i])) for i in top]
+
+    def close(self) -> None:
+        """스크립트용. 서버에서는 검색 중인 스레드가 있을 수 있으므로 닫지 않고 참조만 버린다."""
+        if isinstance(self._chunks, mmap.mmap):
+            self._chunks.close()
+        self._chunks_file.close()
+
+
+class LocalIndexRetriever(BaseRetriever):
+    """로컬 인덱스 retriever. 컬렉션 버전이 바뀌면 새 버전을 내보내고 다시 연다.
+
+    이전 인덱스는 닫지 않는다. 아직 old.search() 안에 있는 스레드가 지역 변수로 참조를 들고 있고,
+    마지막 참조가 사라지면 GC 가 mmap 과 파일을 닫는다.
+    """
+
+    embeddings: Embeddings
+    collection: str
+    k: int = 4
+
+    _index: LocalIndex | None = PrivateAttr(default=None)
+    _version: int | None = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_index(self) -> LocalIndex:
+        version = get_collection_version(self.collection)
+        if self._index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = LocalIndex(export_collection(self.collection, version))
+                    self._version = version
+                    prune_versions(self.collection, version)
+        return self._index
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        index = self._get_index()
+        return [doc for doc, _ in index.search(self.embeddings.embed_query(query), self.k)]
@@ -0,0 +1,204 @@
+"""supervisor 라우팅과 동시에 실행하는 추측(speculative) 검색
+
+supervisor 가 router 호출 결과를 기다리는 동안, 질문에 나온 세목 키워드로 고른 후보 작업자의
+컬렉션을 미리 검색해 둔다. 라우팅이 끝나면 선택된 작업자에게만 결과를 넘기고 나머지는 취소한다.
+
+- 질문 임베딩은 SharedQueryEmbeddings 로 한 번만 계산해서 모든 컬렉션 검색이 같이 쓴다.
+- 작업자의 retriever 도구는 PrefetchedRetriever 로 감싸져 있어서, 도구 검색어가 원래 질문과
+  충분히 비슷하면 미리 검색한 문서를 바로 돌려준다. (create_agent 는 검색어를 다시 쓰기도 한다)
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from ..core.cache import TTLCache
+from ..core.config import PREFETCH_ENABLED, PREFETCH_MIN_SIMILARITY
+from ..core.metrics import register_metrics
+from .grounding import similarity
+from .retrieval_cache import normalize_query
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+# 작업자에서 사용할 미리 검색한 결과: (질문, 문서 목록)
+_prefetched: contextvars.ContextVar[tuple[str, list[Document]] | None] = contextvars.ContextVar(
+    "prefetched_documents", default=None
+)
+
+
+class SharedQueryEmbeddings(Embeddings):
+    """embed_query 결과를 (모델, 정규화한 질의) 기준으로 잠깐 공유한다.
+
+    같은 질문으로 여러 컬렉션을 동시에 검색해도 임베딩 API 는 한 번만 호출된다.
+    """
+
+    _cache = TTLCache(maxsize=256, ttl=60)
+    _inflight: dict[tuple, Future] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = (self.model, normalize_query(text))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            embedding = self.embeddings.embed_query(text)
+            self._cache.set(key, embedding)
+            future.set_result(embedding)
+            return embedding
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class PrefetchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+        self.discarded = 0
+        self.served = 0
+        self.query_mismatch = 0
+        self.saved_seconds = 0.0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREFETCH_ENABLED,
+            "started": self.started,
+            "used": self.used,
+            # 시작 전에 취소한 검색 / 이미 시작해서 끝까지 실행됐지만 버린 검색
+            "cancelled": self.cancelled,
+            "discarded": self.discarded,
+            "served_by_retriever": self.served,
+            "query_mismatch": self.query_mismatch,
+            # router 호출과 겹쳐서 첫 토큰 전에 줄어든 검색 시간
+            "saved_ms_total": self.saved_seconds * 1000,
+            "saved_ms_avg": self.saved_seconds * 1000 / self.used if self.used else 0.0,
+        }
+
+
+prefetch_stats = PrefetchStats()
+register_metrics("retrieval_prefetch", prefetch_stats.stats)
+
+
+class Prefetch:
+    """작업자별로 시작한 검색 작업"""
+
+    def __init__(self, question: str, retrievers: dict[str, BaseRetriever]):
+        self.question = question
+        self.started = time.perf_counter()
+        self._futures: dict[str, Future] = {
+            worker: _executor.submit(self._search, retriever) for worker, retriever in retrievers.items()
+        }
+        prefetch_stats.add(started=len(self._futures))
+
+    def _search(self, retriever: BaseRetriever) -> tuple[list[Document], float]:
+        started = time.perf_counter()
+        return retriever.invoke(self.question), time.perf_counter() - started
+
+    def collect(self, plan: list[str]) -> dict[str, dict]:
+        """plan 에 있는 작업자의 결과를 기다려서 돌려주고 나머지는 취소한다.
+
+        반환값은 Send 로 작업자 상태에 실어 보낼 수 있도록 직렬화 가능한 dict 이다.
+        """
+        routed = time.perf_counter()
+        result = {}
+        for worker, future in self._futures.items():
+            if worker not in plan:
+                # 이미 실행 중인 검색은 취소되지 않는다
+                if future.cancel():
+                    prefetch_stats.add(cancelled=1)
+                else:
+                    prefetch_stats.add(discarded=1)
+                continue
+            try:
+                docs, search_seconds = future.result()
+            except Exception:
+                continue
+            # 라우팅이 끝나기 전에 진행된 검색 시간만큼 첫 토큰이 빨라진다
+            prefetch_stats.add(used=1, saved_seconds=min(search_seconds, routed - self.started))
+            result[worker] = {
+                "question": self.question,
+                "documents": [
+                    {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in docs
+                ],
+            }
+        return result
+
+
+def start_prefetch(question: str, candidates: dict[str, tuple[tuple[str, ...], BaseRetriever]]) -> Prefetch | None:
+    """candidates: 작업자 -> (세목 키워드, retriever). 질문에 키워드가 있는 작업자만 미리 검색한다."""
+    if not PREFETCH_ENABLED or not question:
+        return None
+    retrievers = {
+        worker: retriever
+        for worker, (keywords, retriever) in candidates.items()
+        if any(keyword in question for keyword in keywords)
+    }
+    if not retrievers:
+        return None
+    return Prefetch(question, retrievers)
+
+
+@contextmanager
+def use_prefetched(prefetched: dict | None):
+    """작업자 실행 동안 PrefetchedRetriever 가 미리 검색한 문서를 쓰도록 한다."""
+    if not prefetched:
+        yield
+        return
+    docs = [Document(**doc) for doc in prefetched["documents"]]
+    token = _prefetched.set((prefetched["question"], docs))
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
+
+
+class PrefetchedRetriever(BaseRetriever):
+    """검색어가 원래 질문과 비슷하면 미리 검색한 문서를 돌려주고, 아니면 retriever 로 검색한다."""
+
+    retriever: BaseRetriever
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        prefetched = _prefetched.get()
+        if prefetched is not None:
+            question, docs = prefetched
+            if similarity(query, question) >= PREFETCH_MIN_SIMILARITY:
+                prefetch_stats.add(served=1)
+                return [Document(id=d.id, page_content=d.page_content, metadata=dict(d.metadata)) for d in docs]
+            prefetch_stats.add(query_mismatch=1)
+        return self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
@@ -0,0 +1,134 @@
+"""양자화(halfvec / binary) 1차 검색 + 원본 벡터 재정렬(rescore)
+
+float32 벡터(3072~4096 차원, 청크당 12~16KB) 대신 양자화된 표현식 인덱스로
+RESCORE_CANDIDATES 개의 후보를 뽑고, 후보만 원본 벡터의 코사인 거리로 다시 정렬한다.
+양자화된 사본은 별도 컬럼이 아니라 표현식 인덱스에만 저장되므로 테이블 크기는 그대로다.
+
+- halfvec: float16, 인덱스 크기 1/2. pgvector HNSW 는 halfvec 4000 차원까지만 지원한다.
+- binary: 차원당 1bit, 인덱스 크기 1/32. 해밍 거리로 후보를 넉넉하게 뽑아야 recall 이 유지된다.
+
+인덱스는 scripts/create_quantized_indexes.py 로 만든다.
+"""
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from sqlalchemy import text
+
+from ..core.config import (
+    EMBEDDING_SEARCH_MODE,
+    LANGCHAIN_EMBEDDING_DIMS,
+    RESCORE_CANDIDATES,
+    RETRIEVER_BACKEND,
+)
+from .collections import get_vector_engine
+
+SEARCH_MODES = ("full", "halfvec", "binary")
+HALFVEC_INDEX_MAX_DIMS = 4000
+
+
+def quantized_expression(mode: str, dims: int, column: str = "embedding") -> str:
+    if mode == "halfvec":
+        return f"({column}::halfvec({dims}))"
+    if mode == "binary":
+        return f"(binary_quantize({column})::bit({dims}))"
+    raise ValueError(f"unknown quantized search mode: {mode}")
+
+
+def _query_distance(mode: str, dims: int) -> str:
+    expression = quantized_expression(mode, dims)
+    if mode == "halfvec":
+        return f"{expression} <=> CAST(:query AS halfvec({dims}))"
+    return f"{expression} <~> binary_quantize(CAST(:query AS vector({dims})))"
+
+
+def build_search_sql(table: str, columns: str, mode: str, dims: int, where: str = "TRUE"):
+    """table 에서 :query 와 가까운 :k 개 행을 찾는 SQL.
+
+    columns 는 반환할 컬럼이며 embedding 은 rescore 에 쓰이므로 따로 적지 않는다.
+    결과에는 원본 벡터 기준 cosine distance 가 distance 컬럼으로 붙는다.
+    """
+    if mode == "full":
+        return text(
+            f"SELECT {columns}, embedding <=> CAST(:query AS vector) AS distance "
+            f"FROM {table} WHERE {where} "
+            f"ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+        )
+
+    return text(
+        f"SELECT {columns}, embedding <=> CAST(:query AS vector) AS distance FROM ("
+        f"  SELECT {columns}, embedding FROM {table} WHERE {where} "
+        f"  ORDER BY {_query_distance(mode, dims)} LIMIT :candidates"
+        f") AS candidates ORDER BY distance LIMIT :k"
+    )
+
+
+def index_ddl(table: str, index_name: str, mode: str, dims: int) -> str:
+    if mode == "halfvec":
+        if dims > HALFVEC_INDEX_MAX_DIMS:
+            raise ValueError(
+                f"HNSW halfvec 인덱스는 {HALFVEC_INDEX_MAX_DIMS} 차원까지만 지원합니다 ({dims}). binary 를 사용하세요."
+            )
+        ops = "halfvec_cosine_ops"
+    else:
+        ops = "bit_hamming_ops"
+    return (
+        f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} "
+        f"USING hnsw ({quantized_expression(mode, dims)} {ops})"
+    )
+
+
+def to_vector_literal(embedding: list[float]) -> str:
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+class QuantizedPGVectorRetriever(BaseRetriever):
+    """langchain_pg_embedding 컬렉션을 양자화 인덱스 + rescore 로 검색한다."""
+
+    embeddings: Embeddings
+    collection: str
+    k: int = 4
+    mode: str = EMBEDDING_SEARCH_MODE
+    dims: int = LANGCHAIN_EMBEDDING_DIMS
+    candidates: int = RESCORE_CANDIDATES
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        sql = build_search_sql(
+            "langchain_pg_embedding",
+            "id, document, cmetadata",
+            self.mode,
+            self.dims,
+            where=(
+                "collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = :collection)"
+            ),
+        )
+        with get_vector_engine().connect() as conn:
+            rows = conn.execute(
+                sql,
+                {
+                    "query": to_vector_literal(self.embeddings.embed_query(query)),
+                    "collection": self.collection,
+                    "k": self.k,
+                    "candidates": max(self.candidates, self.k),
+                },
+            ).all()
+        return [
+            Document(id=row.id, page_content=row.document, metadata=row.cmetadata or {})
+            for row in rows
+        ]
+
+
+def vector_retriever(vectorstore, collection: str, k: int = 4) -> BaseRetriever:
+    """RETRIEVER_BACKEND / EMBEDDING_SEARCH_MODE 에 맞는 PGVector 컬렉션 retriever"""
+    if RETRIEVER_BACKEND == "local":
+        from .local_index import LocalIndexRetriever
+
+        return LocalIndexRetriever(embeddings=vectorstore.embeddings, collection=collection, k=k)
+    if EMBEDDING_SEARCH_MODE == "full":
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+    return QuantizedPGVectorRetriever(
+        embeddings=vectorstore.embeddings, collection=collection, k=k
+    )
+
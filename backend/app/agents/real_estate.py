@@ -1,13 +1,20 @@
 import os
 from dotenv import load_dotenv
 from langchain_postgres import PGVector
-from langchain_upstage import UpstageEmbeddings
 from langchain_core.tools.retriever import create_retriever_tool
 from langchain.agents import create_agent
 
+from ..core.config import CASCADE_LARGE_MODEL, CASCADE_SMALL_MODEL
+from .llm import get_embeddings
+from .prefetch import PrefetchedRetriever, SharedQueryEmbeddings
+from .retrieval_cache import cached_retriever
+from .statute_index import pgvector_statute_retriever
+
 load_dotenv()
 
-embedding = UpstageEmbeddings(model="embedding-passage")
+# 라우팅 중 미리 검색할 때 계산한 질문 임베딩을 다른 컬렉션 검색과 공유하고,
+# 다른 요청의 질의 임베딩과는 한 번의 API 호출로 모아 보낸다
+embedding = SharedQueryEmbeddings(get_embeddings("embedding-passage"))
 
 CONNECTION_STRING = os.getenv("CONNECTION_STRING")
 
@@ -22,12 +29,17 @@ vectorstore = PGVector(
     use_jsonb=True,  # 메타데이터를 JSONB로 저장 (더 나은 성능과 유연성 제공)
 )
 
-retriever = vectorstore.as_retriever()
+# 조문 번호가 있는 질의는 직접 조회, 나머지는 (캐시된) 벡터 검색
+retriever = pgvector_statute_retriever(
+    cached_retriever(vectorstore, index_name), index_name, ("종합부동산세법", "종부세법")
+)
 
 retriever_tool = create_retriever_tool(
-    retriever,
+    PrefetchedRetriever(retriever=retriever),
     "search_real_estate_tax_law",
     "2025년 대한민국의 종합부동산세법을 검색한 결과를 반환합니다",
 )
 
-real_estate_tax_agent = create_agent(model="gpt-5.1", tools=[retriever_tool])
+real_estate_tax_agent = create_agent(model=CASCADE_LARGE_MODEL, tools=[retriever_tool])
+# cascade 정책에서 먼저 시도하는 작은 모델 에이전트
+real_estate_tax_small_agent = create_agent(model=CASCADE_SMALL_MODEL, tools=[retriever_tool])
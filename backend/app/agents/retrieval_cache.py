@@ -0,0 +1,174 @@
+"""벡터 검색(retriever) 결과 캐시
+
+(컬렉션, 컬렉션 버전, 정규화한 질의 해시, k) -> 문서 id/내용/메타데이터
+house.py 의 고정 질문이나 자주 들어오는 질문이 매번 pgvector 를 조회하지 않도록 한다.
+
+여러 워커 프로세스로 실행할 때는 RETRIEVAL_CACHE_BACKEND=sqlite 로 같은 호스트의 워커들이
+디스크 캐시 파일 하나를 공유한다. (워커마다 같은 결과를 따로 들고 있지 않도록)
+"""
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..core.config import (
+    RETRIEVAL_CACHE_BACKEND,
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_CACHE_MAX_BYTES,
+    RETRIEVAL_CACHE_PATH,
+)
+from ..core.disk_cache import DiskTTLCache
+from ..core.metrics import register_metrics
+from .collections import get_collection_version
+from .quantized_search import vector_retriever
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).split()).lower()
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode()).hexdigest()
+
+
+def _rows_size(rows: list[tuple]) -> int:
+    return sum(len(content.encode()) + len(json.dumps(metadata, default=str)) for _, content, metadata in rows)
+
+
+class RetrievalCache:
+    """메모리 사용량(bytes) 상한이 있는 LRU 캐시"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: OrderedDict[tuple, tuple[int, list[tuple]]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> list[tuple] | None:
+        with self._lock:
+            self._purge_stale(key[0], key[1])
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: tuple, rows: list[tuple]) -> None:
+        size = _rows_size(rows)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[0]
+            self._data[key] = (size, rows)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (evicted_size, _) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def _purge_stale(self, collection: str, version: int) -> None:
+        # 컬렉션 버전이 바뀌면 이전 버전 항목은 더 이상 쓸 일이 없으므로 바로 비운다
+        if self._versions.get(collection, version) != version:
+            for key in [k for k in self._data if k[0] == collection and k[1] != version]:
+                self.bytes -= self._data.pop(key)[0]
+        self._versions[collection] = version
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "pgvector_queries_avoided": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+class SqliteRetrievalCache:
+    """RetrievalCache 와 같은 인터페이스의 sqlite 파일 캐시 (여러 프로세스가 공유, 만료 없음)
+
+    저장/크기 제한은 DiskTTLCache 에 맡긴다. 항목에 "컬렉션:버전" tag 를 붙여 두고,
+    컬렉션 버전이 바뀐 것을 보면 이전 버전 항목을 한꺼번에 지운다.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.cache = DiskTTLCache(path, max_bytes, ttl=None)
+        self._versions: dict[str, int] = {}
+
+    def get(self, key: tuple) -> list[tuple] | None:
+        self._purge_stale(key[0], key[1])
+        rows = self.cache.get(json.dumps(key))
+        return [tuple(item) for item in rows] if rows is not None else None
+
+    def set(self, key: tuple, rows: list[tuple]) -> None:
+        self.cache.set(json.dumps(key), rows, tag=f"{key[0]}:{key[1]}")
+
+    def _purge_stale(self, collection: str, version: int) -> None:
+        previous = self._versions.get(collection, version)
+        if previous != version:
+            self.cache.delete_tag(f"{collection}:{previous}")
+        self._versions[collection] = version
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        return {"backend": "sqlite", "pid": os.getpid(), **stats, "pgvector_queries_avoided": stats["hits"]}
+
+
+retrieval_cache = (
+    SqliteRetrievalCache(RETRIEVAL_CACHE_PATH, RETRIEVAL_CACHE_MAX_BYTES)
+    if RETRIEVAL_CACHE_BACKEND == "sqlite"
+    else RetrievalCache(RETRIEVAL_CACHE_MAX_BYTES)
+)
+register_metrics("retrieval_cache", retrieval_cache.stats)
+
+
+class CachedRetriever(BaseRetriever):
+    """다른 retriever 를 감싸서 검색 결과를 retrieval_cache 에 저장/재사용한다."""
+
+    retriever: BaseRetriever
+    collection: str
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if not RETRIEVAL_CACHE_ENABLED:
+            return self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
+
+        key = (self.collection, get_collection_version(self.collection), query_hash(query), self.k)
+        rows = retrieval_cache.get(key)
+        if rows is None:
+            docs = self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
+            rows = [(doc.id, doc.page_content, doc.metadata) for doc in docs]
+            retrieval_cache.set(key, rows)
+
+        return [
+            Document(id=doc_id, page_content=content, metadata=dict(metadata))
+            for doc_id, content, metadata in rows
+        ]
+
+
+def cached_retriever(vectorstore, collection: str, k: int = 4) -> BaseRetriever:
+    return CachedRetriever(
+        retriever=vector_retriever(vectorstore, collection, k),
+        collection=collection,
+        k=k,
+    )
@@ -0,0 +1,184 @@
+"""조문 구조 기반 청크 분할 + 부모-자식(parent-child) 검색
+
+RecursiveCharacterTextSplitter 는 글자 수로 자르기 때문에 청크가 조/항 경계를 가로지르고,
+조문 하나를 다 보려면 k 를 크게 잡아야 한다.
+
+- 자식 청크: parse_statute 의 항/호 노드. STATUTE_CHILD_MAX_CHARS 보다 긴 노드는 문장 단위로 더 나눈다.
+  작은 단위라서 질의와 정확히 맞는 부분이 잘 잡힌다. 벡터 컬렉션에는 자식만 넣는다.
+  호("1. 근로를 제공함으로써 받는 봉급") 만으로는 어느 조문인지 알 수 없으므로 임베딩할 본문 앞에
+  "제20조(근로소득)" 를 붙이고, 원문은 metadata["text"] 에 둔다.
+- 부모: 조문 전체. 조문이 STATUTE_PARENT_MAX_CHARS 보다 길면 항 단위가 부모가 된다.
+  자식 메타데이터의 parent_id / position / text 로 부모 본문을 복원하므로 따로 저장하지 않는다.
+
+ParentChildRetriever 는 자식을 검색한 뒤 같은 부모는 한 번만, 처음 맞은 순서대로 부모 조문을 돌려준다.
+"""
+import re
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from ..core.config import STATUTE_CHILD_MAX_CHARS, STATUTE_PARENT_MAX_CHARS
+from ..core.metrics import register_metrics
+from .statute_index import ARTICLE_HEADER, StatuteNode, parse_statute
+
+SENTENCE_END = re.compile(r"(?<=[다함음임]\.)\s+")
+
+
+def _split_long(text: str, max_chars: int) -> list[str]:
+    """문장 경계에서 max_chars 이하 조각으로 나눈다. 한 문장이 더 길면 그대로 둔다."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for sentence in SENTENCE_END.split(text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _parent(source: str, node: StatuteNode, article_length: int) -> tuple[str, str]:
+    """(parent_id, 부모 단위 "article" | "paragraph")"""
+    if article_length > STATUTE_PARENT_MAX_CHARS and node.paragraph is not None:
+        return f"{source}:{node.article}:{node.paragraph}", "paragraph"
+    return f"{source}:{node.article}", "article"
+
+
+def chunk_statute(text: str, source: str, **metadata) -> list[Document]:
+    """법령 본문을 자식 청크 Document 목록으로 나눈다. metadata["text"] 를 순서대로 이어 붙이면 부모 본문이 된다."""
+    nodes = parse_statute(text)
+    article_lengths: dict[str, int] = defaultdict(int)
+    for node in nodes:
+        article_lengths[node.article] += len(node.content)
+
+    children = []
+    positions: dict[str, int] = defaultdict(int)
+    for node in nodes:
+        parent_id, parent_level = _parent(source, node, article_lengths[node.article])
+        header = f"{node.article}({node.title})"
+        for piece in _split_long(node.content, STATUTE_CHILD_MAX_CHARS):
+            # 조문 머리로 시작하는 첫 항에는 다시 붙이지 않는다
+            content = piece if ARTICLE_HEADER.match(piece) else f"{header} {piece}"
+            doc = StatuteNode(node.article, node.title, node.paragraph, node.item, content).to_document(
+                **metadata,
+                source=source,
+                parent_id=parent_id,
+                parent_level=parent_level,
+                position=positions[parent_id],
+                text=piece,
+            )
+            # 같은 조문 번호 조회(StatuteIndex)에도 쓰인다
+            doc.metadata["articles"] = [node.article]
+            positions[parent_id] += 1
+            children.append(doc)
+    return children
+
+
+def build_parents(children: list[Document]) -> dict[str, Document]:
+    grouped: dict[str, list[Document]] = defaultdict(list)
+    for child in children:
+        if child.metadata.get("parent_id"):
+            grouped[child.metadata["parent_id"]].append(child)
+
+    parents = {}
+    for parent_id, docs in grouped.items():
+        docs.sort(key=lambda doc: doc.metadata.get("position", 0))
+        first = docs[0].metadata
+        parents[parent_id] = Document(
+            id=parent_id,
+            page_content="\n".join(doc.metadata.get("text", doc.page_content) for doc in docs),
+            metadata={
+                "source": first.get("source"),
+                "parent_id": parent_id,
+                "article": first.get("article"),
+                "title": first.get("title"),
+                "paragraph": first.get("paragraph") if first.get("parent_level") == "paragraph" else None,
+            },
+        )
+    return parents
+
+
+parent_child_stats = {"searches": 0, "children": 0, "parents": 0}
+
+
+def _parent_child_metrics() -> dict:
+    searches = parent_child_stats["searches"]
+    return {
+        **parent_child_stats,
+        # 자식 검색 결과가 같은 부모로 합쳐진 정도
+        "children_per_parent": parent_child_stats["children"] / parent_child_stats["parents"]
+        if parent_child_stats["parents"]
+        else 0.0,
+        "parents_per_search": parent_child_stats["parents"] / searches if searches else 0.0,
+    }
+
+
+register_metrics("parent_child_retrieval", _parent_child_metrics)
+
+
+class ParentChildRetriever(BaseRetriever):
+    """자식 청크를 검색하고 부모 조문(중복 제거)을 돌려준다. parent_id 가 없는 청크는 그대로 둔다."""
+
+    retriever: BaseRetriever
+    load_documents: Callable[[], list[Document]]
+    get_version: Callable[[], int] = lambda: 0
+    max_parents: int = 3
+
+    _parents: dict[str, Document] | None = PrivateAttr(default=None)
+    _version: int | None = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_parents(self) -> dict[str, Document]:
+        version = self.get_version()
+        if self._parents is None or self._version != version:
+            with self._lock:
+                if self._parents is None or self._version != version:
+                    self._parents = build_parents(self.load_documents())
+                    self._version = version
+        return self._parents
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        children = self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
+        parents = self._get_parents()
+
+        results, seen = [], set()
+        for child in children:
+            parent_id = child.metadata.get("parent_id")
+            key = parent_id or child.id or child.page_content
+            if key in seen:
+                continue
+            seen.add(key)
+            parent = parents.get(parent_id) if parent_id else None
+            results.append(
+                Document(id=parent.id, page_content=parent.page_content, metadata=dict(parent.metadata))
+                if parent
+                else child
+            )
+            if len(results) >= self.max_parents:
+                break
+
+        parent_child_stats["searches"] += 1
+        parent_child_stats["children"] += len(children)
+        parent_child_stats["parents"] += len(results)
+        return results
+
+
+def pgvector_parent_child_retriever(retriever: BaseRetriever, collection: str, max_parents: int = 3) -> ParentChildRetriever:
+    from .collections import get_collection_version, load_collection_documents
+
+    return ParentChildRetriever(
+        retriever=retriever,
+        load_documents=lambda: load_collection_documents(collection),
+        get_version=lambda: get_collection_version(collection),
+        max_parents=max_parents,
+    )
@@ -0,0 +1,243 @@
+"""조문 번호(제X조/항/호) 직접 조회 인덱스
+
+rewrite_prompt 가 만든 "제X조의Y 제X항" 형태의 질의는 코사인 검색 대신
+조문 번호 -> 청크 맵에서 바로 찾는다. 조문 번호가 없는 질의만 벡터 검색으로 보낸다.
+
+질의가 조문 앞에 법령 이름을 적었는데("종합부동산세법 제8조") 인덱스의 법령(laws)이 아니면
+같은 번호의 다른 법 조문을 돌려주지 않도록 벡터 검색으로 넘긴다.
+
+조문 번호 메타데이터(article/articles)가 없는 청크는 본문의 조문 머리로 판단한다.
+이때 청크의 마지막 조문은 다음 청크로 이어질 수 있으므로 일부만 찾은 것으로 보고 벡터 검색으로 넘긴다.
+"""
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import chain, zip_longest
+from typing import Callable
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from ..core.metrics import register_metrics
+
+# 조문 앞의 법령 이름: 소득세법, 종합부동산세법 시행령, ...
+LAW_NAME = r"([가-힣]+(?:법률|법)(?:\s*시행령|\s*시행규칙)?)"
+# 질의/본문 안의 조문 참조: 제55조, 제55조의2, 제 55 조 의 2, 소득세법 제55조
+ARTICLE_REF = re.compile(rf"(?:{LAW_NAME}\s*)?제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+PARAGRAPH_REF = re.compile(r"제\s*(\d+)\s*항")
+ITEM_REF = re.compile(r"제\s*(\d+)\s*호")
+
+# 법령 본문의 조문 머리: "제55조(세율)", "제55조의2(...)"
+ARTICLE_HEADER = re.compile(r"^\s*제(\d+)조(?:의(\d+))?\s*\(([^)]*)\)", re.MULTILINE)
+# 항 머리: ①, ②, ... (조문 머리와 같은 줄에서 시작하기도 한다)
+PARAGRAPH_MARKS = "①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳"
+PARAGRAPH_HEADER = re.compile(rf"([{PARAGRAPH_MARKS}])")
+# 호 머리: "1.", "2." ...
+ITEM_HEADER = re.compile(r"^\s*(\d+)\.\s", re.MULTILINE)
+
+
+def article_id(number: str, sub: str | None = None) -> str:
+    return f"제{int(number)}조의{int(sub)}" if sub else f"제{int(number)}조"
+
+
+def law_key(name: str) -> str:
+    return re.sub(r"\s+", "", name)
+
+
+def extract_article_refs(text: str) -> list[str]:
+    return list(dict.fromkeys(article_id(m.group(2), m.group(3)) for m in ARTICLE_REF.finditer(text)))
+
+
+def extract_law_names(text: str) -> set[str]:
+    """조문 참조 바로 앞에 적힌 법령 이름 (공백 제거)"""
+    return {law_key(m.group(1)) for m in ARTICLE_REF.finditer(text) if m.group(1)}
+
+
+@dataclass
+class StatuteNode:
+    article: str
+    title: str
+    paragraph: int | None
+    item: int | None
+    content: str
+
+    def to_document(self, **metadata) -> Document:
+        return Document(
+            page_content=self.content,
+            metadata={
+                **metadata,
+                "article": self.article,
+                "title": self.title,
+                "paragraph": self.paragraph,
+                "item": self.item,
+            },
+        )
+
+
+def _split(
+    text: str, pattern: re.Pattern, merge_prefix: bool = False
+) -> list[tuple[re.Match | None, str]]:
+    """pattern 이 나오는 위치마다 text 를 자른다.
+
+    첫 머리 전의 내용은 match 가 None 인 조각이 되고, merge_prefix 면 첫 조각 앞에 붙인다.
+    """
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return [(None, text)]
+
+    parts = []
+    prefix = text[: matches[0].start()]
+    if prefix.strip() and not merge_prefix:
+        parts.append((None, prefix))
+    for i, match in enumerate(matches):
+        start = 0 if i == 0 and merge_prefix else match.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        parts.append((match, text[start:end]))
+    return parts
+
+
+def parse_statute(text: str) -> list[StatuteNode]:
+    """법령 본문을 조 > 항 > 호 단위 노드로 나눈다 (가장 작은 단위가 노드가 된다)."""
+    nodes = []
+    for article_match, article_text in _split(text, ARTICLE_HEADER):
+        if article_match is None:
+            continue
+        article = article_id(article_match.group(1), article_match.group(2))
+        title = article_match.group(3).strip()
+
+        # 조문 머리("제55조(세율)")는 첫 항에 붙인다
+        paragraphs = _split(article_text, PARAGRAPH_HEADER, merge_prefix=True)
+        for paragraph_match, paragraph_text in paragraphs:
+            paragraph = (
+                PARAGRAPH_MARKS.index(paragraph_match.group(1)) + 1 if paragraph_match else None
+            )
+            items = _split(paragraph_text, ITEM_HEADER)
+            if len(items) == 1:
+                nodes.append(StatuteNode(article, title, paragraph, None, paragraph_text.strip()))
+                continue
+            for item_match, item_text in items:
+                item = int(item_match.group(1)) if item_match else None
+                nodes.append(StatuteNode(article, title, paragraph, item, item_text.strip()))
+    return nodes
+
+
+class StatuteIndex:
+    """조문 번호 -> 청크 목록. laws 는 이 인덱스에 들어 있는 법령 이름이다."""
+
+    def __init__(self, docs: list[Document], laws: tuple[str, ...] = ()):
+        self.laws = {law_key(law) for law in laws}
+        self.articles: dict[str, list[Document]] = defaultdict(list)
+        # 청크 경계에서 잘렸을 수 있어서 본문 전체를 찾았다고 볼 수 없는 조문
+        self.partial: set[str] = set()
+        for doc in docs:
+            for article in self._articles_of(doc):
+                self.articles[article].append(doc)
+
+    def _articles_of(self, doc: Document) -> list[str]:
+        if doc.metadata.get("articles"):
+            return doc.metadata["articles"]
+        if doc.metadata.get("article"):
+            return [doc.metadata["article"]]
+        # 메타데이터가 없으면 청크에 포함된 조문 머리로 판단한다
+        headers = list(
+            dict.fromkeys(article_id(m.group(1), m.group(2)) for m in ARTICLE_HEADER.finditer(doc.page_content))
+        )
+        if headers:
+            self.partial.add(headers[-1])
+        return headers
+
+    def lookup(self, query: str, k: int) -> list[Document] | None:
+        """질의의 조문 참조를 모두 찾으면 해당 청크를 최대 k 개, 하나라도 없거나 일부만 있으면 None 을 반환한다."""
+        refs = extract_article_refs(query)
+        if not refs or any(ref not in self.articles or ref in self.partial for ref in refs):
+            return None
+        # 다른 법령(또는 인덱스 법령을 모를 때 이름이 적힌 법령)의 조문은 번호가 같아도 다른 조문이다
+        if extract_law_names(query) - self.laws:
+            return None
+
+        paragraphs = {int(p) for p in PARAGRAPH_REF.findall(query)}
+        items = {int(i) for i in ITEM_REF.findall(query)}
+
+        per_ref = []
+        for ref in refs:
+            chunks = self.articles[ref]
+            # 항/호까지 지정했고 노드 단위로 인덱싱된 경우 해당 항/호만 돌려준다
+            narrowed = [
+                doc
+                for doc in chunks
+                if (not paragraphs or doc.metadata.get("paragraph") in paragraphs)
+                and (not items or doc.metadata.get("item") in items)
+            ]
+            per_ref.append(narrowed or chunks)
+        # 참조한 조문마다 앞 청크부터 번갈아 담아서 k 개로 자른다 (여러 조문에 걸친 청크는 한 번만)
+        docs = {id(doc): doc for doc in chain.from_iterable(zip_longest(*per_ref)) if doc is not None}
+        return list(docs.values())[:k]
+
+
+class StatuteRetriever(BaseRetriever):
+    """조문 번호가 있는 질의는 StatuteIndex 로 바로 찾고, 나머지는 retriever 로 검색한다."""
+
+    retriever: BaseRetriever
+    load_documents: Callable[[], list[Document]]
+    # 값이 바뀌면 인덱스를 다시 만든다 (예: 컬렉션 버전)
+    get_version: Callable[[], int] = lambda: 0
+    # 직접 조회로 돌려줄 최대 청크 수 (벡터 검색의 k 와 맞춘다)
+    k: int = 4
+    # 컬렉션에 들어 있는 법령 이름. 질의가 다른 법령을 적으면 직접 조회하지 않는다
+    laws: tuple[str, ...] = ()
+
+    _index: StatuteIndex | None = PrivateAttr(default=None)
+    _version: int | None = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_index(self) -> StatuteIndex:
+        version = self.get_version()
+        if self._index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = StatuteIndex(self.load_documents(), self.laws)
+                    self._version = version
+        return self._index
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if extract_article_refs(query):
+            docs = self._get_index().lookup(query, self.k)
+            if docs is not None:
+                statute_stats["direct_lookups"] += 1
+                return docs
+
+        statute_stats["vector_searches"] += 1
+        return self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
+
+
+statute_stats = {"direct_lookups": 0, "vector_searches": 0}
+
+
+def _statute_metrics() -> dict:
+    total = statute_stats["direct_lookups"] + statute_stats["vector_searches"]
+    return {
+        **statute_stats,
+        "direct_share": statute_stats["direct_lookups"] / total if total else 0.0,
+    }
+
+
+register_metrics("statute_index", _statute_metrics)
+
+
+def pgvector_statute_retriever(
+    retriever: BaseRetriever, collection: str, laws: tuple[str, ...], k: int = 4
+) -> StatuteRetriever:
+    from .collections import get_collection_version, load_collection_documents
+
+    return StatuteRetriever(
+        retriever=retriever,
+        load_documents=lambda: load_collection_documents(collection),
+        get_version=lambda: get_collection_version(collection),
+        laws=laws,
+        k=k,
+    )
@@ -1,23 +1,38 @@
 from langgraph.graph import MessagesState, END, StateGraph, START
-from langgraph.types import Command
+from langgraph.types import Command, Send
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_core.messages import AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_openai import ChatOpenAI
 
-from typing import Literal
+from typing import Annotated, Literal
 from typing_extensions import TypedDict
 
+from ..core.config import CASCADE_LARGE_MODEL
+from .cascade import last_question, route_policy, run_cascade, size_config
 from .house import graph as house_tax_agent
-from .income import income_tax_agent
-from .real_estate import real_estate_tax_agent
+from .income import income_tax_agent, income_tax_small_agent
+from .income import retriever as income_tax_retriever
+from .real_estate import real_estate_tax_agent, real_estate_tax_small_agent
+from .real_estate import retriever as real_estate_tax_retriever
 from .llm import get_llm
+from .prefetch import start_prefetch, use_prefetched
+
+
+def merge_worker_results(left: list[dict] | None, right: list[dict] | None) -> list[dict]:
+    """작업자 결과를 누적한다. None 이 들어오면 초기화한다."""
+    if right is None:
+        return []
+    return (left or []) + right
 
 
 class AgentState(MessagesState):
 
-    next: str
+    next: list[str]
+    worker_results: Annotated[list[dict], merge_worker_results]
+    prefetched: dict | None  # Send 로 작업자에게만 넘기는 미리 검색한 문서 (prefetch.py)
 
 router_llm = ChatOpenAI(model="gpt-4o", streaming=False)
 
@@ -26,132 +41,205 @@ members = ["house_tax_agent", "income_tax_agent", "real_estate_tax_agent", "call
 options = members + ["FINISH"]
 
 
+# 여러 작업자의 결과를 합칠 때 사용할 제목
+worker_labels = {
+    "house_tax_agent": "주택분 종합부동산세",
+    "income_tax_agent": "소득세",
+    "real_estate_tax_agent": "종합부동산세",
+    "call_llm": "답변",
+}
+
+# 병렬로 실행되는 작업자의 토큰 스트림은 서로 섞이고, cascade 작업자는 답변을 다시 만들 수 있으므로
+# 태그로 구분해서 스트리밍에서 제외하고 synthesize 에서 최종 답변만 내보낸다
+NO_STREAM_TAG = "no_stream"
+
+
+# 라우팅하는 동안 미리 검색할 작업자: (질문에 이 키워드가 있으면, 이 retriever 로)
+# house_tax_agent 는 고정된 질문으로만 검색하므로 대상이 아니다
+prefetch_candidates = {
+    "income_tax_agent": (("소득세", "근로소득", "종합소득", "연말정산"), income_tax_retriever),
+    "real_estate_tax_agent": (("종부세", "종합부동산세", "부동산"), real_estate_tax_retriever),
+}
+
+
 class Router(TypedDict):
-    """다음 작업자를 결정하는 라우터.
-    작업이 필요한 경우 다음 작업자를 지정하고,
-    더 이상 작업이 필요하지 않은 경우 FINISH를 반환.
+    """이번 질문에 답하기 위해 실행할 작업자 목록(plan)을 결정하는 라우터.
+    질문에 여러 세목이 섞여 있으면 필요한 작업자를 모두 지정하고 (동시에 실행됨),
+    더 이상 작업이 필요하지 않은 경우 FINISH만 반환.
     """
 
-    next: Literal[*options]
+    next: list[Literal[*options]]
+
+
+# Router 스키마 변환(tool 정의 생성)을 매 요청마다 하지 않도록 한 번만 만든다
+structured_router = router_llm.with_structured_output(Router)
 
 
 system_prompt = (
     "You are a supervisor tasked with managing a conversation between the"
     f" following workers: {members}. Given the following user request,"
-    " respond with the worker to act next. Each worker will perform a"
-    " task and respond with their results and status. When finished,"
-    " respond with FINISH. Never respond with FINISH when the latest"
-    " message is from the user. If the user greets, asks for small talk,"
-    " or asks general questions unrelated to income or real-estate tax,"
-    " choose call_llm."
+    " respond with the list of workers needed to answer it. The workers you"
+    " list run in parallel and their results are merged into one answer, so"
+    " if the request covers several taxes (e.g. income tax and real-estate"
+    " tax), list every worker that is needed. When finished, respond with"
+    " FINISH. Never respond with FINISH when the latest message is from the"
+    " user. If the user greets, asks for small talk, or asks general"
+    " questions unrelated to income or real-estate tax, choose call_llm."
 )
 
 
 def supervisor_node(state: AgentState) -> Command[Literal[*members, "__end__"]]:
     """수퍼바이저 노드 함수
 
-    현재 상태를 기반으로 다음 작업자를 결정하고 명령을 반환합니다.
+    라우팅 호출 한 번으로 필요한 작업자 목록(plan)을 정하고, Send 로 작업자들을 동시에 실행합니다.
+    작업자 결과는 synthesize 노드에서 하나의 답변으로 합쳐집니다.
 
     Args:
         state: 현재 상태 객체
 
     Returns:
-        Command: 다음 작업자로의 전환 명령과 상태 업데이트
+        Command: 작업자들로의 전환 명령(Send)과 상태 업데이트
     """
+    # synthesize 가 답변을 남기고 돌아오면 턴을 끝낸다 (턴 당 라우팅 호출은 한 번)
     if state["messages"] and isinstance(state["messages"][-1], AIMessage):
-        return Command(goto=END, update={"next": END})
+        return Command(goto=END, update={"next": []})
 
     messages = [
         SystemMessage(content=system_prompt),
     ] + state["messages"]
 
-    response = router_llm.with_structured_output(Router).invoke(messages)
-    goto = response["next"]
+    # router 호출을 기다리는 동안 후보 컬렉션을 미리 검색한다
+    prefetch = start_prefetch(last_question(state["messages"]), prefetch_candidates)
 
-    # 작업이 완료되면 END로 이동하여 사용자에게 답변 반환
-    if goto == "FINISH":
-        goto = END
+    response = structured_router.invoke(messages)
+    plan = [worker for worker in dict.fromkeys(response["next"]) if worker in members]
 
-    return Command(goto=goto, update={"next": goto})
+    # 사용자 메시지에 FINISH 로 답하면 답변이 비므로 일반 에이전트로 보낸다
+    if not plan:
+        plan = ["call_llm"]
 
+    prefetched = prefetch.collect(plan) if prefetch else {}
 
-def house_tax_node(state: AgentState) -> Command[Literal["supervisor"]]:
+    return Command(
+        goto=[
+            Send(worker, {**state, "next": plan, "prefetched": prefetched.get(worker)})
+            for worker in plan
+        ],
+        update={"next": plan, "worker_results": None},
+    )
+
+
+def _worker_config(state: AgentState, streamed: bool = True) -> RunnableConfig:
+    if not streamed or len(state.get("next") or []) > 1:
+        return {"tags": [NO_STREAM_TAG]}
+    return {}
+
+
+def _run_worker(worker: str, state: AgentState, agents: dict[str, Runnable]) -> dict:
+    """작업자 에이전트를 CASCADE_POLICY 에 따라 small / large / cascade 로 실행하고 결과 항목을 만든다."""
+    policy = route_policy(worker)
+    with use_prefetched(state.get("prefetched")):
+        if policy != "cascade":
+            result = agents[policy].invoke(state, {**_worker_config(state), **size_config(policy)})
+            return {"worker": worker, "content": result["messages"][-1].content}
+
+        config = _worker_config(state, streamed=False)
+        content = run_cascade(
+            worker,
+            last_question(state["messages"]),
+            lambda size: agents[size].invoke(state, {**config, **size_config(size)})["messages"],
+        )
+        return {"worker": worker, "content": content, "streamed": False}
+
+
+def synthesize_node(state: AgentState, config: RunnableConfig) -> Command[Literal["supervisor"]]:
+    """작업자 결과 병합 노드 함수
+
+    병렬로 실행된 작업자들의 결과를 계획(plan) 순서대로 하나의 답변으로 합칩니다.
+    작업자가 하나면 그 결과를 그대로 사용합니다.
+    """
+    order = {worker: i for i, worker in enumerate(state.get("next") or [])}
+    results = sorted(
+        state.get("worker_results") or [], key=lambda r: order.get(r["worker"], len(order))
+    )
+
+    if len(results) == 1:
+        message = AIMessage(content=results[0]["content"], name=results[0]["worker"])
+    else:
+        content = "\n\n".join(
+            f"### {worker_labels[r['worker']]}\n{r['content']}" for r in results
+        )
+        message = AIMessage(content=content, name="supervisor")
+
+    # 병렬/cascade 작업자의 토큰은 스트리밍하지 않았으므로 최종 답변을 한 번에 내보낸다
+    if len(results) != 1 or not results[0].get("streamed", True):
+        dispatch_custom_event("final_answer", {"content": message.content}, config=config)
+
+    return Command(
+        update={"messages": [message], "worker_results": None},
+        goto="supervisor",
+    )
+
+
+# 작업자별 답변 모델 크기 -> 에이전트 (house 그래프는 config 의 model_size 로 모델을 고른다)
+house_tax_agents = {"small": house_tax_agent, "large": house_tax_agent}
+income_tax_agents = {"small": income_tax_small_agent, "large": income_tax_agent}
+real_estate_tax_agents = {"small": real_estate_tax_small_agent, "large": real_estate_tax_agent}
+
+
+def house_tax_node(state: AgentState) -> Command[Literal["synthesize"]]:
     """주택분 종합부동산세(종부세) 세액 계산 **특화** 노드 함수
 
     공제액, 공정시장가액비율, 과세표준, 세율을 적용해 **최종 세액**을 계산합니다.
     법령 조항 설명이나 일반 법령 질의는 처리하지 않습니다.
     주택분 종합부동산세(종부세) 에이전트를 실행하고 결과를 메시지 형태로 변환하여 반환합니다.
-    실행이 완료되면 수퍼바이저 노드로 제어를 반환합니다.
+    실행이 완료되면 결과 병합(synthesize) 노드로 제어를 넘깁니다.
 
     Args:
         state (AgentState): 현재 에이전트의 상태 정보
 
     Returns:
-        Command: 수퍼바이저로의 전환 명령과 종합부동산세 계산 결과 메시지
+        Command: 결과 병합 노드로의 전환 명령과 종합부동산세 계산 결과 메시지
     """
-    result = house_tax_agent.invoke(state)
-
     return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=result["messages"][-1].content, name="house_tax_agent"
-                )
-            ]
-        },
-        goto="supervisor",
+        update={"worker_results": [_run_worker("house_tax_agent", state, house_tax_agents)]},
+        goto="synthesize",
     )
 
 
-def income_tax_node(state: AgentState) -> Command[Literal["supervisor"]]:
+def income_tax_node(state: AgentState) -> Command[Literal["synthesize"]]:
     """소득세 계산 노드 함수
 
     소득세 에이전트를 실행하고 결과를 메시지 형태로 변환하여 반환합니다.
-    실행이 완료되면 수퍼바이저 노드로 제어를 반환합니다.
+    실행이 완료되면 결과 병합(synthesize) 노드로 제어를 넘깁니다.
 
     Args:
         state (AgentState): 현재 에이전트의 상태 정보
 
     Returns:
-        Command: 수퍼바이저로의 전환 명령과 소득세 계산 결과 메시지
+        Command: 결과 병합 노드로의 전환 명령과 소득세 계산 결과 메시지
     """
-    result = income_tax_agent.invoke(state)
-
     return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=result["messages"][-1].content, name="income_tax_agent"
-                )
-            ]
-        },
-        goto="supervisor",
+        update={"worker_results": [_run_worker("income_tax_agent", state, income_tax_agents)]},
+        goto="synthesize",
     )
 
 
-def real_estate_tax_node(state: AgentState) -> Command[Literal["supervisor"]]:
+def real_estate_tax_node(state: AgentState) -> Command[Literal["synthesize"]]:
     """종합부동산세(종부세) 계산 노드 함수
 
     종합부동산세 에이전트를 실행하고 결과를 메시지 형태로 변환하여 반환합니다.
-    실행이 완료되면 수퍼바이저 노드로 제어를 반환합니다.
+    실행이 완료되면 결과 병합(synthesize) 노드로 제어를 넘깁니다.
 
     Args:
         state (AgentState): 현재 에이전트의 상태 정보
 
     Returns:
-        Command: 수퍼바이저로의 전환 명령과 종합소득세 계산 결과 메시지
+        Command: 결과 병합 노드로의 전환 명령과 종합소득세 계산 결과 메시지
     """
-    result = real_estate_tax_agent.invoke(state)
-
     return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=result["messages"][-1].content, name="real_estate_tax_agent"
-                )
-            ]
-        },
-        goto="supervisor",
+        update={"worker_results": [_run_worker("real_estate_tax_agent", state, real_estate_tax_agents)]},
+        goto="synthesize",
     )
 
 
@@ -163,36 +251,42 @@ call_llm_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-small_llm = get_llm(small=True)
+call_llm_models = {
+    "small": get_llm(small=True),
+    "large": ChatOpenAI(model=CASCADE_LARGE_MODEL, temperature=0),
+}
 
 
-def call_llm(state: AgentState) -> Command[Literal["supervisor"]]:
+def call_llm(state: AgentState) -> Command[Literal["synthesize"]]:
     """
     소득세 및 종합부동산세(종부세)와 관계없는 질문에 답변하는 일반 에이전트.
     일반 에이전트를 실행하고 결과를 메시지 형태로 변환하여 반환합니다.
-    실행이 완료되면 수퍼바이저 노드로 제어를 반환합니다.
+    실행이 완료되면 결과 병합(synthesize) 노드로 제어를 넘깁니다.
     Args:
         state (AgentState): 현재 에이전트의 상태 정보
     Returns:
-        Command: 수퍼바이저로의 전환 명령과 일반 에이전트 답변 메시지
+        Command: 결과 병합 노드로의 전환 명령과 일반 에이전트 답변 메시지
     """
-    llm_chain = call_llm_prompt | small_llm | StrOutputParser()
-    user_query = ""
-    for message in reversed(state["messages"]):
-        if isinstance(message, HumanMessage):
-            user_query = message.content
-            break
-    llm_answer = llm_chain.invoke(
-        {
-            "query": user_query,
-            "chat_history": state["messages"],
+    user_query = last_question(state["messages"])
+
+    def answer(size: str, config: RunnableConfig) -> list:
+        llm_chain = call_llm_prompt | call_llm_models[size]
+        return [
+            llm_chain.invoke({"query": user_query, "chat_history": state["messages"]}, config)
+        ]
+
+    policy = route_policy("call_llm")
+    if policy == "cascade":
+        config = _worker_config(state, streamed=False)
+        result = {
+            "worker": "call_llm",
+            "content": run_cascade("call_llm", user_query, lambda size: answer(size, config)),
+            "streamed": False,
         }
-    )
+    else:
+        result = {"worker": "call_llm", "content": answer(policy, _worker_config(state))[-1].content}
 
-    return Command(
-        update={"messages": [AIMessage(content=llm_answer, name="call_llm")]},
-        goto="supervisor",
-    )
+    return Command(update={"worker_results": [result]}, goto="synthesize")
 
 
 builder = StateGraph(AgentState)
@@ -202,6 +296,7 @@ builder.add_node("house_tax_agent", house_tax_node)
 builder.add_node("income_tax_agent", income_tax_node)
 builder.add_node("real_estate_tax_agent", real_estate_tax_node)
 builder.add_node("call_llm", call_llm)
+builder.add_node("synthesize", synthesize_node)
 
 builder.add_edge(START, "supervisor")
 
@@ -0,0 +1,202 @@
+"""legacy 그래프의 웹 검색 계층
+
+web_search 노드는 환각/유용성 검사에 실패할 때마다 다시 실행된다. 같은 질문으로 매번
+질의 재작성 LLM 호출과 Tavily(search_depth="advanced") 호출을 반복하지 않도록 한다.
+
+- 질의 재작성 결과는 (정규화한 질문) -> 최적화된 질의 로 메모리에 기억한다.
+- 검색 결과는 (제공자, 정규화한 최적화 질의) 를 키로 sqlite 파일 캐시에 TTL / 크기 제한을 두고 저장한다.
+- 제공자는 WEB_SEARCH_PROVIDER 로 고른다: "tavily" | "fixture" (오프라인 테스트용 JSON 파일)
+"""
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from langchain_core.documents import Document
+
+from ..core.cache import TTLCache
+from ..core.config import (
+    QUERY_REWRITE_CACHE_TTL_SECONDS,
+    WEB_SEARCH_CACHE_MAX_BYTES,
+    WEB_SEARCH_CACHE_PATH,
+    WEB_SEARCH_CACHE_TTL_SECONDS,
+    WEB_SEARCH_FIXTURES,
+    WEB_SEARCH_PROVIDER,
+)
+from ..core.disk_cache import DiskTTLCache
+from ..core.metrics import register_metrics
+from .grounding import similarity
+from .retrieval_cache import normalize_query
+
+# FixtureProvider 가 정확히 같은 질의가 없을 때 비슷한 질의의 결과를 쓰는 최소 유사도
+FIXTURE_MIN_SIMILARITY = 0.3
+
+
+class SearchProvider(ABC):
+    """검색 결과를 [{"url": ..., "content": ...}] 형태로 돌려주는 제공자"""
+
+    name = "base"
+
+    @property
+    def cache_name(self) -> str:
+        return self.name
+
+    @abstractmethod
+    def search(self, query: str) -> list[dict]: ...
+
+
+class TavilyProvider(SearchProvider):
+    name = "tavily"
+
+    def __init__(self, max_results: int = 3, search_depth: str = "advanced"):
+        from langchain_tavily import TavilySearch
+
+        self.max_results = max_results
+        self.search_depth = search_depth
+        self._search = TavilySearch(
+            max_results=max_results,
+            include_answer=True,  # 답변 포함 여부
+            include_raw_content=False,  # 원본 내용 포함 여부
+            include_images=False,  # 이미지 포함 여부
+            search_depth=search_depth,  # "basic" 또는 "advanced"
+            exclude_domains=None,  # 필요하면 제외 도메인 지정 가능
+        )
+
+    @property
+    def cache_name(self) -> str:
+        # 검색 옵션이 다르면 결과도 다르므로 캐시 키에 포함한다
+        return f"{self.name}:{self.search_depth}:{self.max_results}"
+
+    def search(self, query: str) -> list[dict]:
+        results = self._search.invoke({"query": query})
+        return [{"url": r["url"], "content": r["content"]} for r in results["results"]]
+
+
+class FixtureProvider(SearchProvider):
+    """JSON 파일({질의: [{"url", "content"}]})에서 결과를 찾는 오프라인 제공자.
+
+    질의가 정확히 없으면 가장 비슷한 질의(문자 3-gram Jaccard FIXTURE_MIN_SIMILARITY 이상)의 결과를 쓴다.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            self.fixtures = {normalize_query(query): results for query, results in json.load(f).items()}
+
+    def search(self, query: str) -> list[dict]:
+        key = normalize_query(query)
+        if key in self.fixtures:
+            return self.fixtures[key]
+        best = max(self.fixtures, key=lambda fixture: similarity(key, fixture), default=None)
+        if best is not None and similarity(key, best) >= FIXTURE_MIN_SIMILARITY:
+            return self.fixtures[best]
+        return []
+
+
+def get_search_provider() -> SearchProvider:
+    if WEB_SEARCH_PROVIDER == "fixture":
+        return FixtureProvider(WEB_SEARCH_FIXTURES)
+    return TavilyProvider()
+
+
+class WebSearchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.rewrite_calls = 0
+        self.rewrite_memo_hits = 0
+        self.provider_calls = 0
+        self.cache_hits = 0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        avoided = self.rewrite_memo_hits + self.cache_hits
+        return {
+            "provider": WEB_SEARCH_PROVIDER,
+            "searches": self.searches,
+            "rewrite_llm_calls": self.rewrite_calls,
+            "provider_calls": self.provider_calls,
+            # 재시도 루프에서 다시 하지 않은 외부 호출 (질의 재작성 LLM + 검색 API)
+            "external_calls_avoided": avoided,
+            "avoided_per_search": avoided / self.searches if self.searches else 0.0,
+        }
+
+
+web_search_stats = WebSearchStats()
+register_metrics("web_search", web_search_stats.stats)
+
+_rewrite_memo = TTLCache(maxsize=1024, ttl=QUERY_REWRITE_CACHE_TTL_SECONDS)
+_result_cache: DiskTTLCache | None = None
+_result_cache_lock = threading.Lock()
+
+
+def _get_result_cache() -> DiskTTLCache:
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = DiskTTLCache(
+                WEB_SEARCH_CACHE_PATH, WEB_SEARCH_CACHE_MAX_BYTES, WEB_SEARCH_CACHE_TTL_SECONDS
+            )
+    return _result_cache
+
+
+register_metrics("web_search_cache", lambda: _result_cache.stats() if _result_cache else {})
+
+
+class WebSearch:
+    """질의 재작성(rewrite) -> 캐시된 검색 -> Document 목록"""
+
+    def __init__(
+        self,
+        rewrite: Callable[[str], str] | None = None,
+        provider: SearchProvider | None = None,
+        cache: DiskTTLCache | None = None,
+    ):
+        self.rewrite = rewrite
+        self._provider = provider
+        self._cache = cache
+
+    @property
+    def provider(self) -> SearchProvider:
+        # Tavily 클라이언트(API 키 확인)는 처음 검색할 때 만든다
+        if self._provider is None:
+            self._provider = get_search_provider()
+        return self._provider
+
+    @property
+    def cache(self) -> DiskTTLCache:
+        return self._cache or _get_result_cache()
+
+    def optimize_query(self, query: str) -> str:
+        if self.rewrite is None:
+            return query
+        key = normalize_query(query)
+        optimized = _rewrite_memo.get(key)
+        if optimized is not None:
+            web_search_stats.add(rewrite_memo_hits=1)
+            return optimized
+        optimized = self.rewrite(query)
+        web_search_stats.add(rewrite_calls=1)
+        _rewrite_memo.set(key, optimized)
+        return optimized
+
+    def search(self, query: str) -> list[Document]:
+        web_search_stats.add(searches=1)
+        optimized_query = self.optimize_query(query)
+
+        key = f"{self.provider.cache_name}:{normalize_query(optimized_query)}"
+        results = self.cache.get(key)
+        if results is None:
+            results = self.provider.search(optimized_query)
+            web_search_stats.add(provider_calls=1)
+            # 빈 결과도 저장한다. 재시도 루프에서 같은 질의로 다시 호출해도 결과는 같다
+            self.cache.set(key, results)
+        else:
+            web_search_stats.add(cache_hits=1)
+
+        return [Document(page_content=r["content"], metadata={"source": r["url"]}) for r in results]
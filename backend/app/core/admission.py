@@ -0,0 +1,259 @@
+"""메시지 엔드포인트 입장 제어 (admission control)
+
+supervisor 실행 하나가 LLM 호출, DB 커넥션, 메모리를 함께 쓰므로 동시에 도는 실행 수를 제한한다.
+
+- 전역 상한(max_concurrent): 넘으면 최대 max_queue 개까지 FIFO 로 queue_timeout 동안 기다린다.
+  대기열이 꽉 찼거나 시간 안에 자리가 나지 않으면 503 으로 바로 거절한다.
+- 사용자별 상한(max_per_user): 실행 중 + 대기 중인 요청 수 기준. 넘으면 429.
+  워커가 여러 개면(ADMISSION_BACKEND=sqlite) 같은 호스트의 워커들이 sqlite 파일 하나로 함께 센다.
+  전역 상한과 대기열은 워커마다 따로 센다 (app/serve.py 가 서버 전체 값을 워커 수로 나눈다).
+- 거절할 때는 최근 실행 시간으로 추정한 Retry-After(초)를 함께 준다.
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from .config import (
+    ADMISSION_BACKEND,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_STATE_PATH,
+    MAX_CONCURRENT_RUNS,
+    MAX_RUNS_PER_USER,
+)
+from .metrics import register_metrics
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class LocalUserSlots:
+    """사용자별 실행 수를 프로세스 안에서만 센다. acquire 는 상한을 넘으면 None, 아니면 release 할 토큰."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._counts: dict[int, int] = {}
+
+    def acquire(self, user_id: int, limit: int) -> int | None:
+        if self._counts.get(user_id, 0) >= limit:
+            return None
+        self._counts[user_id] = self._counts.get(user_id, 0) + 1
+        return user_id
+
+    def release(self, token: int) -> None:
+        self._counts[token] -= 1
+        if self._counts[token] <= 0:
+            del self._counts[token]
+
+    def users(self) -> int:
+        return len(self._counts)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SqliteUserSlots:
+    """같은 호스트의 워커들이 sqlite 파일 하나로 함께 세는 사용자별 실행 수
+
+    행 하나가 실행 중(또는 대기 중)인 요청 하나다. 워커가 죽어서 남은 행은 그 사용자의 다음 acquire 때
+    pid 로 확인해서 지운다.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_slots ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, pid INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_user_slots_user_id ON user_slots (user_id)")
+        # 같은 pid 를 쓰던 이전 프로세스가 남긴 행
+        conn.execute("DELETE FROM user_slots WHERE pid = ?", (os.getpid(),))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite 연결은 스레드 사이에 공유하지 않는다 (release 는 스레드풀에서 불리기도 한다)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, user_id: int, limit: int) -> int | None:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, pid FROM user_slots WHERE user_id = ?", (user_id,)).fetchall()
+            dead = [(row_id,) for row_id, pid in rows if not _alive(pid)]
+            conn.executemany("DELETE FROM user_slots WHERE id = ?", dead)
+            if len(rows) - len(dead) >= limit:
+                return None
+            return conn.execute(
+                "INSERT INTO user_slots (user_id, pid) VALUES (?, ?)", (user_id, os.getpid())
+            ).lastrowid
+
+    def release(self, token: int) -> None:
+        self._connect().execute("DELETE FROM user_slots WHERE id = ?", (token,))
+
+    def users(self) -> int:
+        return self._connect().execute("SELECT COUNT(DISTINCT user_id) FROM user_slots").fetchone()[0]
+
+
+class Slot:
+    """입장 허가. release() 는 여러 번 불러도 한 번만 반영된다."""
+
+    def __init__(self, controller: "AdmissionController", token: int):
+        self._controller = controller
+        self._token = token
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._token, time.monotonic() - self._started)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_queue: int,
+        queue_timeout: float,
+        user_slots: LocalUserSlots | SqliteUserSlots | None = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.user_slots = user_slots or LocalUserSlots()
+        self._run_seconds = 10.0  # 실행 시간 EWMA (Retry-After 추정용)
+        self._waits: deque[float] = deque(maxlen=1000)
+        self.admitted = 0
+        self.rejected_user_limit = 0
+        self.rejected_queue_full = 0
+        self.timed_out = 0
+        self.max_waiting = 0
+
+    def retry_after(self) -> int:
+        # 앞선 대기열이 모두 빠지는 데 걸릴 시간
+        rounds = (len(self._waiters) + 1) / max(self.max_concurrent, 1)
+        return max(1, min(60, math.ceil(self._run_seconds * rounds)))
+
+    async def acquire(self, user_id: int) -> Slot:
+        # 대기 중에도 사용자별 상한에 포함한다
+        token = self.user_slots.acquire(user_id, self.max_per_user)
+        if token is None:
+            self.rejected_user_limit += 1
+            raise AdmissionRejected(429, "동시에 처리 중인 요청이 너무 많습니다.", self.retry_after())
+
+        started = time.monotonic()
+        try:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+            else:
+                if len(self._waiters) >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    raise AdmissionRejected(503, "서버가 혼잡합니다. 잠시 후 다시 시도해 주세요.", self.retry_after())
+                await self._wait()
+        except BaseException:
+            self.user_slots.release(token)
+            raise
+
+        self.admitted += 1
+        self._waits.append(time.monotonic() - started)
+        return Slot(self, token)
+
+    async def _wait(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_waiting = max(self.max_waiting, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # 시간 초과와 동시에 자리를 넘겨받았으면 그대로 입장한다
+                return
+            waiter.cancel()
+            self.timed_out += 1
+            raise AdmissionRejected(503, "대기 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요.", self.retry_after())
+        except asyncio.CancelledError:
+            # 클라이언트가 기다리다 나갔는데 자리를 이미 넘겨받았다면 돌려준다
+            if waiter.done() and not waiter.cancelled():
+                self._handoff()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self, token: int, run_seconds: float) -> None:
+        self.user_slots.release(token)
+        self._run_seconds = 0.9 * self._run_seconds + 0.1 * run_seconds
+        self._handoff()
+
+    def _handoff(self) -> None:
+        # 실행 자리를 줄이지 않고 대기열 맨 앞 요청에게 그대로 넘긴다
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "per_user_backend": self.user_slots.name,
+            "users": self.user_slots.users(),
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected_user_limit": self.rejected_user_limit,
+            "rejected_queue_full": self.rejected_queue_full,
+            "timed_out": self.timed_out,
+            "wait_ms_avg": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "wait_ms_p99": waits[int(len(waits) * 0.99) - 1] * 1000 if waits else 0.0,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+message_admission = AdmissionController(
+    max_concurrent=MAX_CONCURRENT_RUNS,
+    max_per_user=MAX_RUNS_PER_USER,
+    max_queue=ADMISSION_QUEUE_SIZE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    user_slots=SqliteUserSlots(ADMISSION_STATE_PATH) if ADMISSION_BACKEND == "sqlite" else LocalUserSlots(),
+)
+register_metrics("message_admission", message_admission.stats)
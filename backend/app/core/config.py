@@ -4,24 +4,195 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-os.environ["LANGCHAIN_PROJECT"] = "tax-chatbot"
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
+os.environ.setdefault("LANGCHAIN_PROJECT", "tax-chatbot")
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATABASE_URL = os.getenv("DATABASE_URL")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# 인증된 사용자 조회 캐시 (매 요청마다 users 테이블을 조회하지 않도록)
+# 워커마다 따로 캐시하므로 사용자 정보 변경은 다른 워커에 최대 USER_CACHE_TTL_SECONDS 늦게 반영된다
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN")
 
-OPENAI_MODEL = "gpt-5-nano"
-OPENAI_SMALL_MODEL = "gpt-5-nano"
+# /metrics 는 이 주소에서 온 요청이거나 Authorization: Bearer METRICS_TOKEN 이 맞을 때만 응답한다
+METRICS_ALLOWED_HOSTS = os.getenv("METRICS_ALLOWED_HOSTS", "127.0.0.1,::1").split(",")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-nano")
+OPENAI_SMALL_MODEL = os.getenv("OPENAI_SMALL_MODEL", "gpt-5-nano")
 OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
 UPSTAGE_EMBEDDING_MODEL = "solar-embedding-1-large"
 
+# 작업자 답변 모델 cascade: 작은 모델로 먼저 답하고 근거 검사에 실패하면 큰 모델로 다시 답한다
+CASCADE_SMALL_MODEL = os.getenv("CASCADE_SMALL_MODEL", "gpt-5-mini")
+CASCADE_LARGE_MODEL = os.getenv("CASCADE_LARGE_MODEL", "gpt-5.1")
+# 작업자(route)별 정책: "large" (기존 동작) | "small" | "cascade"
+# 예) CASCADE_POLICY="income_tax_agent=cascade,real_estate_tax_agent=cascade"
+CASCADE_POLICY = {
+    "house_tax_agent": "large",
+    "income_tax_agent": "large",
+    "real_estate_tax_agent": "large",
+    "call_llm": "small",
+    **dict(
+        item.strip().split("=", 1)
+        for item in os.getenv("CASCADE_POLICY", "").split(",")
+        if "=" in item
+    ),
+}
+# 작은 모델 답변의 근거 점수(0~1)가 이 값보다 낮으면 큰 모델로 올린다
+CASCADE_GROUNDING_THRESHOLD = float(os.getenv("CASCADE_GROUNDING_THRESHOLD", "0.5"))
+
+# 라우팅과 동시에 후보 컬렉션을 미리 검색 (agents/prefetch.py)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true") == "true"
+# 작업자의 검색어와 원래 질문의 문자 3-gram 유사도가 이 값 이상이면 미리 검색한 문서를 쓴다
+PREFETCH_MIN_SIMILARITY = float(os.getenv("PREFETCH_MIN_SIMILARITY", "0.3"))
+
+# 동시에 들어온 질의 임베딩을 모아서 한 번에 보낸다 (agents/embedding_batch.py). 0 이면 질의마다 바로 호출
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "8"))
+# 배치로 모을 모델. 배치는 embed_documents 로 보내므로 질의/문서 임베딩이 같은 모델만 넣는다
+# (solar-embedding-1-large 는 질의를 -query, 문서를 -passage 모델로 보내서 넣으면 안 된다)
+EMBEDDING_BATCH_MODELS = os.getenv("EMBEDDING_BATCH_MODELS", "embedding-passage,embedding-query").split(",")
+# UpstageEmbeddings 는 embed_documents 를 embed_batch_size(기본 10)개씩 나눠 보낸다
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "10"))
+# 동시에 진행하는 배치 호출 수
+EMBEDDING_BATCH_MAX_INFLIGHT = int(os.getenv("EMBEDDING_BATCH_MAX_INFLIGHT", "4"))
+
 INCOME_TAX_COLLECTION_DIR = BASE_DIR / "reference" / "income_tax"
 REAL_ESTATE_TAX_COLLECTION_DIR = BASE_DIR / "reference" / "real_estate_tax"
 
 CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+
+# 서버 프로세스(워커) 수. python -m app.serve 가 지정하지 않으면 CPU 코어 수로 채운다
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# 워커 startup 에서 테이블을 만든다. app.serve 는 부모에서 한 번 만들고 false 로 워커를 띄운다
+INIT_DB_ON_STARTUP = os.getenv("INIT_DB_ON_STARTUP", "true") == "true"
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+
+# 벡터 검색 결과 캐시 (컬렉션 버전이 바뀌면 자동으로 무효화)
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true") == "true"
+RETRIEVAL_CACHE_MAX_BYTES = int(os.getenv("RETRIEVAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# "memory" (프로세스마다 따로) | "sqlite" (같은 호스트의 워커들이 디스크 파일 하나를 공유)
+RETRIEVAL_CACHE_BACKEND = os.getenv(
+    "RETRIEVAL_CACHE_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory"
+)
+RETRIEVAL_CACHE_PATH = os.getenv("RETRIEVAL_CACHE_PATH", str(BASE_DIR / "cache" / "retrieval.sqlite"))
+# 벡터 검색 방식: "full" (float32 그대로) | "halfvec" | "binary"
+# halfvec/binary 는 양자화된 표현식 인덱스로 후보를 뽑고 원본 벡터로 다시 정렬(rescore)한다
+EMBEDDING_SEARCH_MODE = os.getenv("EMBEDDING_SEARCH_MODE", "full")
+RESCORE_CANDIDATES = int(os.getenv("RESCORE_CANDIDATES", "40"))
+LANGCHAIN_EMBEDDING_DIMS = int(os.getenv("LANGCHAIN_EMBEDDING_DIMS", "4096"))
+DOCUMENT_EMBEDDING_DIMS = 3072
+# 컬렉션 버전 조회 결과를 재사용하는 시간 (버전 변경이 반영되기까지의 최대 지연)
+COLLECTION_VERSION_TTL_SECONDS = float(os.getenv("COLLECTION_VERSION_TTL_SECONDS", "5"))
+# 벡터 검색 백엔드: "pgvector" | "local" (컬렉션을 mmap 파일로 내보내서 프로세스 안에서 검색)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "pgvector")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", str(BASE_DIR / "local_index"))
+
+# 조문 구조 기반 청크 (scripts/ingest_statute.py). 자식 청크를 검색하고 부모 조문을 돌려준다
+STATUTE_CHILD_MAX_CHARS = int(os.getenv("STATUTE_CHILD_MAX_CHARS", "300"))
+STATUTE_PARENT_MAX_CHARS = int(os.getenv("STATUTE_PARENT_MAX_CHARS", "3000"))
+# legacy 소득세 그래프 컬렉션: "recursive" (income_tax_recursive_splitter) | "structure" (LEGACY_STATUTE_COLLECTION)
+LEGACY_INCOME_TAX_CHUNKING = os.getenv("LEGACY_INCOME_TAX_CHUNKING", "recursive")
+LEGACY_STATUTE_COLLECTION = os.getenv("LEGACY_STATUTE_COLLECTION", "income_tax_statute")
+# structure 모드에서 검색할 자식 청크 수 / 돌려줄 부모 조문 수
+STATUTE_CHILD_K = int(os.getenv("STATUTE_CHILD_K", "8"))
+STATUTE_MAX_PARENTS = int(os.getenv("STATUTE_MAX_PARENTS", "3"))
+
+# 검색 문서 근접 중복 제거 (legacy 그래프의 MultiQuery / 웹 검색 결과)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true") == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+DEDUP_CONTAINMENT = float(os.getenv("DEDUP_CONTAINMENT", "0.9"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+
+# legacy 그래프 환각 검사 전 로컬 근거 사전 검사: 점수가 low 미만/high 이상이면 LLM 검사기를 부르지 않는다
+GROUNDING_PRECHECK_ENABLED = os.getenv("GROUNDING_PRECHECK_ENABLED", "true") == "true"
+GROUNDING_PRECHECK_LOW = float(os.getenv("GROUNDING_PRECHECK_LOW", "0.2"))
+GROUNDING_PRECHECK_HIGH = float(os.getenv("GROUNDING_PRECHECK_HIGH", "0.85"))
+# 로컬로 결정한 경우에도 이 비율만큼 LLM 검사기를 불러서 보정용 로그를 남긴다
+GROUNDING_AUDIT_RATE = float(os.getenv("GROUNDING_AUDIT_RATE", "0.05"))
+GROUNDING_LOG_PATH = os.getenv("GROUNDING_LOG_PATH", str(BASE_DIR / "logs" / "grounding.jsonl"))
+# scripts/calibrate_grounding.py 결과 (있으면 GROUNDING_PRECHECK_LOW/HIGH 대신 사용)
+GROUNDING_CALIBRATION_PATH = os.getenv(
+    "GROUNDING_CALIBRATION_PATH", str(BASE_DIR / "logs" / "grounding_calibration.json")
+)
+
+# legacy 그래프 웹 검색: "tavily" | "fixture" (WEB_SEARCH_FIXTURES 의 JSON 결과, 오프라인 테스트용)
+WEB_SEARCH_PROVIDER = os.getenv("WEB_SEARCH_PROVIDER", "tavily")
+WEB_SEARCH_FIXTURES = os.getenv(
+    "WEB_SEARCH_FIXTURES", str(BASE_DIR / "benchmarks" / "fixtures" / "web_search.json")
+)
+WEB_SEARCH_CACHE_PATH = os.getenv("WEB_SEARCH_CACHE_PATH", str(BASE_DIR / "cache" / "web_search.sqlite"))
+WEB_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+WEB_SEARCH_CACHE_MAX_BYTES = int(os.getenv("WEB_SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+QUERY_REWRITE_CACHE_TTL_SECONDS = float(os.getenv("QUERY_REWRITE_CACHE_TTL_SECONDS", "3600"))
+
+# 자주 묻는 첫 질문의 답변을 미리 만들어 두고 바로 보낸다 (app/faq.py, scripts/mine_faq.py)
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true") == "true"
+FAQ_EMBEDDING_MODEL = os.getenv("FAQ_EMBEDDING_MODEL", "embedding-query")
+FAQ_EMBEDDING_DIMS = int(os.getenv("FAQ_EMBEDDING_DIMS", str(LANGCHAIN_EMBEDDING_DIMS)))
+# 질문 묶기(클러스터) / 요청 질문과 FAQ 질문을 같은 것으로 보는 코사인 유사도
+FAQ_CLUSTER_THRESHOLD = float(os.getenv("FAQ_CLUSTER_THRESHOLD", "0.9"))
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.93"))
+# 답변을 미리 만들 의도 수 / 최소 질문 수 / 통과해야 하는 근거 점수 (grounding_score)
+FAQ_TOP_N = int(os.getenv("FAQ_TOP_N", "50"))
+FAQ_MIN_COUNT = int(os.getenv("FAQ_MIN_COUNT", "5"))
+FAQ_MIN_GROUNDING = float(os.getenv("FAQ_MIN_GROUNDING", "0.6"))
+# 이보다 긴 질문은 묶지도 찾지도 않는다 (구체적인 사정이 담긴 질문은 미리 만든 답변과 맞지 않는다)
+FAQ_MAX_QUESTION_CHARS = int(os.getenv("FAQ_MAX_QUESTION_CHARS", "200"))
+# 워커가 FAQ 테이블을 다시 읽는 주기 (답변/컬렉션 버전 변경이 반영되기까지의 최대 지연)
+FAQ_REFRESH_SECONDS = float(os.getenv("FAQ_REFRESH_SECONDS", "60"))
+# 답변이 근거로 삼는 컬렉션. 이 컬렉션들의 버전이 바뀌면 미리 만든 답변을 쓰지 않고 다시 만든다
+FAQ_CORPUS_COLLECTIONS = os.getenv("FAQ_CORPUS_COLLECTIONS", "income-tax-index,house-tax-index").split(",")
+
+# 요청 단위 샘플링 트레이싱 (core/tracing.py). LANGCHAIN_TRACING_V2 로 모든 요청을 LangSmith 에 보내던 것을 대신한다
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true") == "true"
+# 처음부터 전체 트레이스(입력/출력 포함)를 남길 요청 비율
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0.05"))
+# 샘플링되지 않은 요청도 오류가 나거나 이 시간보다 오래 걸리면 내보낸다
+TRACING_SLOW_MS = float(os.getenv("TRACING_SLOW_MS", "20000"))
+# "file" | "otlp" (OTEL_EXPORTER_OTLP_ENDPOINT) | "langsmith" (샘플링된 요청만, forced 는 file)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", str(BASE_DIR / "logs" / "traces.jsonl"))
+# span 입력/출력을 남길 때 자르는 길이
+TRACING_PAYLOAD_CHARS = int(os.getenv("TRACING_PAYLOAD_CHARS", "2000"))
+
+# 시작 시 워밍업 (DB/pgvector 풀, LLM/임베딩 클라이언트 연결, 그래프). 끝나야 /ready 가 200 이 된다
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true") == "true"
+# 오프라인 환경에서는 false 로 두면 외부 API(LLM, 임베딩) 연결을 건너뛴다
+WARMUP_NETWORK = os.getenv("WARMUP_NETWORK", "true") == "true"
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "4"))
+
+# 메시지 엔드포인트 입장 제어: 동시에 실행하는 supervisor 그래프 수 제한 (워커 프로세스마다 적용)
+# python -m app.serve 로 띄우면 MAX_CONCURRENT_RUNS / ADMISSION_QUEUE_SIZE 는 서버 전체 값이고
+# 워커 수로 나눠서 워커에 넘긴다 (app/serve.py)
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", "16"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+# 사용자별 상한은 워커를 나누지 않는다. "memory" (프로세스마다 따로) | "sqlite" (같은 호스트의 워커들이 함께 센다)
+MAX_RUNS_PER_USER = int(os.getenv("MAX_RUNS_PER_USER", "2"))
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory")
+ADMISSION_STATE_PATH = os.getenv("ADMISSION_STATE_PATH", str(BASE_DIR / "cache" / "admission.sqlite"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+
+# WebSocket 채팅 (routers/chat_ws.py): 연결 후 첫 auth 프레임을 기다리는 시간, 연결당 보낼 프레임 대기열 크기
+# 대기열이 차면(클라이언트가 느리게 읽으면) 그 연결의 스트림들이 자리가 날 때까지 멈춘다
+WS_AUTH_TIMEOUT_SECONDS = float(os.getenv("WS_AUTH_TIMEOUT_SECONDS", "10"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+
+# 채팅 메시지 write-behind 저장: 여러 요청의 메시지를 모아서 한 트랜잭션으로 INSERT/UPDATE 한다
+MESSAGE_WRITE_BATCH_SIZE = int(os.getenv("MESSAGE_WRITE_BATCH_SIZE", "64"))
+MESSAGE_WRITE_FLUSH_MS = float(os.getenv("MESSAGE_WRITE_FLUSH_MS", "20"))
+MESSAGE_WRITE_RETRIES = int(os.getenv("MESSAGE_WRITE_RETRIES", "3"))
+
+# LangGraph 대화 상태 체크포인터: "postgres" | "sqlite" | "none"
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "postgres")
+CHECKPOINT_URL = os.getenv("CHECKPOINT_URL", DATABASE_URL)
+CHECKPOINT_SQLITE_PATH = os.getenv(
+    "CHECKPOINT_SQLITE_PATH", str(BASE_DIR / "checkpoints.sqlite")
+)
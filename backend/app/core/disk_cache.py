@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+class DiskTTLCache:
+    """sqlite 파일에 저장하는 크기 제한 + TTL 캐시 (재시작/여러 워커 사이에서 공유)
+
+    값은 JSON 으로 저장한다. 전체 크기가 max_bytes 를 넘으면 마지막 사용 시각이 오래된 항목부터 지운다.
+    ttl 이 None 이면 만료 없이 크기 제한으로만 지운다. tag 를 붙여 저장한 항목은 delete_tag 로 한꺼번에 지운다.
+    hits/misses 는 프로세스별, entries/bytes 는 파일 기준이다.
+    """
+
+    # 사용 시각 갱신은 쓰기 경합을 줄이려고 이 간격에 한 번만 한다
+    TOUCH_INTERVAL = 30.0
+
+    def __init__(self, path: str, max_bytes: int, ttl: float | None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+        if columns and "tag" not in columns:
+            # tag 컬럼이 없던 이전 형식의 파일은 캐시일 뿐이므로 비우고 다시 만든다
+            conn.execute("DROP TABLE cache")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, tag TEXT,"
+            " expires_at REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_tag ON cache (tag)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite 연결은 스레드 사이에 공유하지 않는다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or row[1] < now:
+            if row is not None:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.misses += 1
+            return default
+        if now - row[2] > self.TOUCH_INTERVAL:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, tag: str | None = None) -> None:
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(data.encode())
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else float("inf")
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, tag, expires_at, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, size, tag, expires_at, now),
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+            excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evicted = []
+                for evicted_key, evicted_size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+                    evicted.append((evicted_key,))
+                    excess -= evicted_size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+                self.evictions += len(evicted)
+
+    def delete_tag(self, tag: str) -> None:
+        self._connect().execute("DELETE FROM cache WHERE tag = ?", (tag,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache")
+
+    def stats(self) -> dict:
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import re
+import time
+
+import httpx
+from jose import JWTError, jwt
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Cache-Control 헤더가 없을 때 사용할 기본 캐시 시간
+DEFAULT_KEYS_MAX_AGE = 3600
+# 모르는 kid 로 인한 강제 갱신은 이 간격 이내에 한 번만 허용 (키 조회 폭주 방지)
+MIN_FORCED_REFRESH_INTERVAL = 60
+
+
+class GoogleTokenError(Exception):
+    """Google ID Token 검증 실패"""
+
+
+class GoogleKeysetUnavailable(Exception):
+    """Google 서명 키(JWKS)를 가져올 수 없음"""
+
+
+class GoogleKeyset:
+    """Google 서명 키(JWKS)를 메모리에 캐시하고 Cache-Control max-age 에 맞춰 갱신한다."""
+
+    def __init__(self, certs_url: str = GOOGLE_CERTS_URL):
+        self.certs_url = certs_url
+        self._keys: dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._last_forced_refresh = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_key(self, kid: str) -> dict | None:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self._refresh(force=False)
+        elif kid not in self._keys and now - self._last_forced_refresh >= MIN_FORCED_REFRESH_INTERVAL:
+            # Google 이 키를 교체(rotation)한 직후일 수 있으므로 한 번 더 받아본다
+            self._last_forced_refresh = now
+            await self._refresh(force=True)
+        return self._keys.get(kid)
+
+    async def _refresh(self, force: bool) -> None:
+        async with self._lock:
+            # 다른 코루틴이 먼저 갱신했다면 다시 받을 필요 없음
+            if not force and time.monotonic() < self._expires_at:
+                return
+            try:
+                keys, max_age = await self.fetch()
+            except httpx.HTTPError as exc:
+                if self._keys:
+                    # 갱신에 실패해도 기존 키로 계속 검증한다
+                    self._expires_at = time.monotonic() + MIN_FORCED_REFRESH_INTERVAL
+                    return
+                raise GoogleKeysetUnavailable(str(exc)) from exc
+
+            self._keys = {key["kid"]: key for key in keys}
+            self._expires_at = time.monotonic() + max_age
+
+    async def fetch(self) -> tuple[list[dict], int]:
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        return response.json()["keys"], parse_max_age(response.headers.get("cache-control"))
+
+
+class StaticGoogleKeyset(GoogleKeyset):
+    """네트워크 없이 고정된 JWKS 로 검증하는 키셋 (테스트/오프라인용)"""
+
+    def __init__(self, keys: list[dict]):
+        super().__init__(certs_url="")
+        self._keys = {key["kid"]: key for key in keys}
+        self._expires_at = float("inf")
+
+    async def get_key(self, kid: str) -> dict | None:
+        return self._keys.get(kid)
+
+
+def parse_max_age(cache_control: str | None) -> int:
+    if cache_control:
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return int(match.group(1))
+    return DEFAULT_KEYS_MAX_AGE
+
+
+google_keyset: GoogleKeyset = GoogleKeyset()
+
+
+def set_google_keyset(keyset: GoogleKeyset) -> None:
+    global google_keyset
+    google_keyset = keyset
+
+
+async def verify_google_id_token(token: str) -> dict:
+    """Google ID Token 의 서명/만료/발급자를 로컬에서 검증하고 claim 을 반환한다.
+
+    aud(클라이언트 ID) 검증은 호출하는 쪽에서 한다.
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except JWTError as exc:
+        raise GoogleTokenError("malformed token") from exc
+
+    key = await google_keyset.get_key(kid) if kid else None
+    if key is None:
+        raise GoogleTokenError("unknown signing key")
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            issuer=GOOGLE_ISSUERS,
+            options={"verify_aud": False},
+        )
+    except JWTError as exc:
+        raise GoogleTokenError(str(exc)) from exc
@@ -0,0 +1,12 @@
+from typing import Callable
+
+# 이름 -> 현재 지표를 dict 로 반환하는 함수
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], dict]) -> None:
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict:
+    return {name: provider() for name, provider in _providers.items()}
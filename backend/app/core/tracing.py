@@ -0,0 +1,342 @@
+"""요청 단위 샘플링 트레이싱
+
+전에는 config.py 가 LANGCHAIN_TRACING_V2=true 를 항상 켜서, 모든 요청의 노드/도구/LLM 호출마다
+입력/출력을 직렬화해서 LangSmith 로 보냈다. 이제는 요청(채팅 턴)마다 정한다.
+
+- head 샘플링: TRACING_SAMPLE_RATE 비율의 요청은 처음부터 전체 트레이스(입력/출력 포함)를 남긴다.
+- 나머지 요청은 run 이름/종류/시간/오류만 메모리에 가볍게 기록하고,
+  오류가 나거나 TRACING_SLOW_MS 보다 오래 걸린 경우에만 내보낸다(forced). 아니면 버린다.
+- 내보내기(TRACING_EXPORTER)
+  - "file": TRACING_FILE_PATH 에 트레이스 하나당 JSON 한 줄 (오프라인에서도 동작)
+  - "otlp": OpenTelemetry OTLP(gRPC) 로 span 전송 (OTEL_EXPORTER_OTLP_ENDPOINT)
+  - "langsmith": 샘플링된 요청에는 LangChainTracer 를 붙인다. forced 트레이스는 file 로 남긴다.
+
+    trace = start_trace("chat_turn", conversation_id=3)
+    graph.astream_events(..., config={**config, "callbacks": trace.callbacks})
+    trace.finish(error=None)
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .config import (
+    TRACING_ENABLED,
+    TRACING_EXPORTER,
+    TRACING_FILE_PATH,
+    TRACING_PAYLOAD_CHARS,
+    TRACING_SAMPLE_RATE,
+    TRACING_SLOW_MS,
+)
+from .metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= TRACING_PAYLOAD_CHARS else text[:TRACING_PAYLOAD_CHARS] + "..."
+
+
+class SpanRecorder(BaseCallbackHandler):
+    """LangChain run 이벤트를 span 목록으로 모은다. payloads=True 면 입력/출력도 (잘라서) 남긴다."""
+
+    # 이벤트 루프에서 바로 호출한다 (스레드 풀로 넘기는 비용을 피한다)
+    run_inline = True
+
+    def __init__(self, payloads: bool):
+        self.payloads = payloads
+        self.spans: dict[UUID, dict] = {}
+
+    def _start(self, kind: str, run_id: UUID, parent_run_id: UUID | None, name: str | None, inputs: Any = None):
+        span = {"kind": kind, "name": name or kind, "parent": parent_run_id, "start": time.time(), "end": None}
+        if self.payloads and inputs is not None:
+            span["inputs"] = _truncate(inputs)
+        self.spans[run_id] = span
+
+    def _end(self, run_id: UUID, outputs: Any = None, error: BaseException | None = None):
+        span = self.spans.get(run_id)
+        if span is None:
+            return
+        span["end"] = time.time()
+        if error is not None:
+            span["error"] = f"{type(error).__name__}: {error}"
+        elif self.payloads and outputs is not None:
+            span["outputs"] = _truncate(outputs)
+
+    @staticmethod
+    def _name(serialized: dict | None, kwargs: dict) -> str | None:
+        return kwargs.get("name") or ((serialized or {}).get("name"))
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start("chain", run_id, parent_run_id, self._name(serialized, kwargs), inputs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", run_id, parent_run_id, self._name(serialized, kwargs), messages)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", run_id, parent_run_id, self._name(serialized, kwargs), prompts)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start("tool", run_id, parent_run_id, self._name(serialized, kwargs), input_str)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start("retriever", run_id, parent_run_id, self._name(serialized, kwargs), query)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, outputs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, response)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: dict) -> None:
+        with self._lock:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _span_order(spans: list[dict]) -> list[dict]:
+    """부모가 자식보다 먼저 오도록 span 을 정렬한다. 형제끼리는 시작 순이고, 부모가 기록에 없으면 루트 아래로 본다."""
+    ids = {span["id"] for span in spans}
+    children = defaultdict(list)
+    for span in sorted(spans, key=lambda s: s["start"]):
+        children[span["parent"] if span["parent"] in ids else None].append(span)
+    order = []
+    stack = children[None][::-1]
+    while stack:
+        span = stack.pop()
+        order.append(span)
+        stack.extend(children[span["id"]][::-1])
+    return order
+
+
+def _span_ends(order: list[dict]) -> dict:
+    """span id -> 종료 시각. 끝나지 않은 span(end None, 요청이 끝날 때 아직 돌던 run)은
+    요청 종료 시각 대신 그 아래에서 마지막으로 관측된 종료 시각(자식이 없으면 자기 시작 시각)으로 닫는다."""
+    ends = {}
+    # span id -> 그 span 아래(자손)에서 가장 늦은 종료 시각
+    latest: dict = {}
+    for span in reversed(order):
+        end = span["end"] if span["end"] is not None else latest.get(span["id"], span["start"])
+        ends[span["id"]] = end
+        subtree_end = max(end, latest.get(span["id"], end))
+        latest[span["parent"]] = max(latest.get(span["parent"], subtree_end), subtree_end)
+    return ends
+
+
+class OtlpExporter:
+    """기록한 span 을 시작/종료 시각 그대로 OpenTelemetry span 으로 다시 만들어 보낸다."""
+
+    def __init__(self):
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.trace import set_span_in_context
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "tax-chatbot")})
+        )
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self._tracer = provider.get_tracer(__name__)
+        self._set_span_in_context = set_span_in_context
+
+    def export(self, record: dict) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        def ns(seconds: float) -> int:
+            return int(seconds * 1_000_000_000)
+
+        root = self._tracer.start_span(
+            record["name"],
+            start_time=ns(record["start"]),
+            attributes={key: str(value) for key, value in record["attributes"].items()} | {"trace.reason": record["reason"]},
+        )
+        order = _span_order(record["spans"])
+        ends = _span_ends(order)
+        spans = {None: root}
+        for span in order:
+            attributes = {"langchain.kind": span["kind"]}
+            if span["end"] is None:
+                attributes["langchain.unfinished"] = True
+            otel_span = self._tracer.start_span(
+                span["name"],
+                context=self._set_span_in_context(spans.get(span["parent"], root)),
+                start_time=ns(span["start"]),
+                attributes=attributes,
+            )
+            if span.get("error"):
+                otel_span.set_status(Status(StatusCode.ERROR, span["error"]))
+            spans[span["id"]] = otel_span
+        # 자식이 부모보다 먼저 끝나도록 부모-자식 순서의 역순으로 닫는다
+        for span in reversed(order):
+            spans[span["id"]].end(end_time=ns(ends[span["id"]]))
+        if record.get("error"):
+            root.set_status(Status(StatusCode.ERROR, record["error"]))
+        root.end(end_time=ns(record["end"]))
+
+
+class TracingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.sampled = 0
+        self.forced_error = 0
+        self.forced_slow = 0
+        self.dropped = 0
+        self.export_errors = 0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        exported = self.sampled + self.forced_error + self.forced_slow
+        return {
+            "enabled": TRACING_ENABLED,
+            "exporter": TRACING_EXPORTER,
+            "sample_rate": TRACING_SAMPLE_RATE,
+            "slow_ms": TRACING_SLOW_MS,
+            "requests": self.requests,
+            "sampled": self.sampled,
+            "forced_error": self.forced_error,
+            "forced_slow": self.forced_slow,
+            "dropped": self.dropped,
+            "exported_share": exported / self.requests if self.requests else 0.0,
+            "export_errors": self.export_errors,
+        }
+
+
+tracing_stats = TracingStats()
+register_metrics("tracing", tracing_stats.stats)
+
+_exporter: FileExporter | OtlpExporter | None = None
+_exporter_lock = threading.Lock()
+# 내보내기(파일 쓰기 / span 생성)는 요청 경로 밖에서 한다
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-export")
+
+
+def _get_exporter() -> FileExporter | OtlpExporter:
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            if TRACING_EXPORTER == "otlp":
+                try:
+                    _exporter = OtlpExporter()
+                except ImportError as e:
+                    logger.warning("OTLP exporter unavailable (%s), writing traces to %s", e, TRACING_FILE_PATH)
+            if _exporter is None:
+                _exporter = FileExporter(TRACING_FILE_PATH)
+    return _exporter
+
+
+def _export(record: dict) -> None:
+    try:
+        _get_exporter().export(record)
+    except Exception as e:
+        tracing_stats.add(export_errors=1)
+        logger.warning("failed to export trace: %s", e)
+
+
+class Trace:
+    def __init__(self, name: str, sampled: bool, attributes: dict):
+        self.name = name
+        self.sampled = sampled
+        self.attributes = attributes
+        self.trace_id = uuid.uuid4().hex
+        self.start = time.time()
+        self.callbacks: list[BaseCallbackHandler] = []
+        self.recorder: SpanRecorder | None = None
+        if not TRACING_ENABLED:
+            return
+        if sampled and TRACING_EXPORTER == "langsmith":
+            from langchain_core.tracers.langchain import LangChainTracer
+
+            self.callbacks.append(LangChainTracer(project_name=os.getenv("LANGCHAIN_PROJECT")))
+        else:
+            self.recorder = SpanRecorder(payloads=sampled)
+            self.callbacks.append(self.recorder)
+
+    def finish(self, error: BaseException | str | None = None) -> str | None:
+        """내보낸 이유("sampled" | "error" | "slow")를, 버렸으면 None 을 반환한다."""
+        if not TRACING_ENABLED:
+            return None
+        end = time.time()
+        duration_ms = (end - self.start) * 1000
+        if self.sampled:
+            reason = "sampled"
+        elif error is not None:
+            reason = "error"
+        elif duration_ms >= TRACING_SLOW_MS:
+            reason = "slow"
+        else:
+            tracing_stats.add(dropped=1)
+            return None
+        tracing_stats.add(**{"sampled" if reason == "sampled" else f"forced_{reason}": 1})
+
+        # langsmith 로 샘플링한 요청은 LangChainTracer 가 이미 보냈다
+        if self.recorder is None:
+            return reason
+        record = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "reason": reason,
+            "start": self.start,
+            "end": end,
+            "duration_ms": duration_ms,
+            "error": None if error is None else str(error),
+            "attributes": self.attributes,
+            "spans": [
+                {"id": run_id, **span} for run_id, span in self.recorder.spans.items()
+            ],
+        }
+        _export_executor.submit(_export, _serializable(record))
+        return reason
+
+
+def _serializable(record: dict) -> dict:
+    for span in record["spans"]:
+        span["id"] = str(span["id"])
+        span["parent"] = str(span["parent"]) if span["parent"] else None
+    return record
+
+
+def start_trace(name: str, **attributes) -> Trace:
+    tracing_stats.add(requests=1)
+    return Trace(name, TRACING_ENABLED and random.random() < TRACING_SAMPLE_RATE, attributes)
@@ -1,9 +1,18 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .core.config import DATABASE_URL
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+
+
+if engine.url.get_backend_name() == "sqlite":
+    # sqlite 는 연결마다 켜야 ON DELETE CASCADE 가 동작한다
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,8 +1,14 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 
+from .core.cache import TTLCache
+from .core.config import METRICS_ALLOWED_HOSTS, METRICS_TOKEN, USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
 from .core.security import decode_access_token
 from .db import get_db
 from .models import User
@@ -10,12 +16,33 @@ from .models import User
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security), # 출입증(토큰)
-    db: Session = Depends(get_db),
-) -> User:
+@dataclass(frozen=True)
+class CurrentUser:
+    """인증된 사용자의 읽기 전용 스냅샷. 여러 요청이 같은 객체를 공유하므로 ORM 객체 대신 캐시한다."""
+
+    id: int
+    email: str
+    display_name: str
+    google_id: str | None
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(user.id, user.email, user.display_name, user.google_id, user.created_at)
+
+
+# user_id -> CurrentUser
+# 캐시는 워커 프로세스마다 따로라서, 사용자 정보 변경이 다른 워커에 보이기까지 최대 USER_CACHE_TTL_SECONDS 걸린다
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """프로필/계정 정보가 바뀌면 호출해서 캐시된 사용자를 버린다 (이 워커의 캐시만 비운다)."""
+    user_cache.pop(user_id)
 
-    token = credentials.credentials
+
+def authenticate_token(token: str, db: Session) -> CurrentUser:
+    """JWT 를 검증하고 사용자를 반환한다. 실패하면 401 (WebSocket 인증에서도 쓴다)."""
     try:
         payload = decode_access_token(token)
         user_id = int(payload.get("sub"))
@@ -24,9 +51,34 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
+    # 캐시 히트면 DB 왕복 없이 바로 반환
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     user = db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
-    return user
+
+    current = CurrentUser.from_user(user)
+    user_cache.set(user_id, current)
+    return current
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security), # 출입증(토큰)
+    db: Session = Depends(get_db),
+) -> CurrentUser:
+    return authenticate_token(credentials.credentials, db)
+
+
+def require_metrics_access(request: Request) -> None:
+    """/metrics 는 내부 주소(METRICS_ALLOWED_HOSTS) 또는 METRICS_TOKEN 으로만 볼 수 있다."""
+    if request.client is not None and request.client.host in METRICS_ALLOWED_HOSTS:
+        return
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if METRICS_TOKEN and scheme.lower() == "bearer" and secrets.compare_digest(token, METRICS_TOKEN):
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
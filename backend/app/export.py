@@ -0,0 +1,86 @@
+"""대화 기록 NDJSON 내보내기 (GET /conversations/export)
+
+한 줄에 하나씩 {"type": "conversation", ...} 다음에 그 대화의 {"type": "message", ...} 가 이어진다.
+"""
+import json
+import zlib
+
+from sqlalchemy import select
+
+from .db import SessionLocal
+from .models import Conversation, Message
+
+EXPORT_BATCH_ROWS = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_export_lines(user_id: int):
+    """사용자의 모든 대화와 메시지를 NDJSON 줄(bytes)로 내보낸다.
+
+    서버 측 커서(yield_per)로 EXPORT_BATCH_ROWS 행씩 읽고 ORM 객체를 만들지 않으므로
+    대화 기록 크기와 상관없이 메모리 사용량이 일정하다.
+    """
+    stmt = (
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.created_at,
+            Conversation.updated_at,
+            Message.id,
+            Message.role,
+            Message.content,
+            Message.created_at,
+        )
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.id, Message.created_at, Message.id)
+        .execution_options(yield_per=EXPORT_BATCH_ROWS)
+    )
+
+    # 스트리밍이 끝날 때까지 커서를 열어 두므로 요청 세션과 별도의 세션을 쓴다
+    with SessionLocal() as db:
+        current = None
+        for c_id, title, c_created, c_updated, m_id, role, content, m_created in db.execute(stmt):
+            if c_id != current:
+                current = c_id
+                yield json.dumps(
+                    {
+                        "type": "conversation",
+                        "id": c_id,
+                        "title": title,
+                        "created_at": c_created.isoformat(),
+                        "updated_at": c_updated.isoformat(),
+                    },
+                    ensure_ascii=False,
+                ).encode() + b"\n"
+            if m_id is not None:
+                yield json.dumps(
+                    {
+                        "type": "message",
+                        "conversation_id": c_id,
+                        "id": m_id,
+                        "role": role,
+                        "content": content,
+                        "created_at": m_created.isoformat(),
+                    },
+                    ensure_ascii=False,
+                ).encode() + b"\n"
+
+
+def iter_export(user_id: int, compress: bool = False):
+    """iter_export_lines 를 EXPORT_CHUNK_BYTES 단위로 묶고, compress 면 gzip 으로 압축한다."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip 헤더
+    buffer = bytearray()
+    for line in iter_export_lines(user_id):
+        buffer += line
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+
+    tail = bytes(buffer)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,330 @@
+"""자주 묻는 첫 질문(FAQ) 답변 미리 만들기
+
+messages 테이블의 대화 첫 질문을 임베딩해서 의도(FaqIntent)로 묶고, 질문 수가 많은 상위 의도의 답변을
+현재 컬렉션 버전으로 미리 만들어 둔다 (scripts/mine_faq.py). 대화의 첫 질문이 그 의도와 같으면
+그래프를 실행하지 않고 미리 만든 답변을 바로 보낸다 (routers/chat.py prepare_turn).
+
+- 묶기: leader 방식. 새 질문은 가장 가까운 기존 의도(faq_intents 의 HNSW binary 인덱스)와
+  코사인 유사도가 FAQ_CLUSTER_THRESHOLD 이상이면 그 의도에 들어가고, 아니면 새 의도를 만든다.
+  의도의 벡터는 처음 만든 질문의 벡터 그대로라 답변을 만든 질문에서 멀어지지 않는다.
+- 증분 실행: 처리한 메시지는 faq_questions 에 남기고 그보다 뒤의 메시지만 읽는다.
+- 금액/세율 같은 숫자가 다른 질문("연봉 5천만원" / "연봉 6천만원")은 같은 의도로 보지 않는다.
+- 미리 만든 답변은 만들 때의 컬렉션 버전(corpus_version)이 지금과 같을 때만 쓴다.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from .agents.collections import get_collection_version
+from .agents.grounding import extract_numbers
+from .agents.quantized_search import build_search_sql, index_ddl, to_vector_literal
+from .agents.retrieval_cache import normalize_query, query_hash
+from .core.config import (
+    FAQ_CLUSTER_THRESHOLD,
+    FAQ_CORPUS_COLLECTIONS,
+    FAQ_EMBEDDING_DIMS,
+    FAQ_EMBEDDING_MODEL,
+    FAQ_ENABLED,
+    FAQ_MATCH_THRESHOLD,
+    FAQ_MAX_QUESTION_CHARS,
+    FAQ_REFRESH_SECONDS,
+    RESCORE_CANDIDATES,
+)
+from .core.metrics import register_metrics
+from .db import SessionLocal
+from .models import FaqIntent, FaqQuestion, Message
+
+logger = logging.getLogger(__name__)
+
+# 의도 벡터는 4096 차원이라 float32/halfvec HNSW 인덱스를 만들 수 없다
+FAQ_SEARCH_MODE = "binary"
+FAQ_INDEX_NAME = "ix_faq_intents_embedding_binary"
+
+
+def corpus_version() -> str:
+    return ",".join(f"{name}:{get_collection_version(name)}" for name in FAQ_CORPUS_COLLECTIONS)
+
+
+def same_numbers(a: str, b: str) -> bool:
+    return extract_numbers(a) == extract_numbers(b)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def leader_cluster(vectors: np.ndarray, questions: list[str], threshold: float) -> list[int]:
+    """정규화한 벡터를 순서대로 묶는다. 각 질문이 속한 묶음의 leader(첫 질문) 위치를 반환한다."""
+    leaders: list[int] = []
+    labels = []
+    for i, vector in enumerate(vectors):
+        label = i
+        if leaders:
+            similarities = vectors[leaders] @ vector
+            for j in np.argsort(-similarities):
+                if similarities[j] < threshold:
+                    break
+                if same_numbers(questions[leaders[j]], questions[i]):
+                    label = leaders[j]
+                    break
+        if label == i:
+            leaders.append(i)
+        labels.append(label)
+    return labels
+
+
+def ensure_faq_index(db: Session) -> None:
+    db.execute(text(index_ddl("faq_intents", FAQ_INDEX_NAME, FAQ_SEARCH_MODE, FAQ_EMBEDDING_DIMS)))
+    db.commit()
+
+
+def _nearest_intent(db: Session, question: str, vector: np.ndarray, k: int = 5) -> int | None:
+    sql = build_search_sql("faq_intents", "id, question", FAQ_SEARCH_MODE, FAQ_EMBEDDING_DIMS)
+    rows = db.execute(
+        sql,
+        {"query": to_vector_literal(vector.tolist()), "k": k, "candidates": max(RESCORE_CANDIDATES, k)},
+    ).all()
+    for row in rows:
+        if 1 - row.distance < FAQ_CLUSTER_THRESHOLD:
+            break
+        if same_numbers(row.question, question):
+            return row.id
+    return None
+
+
+def _new_first_questions(db: Session, limit: int) -> list[tuple[int, str]]:
+    """아직 처리하지 않은 대화 첫 질문 (message_id, content) 을 id 순서로 읽는다."""
+    watermark = db.scalar(select(func.coalesce(func.max(FaqQuestion.message_id), 0)))
+    first_ids = (
+        select(func.min(Message.id).label("id"))
+        .where(Message.role == "user")
+        .group_by(Message.conversation_id)
+        .subquery()
+    )
+    return db.execute(
+        select(Message.id, Message.content)
+        .join(first_ids, Message.id == first_ids.c.id)
+        .where(Message.id > watermark)
+        .order_by(Message.id)
+        .limit(limit)
+    ).all()
+
+
+def mine_questions(db: Session, embeddings, batch_size: int = 500) -> dict:
+    """새 첫 질문을 기존 의도에 넣거나 새 의도로 묶는다. 남은 질문이 없을 때까지 batch_size 개씩 처리한다."""
+    counts = {"questions": 0, "skipped": 0, "joined": 0, "new_intents": 0, "embedded": 0}
+    while True:
+        rows = _new_first_questions(db, batch_size)
+        if not rows:
+            return counts
+
+        usable = [(message_id, content.strip()) for message_id, content in rows]
+        usable = [(m, q) for m, q in usable if q and len(q) <= FAQ_MAX_QUESTION_CHARS]
+        counts["questions"] += len(rows)
+        counts["skipped"] += len(rows) - len(usable)
+        assigned: dict[int, int | None] = {message_id: None for message_id, _ in rows}
+
+        # 같은 질문은 한 번만 임베딩한다
+        unique = list(dict.fromkeys(normalize_query(q) for _, q in usable))
+        vectors = dict(zip(unique, normalize_rows(embeddings.embed_documents(unique)))) if unique else {}
+        counts["embedded"] += len(unique)
+
+        pending = []
+        for message_id, question in usable:
+            intent_id = _nearest_intent(db, question, vectors[normalize_query(question)])
+            if intent_id is None:
+                pending.append((message_id, question))
+            else:
+                assigned[message_id] = intent_id
+                counts["joined"] += 1
+
+        # 기존 의도에 맞지 않은 질문끼리 묶어서 묶음마다 의도를 하나 만든다
+        if pending:
+            questions = [question for _, question in pending]
+            labels = leader_cluster(
+                np.stack([vectors[normalize_query(q)] for q in questions]), questions, FAQ_CLUSTER_THRESHOLD
+            )
+            intents: dict[int, FaqIntent] = {}
+            for i, (message_id, question) in enumerate(pending):
+                leader = labels[i]
+                if leader not in intents:
+                    intents[leader] = FaqIntent(
+                        question=question,
+                        question_hash=query_hash(question),
+                        embedding=vectors[normalize_query(question)].tolist(),
+                    )
+                    db.add(intents[leader])
+            db.flush()
+            for i, (message_id, _) in enumerate(pending):
+                assigned[message_id] = intents[labels[i]].id
+            counts["new_intents"] += len(intents)
+            counts["joined"] += len(pending) - len(intents)
+
+        db.add_all(FaqQuestion(message_id=m, intent_id=intent_id) for m, intent_id in assigned.items())
+        db.commit()
+
+
+def top_intents(db: Session, n: int, min_count: int) -> list[tuple[FaqIntent, int]]:
+    """질문 수가 많은 순서로 (의도, 질문 수) 를 반환한다."""
+    count = func.count(FaqQuestion.message_id).label("count")
+    return [
+        (intent, questions)
+        for intent, questions in db.execute(
+            select(FaqIntent, count)
+            .join(FaqQuestion, FaqQuestion.intent_id == FaqIntent.id)
+            .group_by(FaqIntent.id)
+            .having(count >= min_count)
+            .order_by(count.desc(), FaqIntent.id)
+            .limit(n)
+        ).all()
+    ]
+
+
+@dataclass
+class FaqAnswer:
+    intent_id: int
+    question: str
+    answer: str
+
+
+class FaqStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.exact_hits = 0
+        self.embedding_hits = 0
+        self.number_mismatches = 0
+        self.misses = 0
+        self.skipped = 0
+        self.errors = 0
+        self.loads = 0
+        self.entries = 0
+        self.lookup_seconds = 0.0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.embedding_hits
+        return {
+            "enabled": FAQ_ENABLED,
+            "entries": self.entries,
+            "loads": self.loads,
+            "lookups": self.lookups,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "embedding_hits": self.embedding_hits,
+            "hit_ratio": hits / self.lookups if self.lookups else 0.0,
+            "number_mismatches": self.number_mismatches,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "lookup_ms_avg": self.lookup_seconds * 1000 / self.lookups if self.lookups else 0.0,
+        }
+
+
+faq_stats = FaqStats()
+register_metrics("faq", faq_stats.stats)
+
+
+class FaqMatcher:
+    """현재 컬렉션 버전의 active 의도를 워커 메모리에 올려 두고 첫 질문과 맞춰 본다.
+
+    정규화한 질문이 같으면 임베딩 없이 바로 찾고, 아니면 질의 임베딩 하나와 행렬 곱으로 찾는다.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.embeddings = None
+        self._entries: list[FaqAnswer] = []
+        self._matrix = np.zeros((0, FAQ_EMBEDDING_DIMS), dtype=np.float32)
+        self._by_hash: dict[str, int] = {}
+        self._version: str | None = None
+        self._loaded_at = 0.0
+        self._refresh: asyncio.Lock | None = None
+
+    def _get_embeddings(self):
+        if self.embeddings is None:
+            from .agents.llm import get_embeddings
+
+            self.embeddings = get_embeddings(FAQ_EMBEDDING_MODEL)
+        return self.embeddings
+
+    def load(self) -> None:
+        version = corpus_version()
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(FaqIntent.id, FaqIntent.question, FaqIntent.answer, FaqIntent.embedding)
+                .where(FaqIntent.status == "active", FaqIntent.corpus_version == version)
+                .order_by(FaqIntent.id)
+            ).all()
+        self._entries = [FaqAnswer(row.id, row.question, row.answer) for row in rows]
+        self._matrix = (
+            normalize_rows([row.embedding for row in rows])
+            if rows
+            else np.zeros((0, FAQ_EMBEDDING_DIMS), dtype=np.float32)
+        )
+        self._by_hash = {query_hash(entry.question): i for i, entry in enumerate(self._entries)}
+        self._version = version
+        self._loaded_at = time.monotonic()
+        faq_stats.entries = len(rows)
+        faq_stats.add(loads=1)
+
+    async def _ensure_fresh(self) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        if self._refresh is None:
+            self._refresh = asyncio.Lock()
+        async with self._refresh:
+            if time.monotonic() - self._loaded_at >= self.refresh_seconds:
+                await asyncio.to_thread(self.load)
+
+    async def match(self, question: str) -> FaqAnswer | None:
+        """미리 만든 답변이 있으면 반환한다. 실패해도 예외를 올리지 않고 None (그래프로 답한다)."""
+        if not FAQ_ENABLED:
+            return None
+        started = time.perf_counter()
+        try:
+            return await self._match(question.strip())
+        except Exception as e:
+            faq_stats.add(errors=1)
+            logger.warning("FAQ lookup failed: %s", e)
+            return None
+        finally:
+            faq_stats.add(lookups=1, lookup_seconds=time.perf_counter() - started)
+
+    async def _match(self, question: str) -> FaqAnswer | None:
+        await self._ensure_fresh()
+        if not self._entries or not question or len(question) > FAQ_MAX_QUESTION_CHARS:
+            faq_stats.add(skipped=1)
+            return None
+
+        index = self._by_hash.get(query_hash(question))
+        if index is not None:
+            faq_stats.add(exact_hits=1)
+            return self._entries[index]
+
+        vector = normalize_rows([await self._get_embeddings().aembed_query(question)])[0]
+        similarities = self._matrix @ vector
+        for index in np.argsort(-similarities)[:5]:
+            if similarities[index] < FAQ_MATCH_THRESHOLD:
+                break
+            if same_numbers(self._entries[index].question, question):
+                faq_stats.add(embedding_hits=1)
+                return self._entries[index]
+            faq_stats.add(number_mismatches=1)
+        faq_stats.add(misses=1)
+        return None
+
+
+faq_matcher = FaqMatcher(FAQ_REFRESH_SECONDS)
@@ -1,10 +1,18 @@
+import asyncio
+
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from .core.config import FRONTEND_ORIGIN
+from .agents.checkpoint import close_checkpointer, init_checkpointer
+from .core.config import FRONTEND_ORIGIN, INIT_DB_ON_STARTUP
+from .core.metrics import collect_metrics
 from .db import init_db
-from .routers import auth, chat
+from .deps import require_metrics_access
+from .message_writer import message_writer
+from .routers import auth, chat, chat_ws
+from .warmup import run_warmup, warmup_status
 
 load_dotenv()
 
@@ -21,7 +29,25 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    # app.serve 로 띄운 워커는 부모 프로세스가 이미 테이블을 만들었다
+    if INIT_DB_ON_STARTUP:
+        init_db()
+
+
+@app.on_event("startup")
+async def on_startup_checkpointer():
+    await init_checkpointer()
+    await message_writer.start()
+    # 워밍업은 기다리지 않는다. /health 는 바로 응답하고 /ready 는 워밍업이 끝나야 200 이 된다
+    app.state.warmup_task = asyncio.create_task(run_warmup())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.warmup_task.cancel()
+    # 아직 저장되지 않은 메시지를 먼저 저장한다
+    await message_writer.close()
+    await close_checkpointer()
 
 
 @app.get("/health")
@@ -29,5 +55,18 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready_check():
+    # 로드밸런서 / compose healthcheck 는 이 엔드포인트로 트래픽을 보낼지 판단한다
+    status_code = 200 if warmup_status["ready"] else 503
+    return JSONResponse(warmup_status, status_code=status_code)
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+def metrics():
+    return collect_metrics()
+
+
 app.include_router(auth.router)
 app.include_router(chat.router)
+app.include_router(chat_ws.router)
@@ -0,0 +1,193 @@
+"""채팅 메시지 write-behind 저장
+
+create_message 는 턴이 끝나면 (사용자 메시지, 답변, 대화 제목/updated_at) 을 submit 한다.
+writer 는 여러 요청의 턴을 MESSAGE_WRITE_BATCH_SIZE 개 또는 MESSAGE_WRITE_FLUSH_MS 까지 모아서
+한 트랜잭션의 multi-row INSERT ... RETURNING / executemany UPDATE 로 저장한다.
+
+- submit 은 저장이 끝나야 반환하므로 done 이벤트의 메시지 id 는 항상 DB 에 있는 값이다.
+- 실패하면 지수 백오프로 재시도하고, 그래도 실패하면 턴 단위로 나눠서 저장한다.
+  (삭제된 대화 하나 때문에 같은 배치의 다른 턴까지 잃지 않도록)
+- 서버 종료 시 close() 가 남은 턴을 모두 저장한다.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import insert, update
+
+from .core.config import MESSAGE_WRITE_BATCH_SIZE, MESSAGE_WRITE_FLUSH_MS, MESSAGE_WRITE_RETRIES
+from .core.metrics import register_metrics
+from .db import SessionLocal
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingTurn:
+    conversation_id: int
+    title: str
+    updated_at: datetime
+    messages: list[dict]  # role, content, created_at
+    future: asyncio.Future | None = field(default=None, repr=False)
+
+
+class MessageWriter:
+    def __init__(self, session_factory, batch_size: int, flush_interval: float, retries: int):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self._pending: list[PendingTurn] = []
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._closing = False
+        self.turns = 0
+        self.batches = 0
+        self.rows = 0
+        self.retried = 0
+        self.failures = 0
+        self.max_batch = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """남은 턴을 모두 저장하고 멈춘다."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    async def submit(
+        self, conversation_id: int, title: str, messages: list[dict], updated_at: datetime | None = None
+    ) -> list[int]:
+        """턴을 저장 대기열에 넣고, 저장이 끝나면 메시지 id 를 messages 순서대로 반환한다."""
+        turn = PendingTurn(conversation_id, title, updated_at or datetime.utcnow(), messages)
+        self.turns += 1
+
+        # start() 전(스크립트, 벤치마크 등)에는 바로 저장한다
+        if self._task is None:
+            return (await self._flush([turn]))[0]
+
+        turn.future = asyncio.get_running_loop().create_future()
+        self._pending.append(turn)
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+        # 클라이언트 연결이 끊겨 요청이 취소돼도 저장은 계속 진행한다
+        return await asyncio.shield(turn.future)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._closing and len(self._pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            batch = self._pending[: self.batch_size]
+            self._pending = self._pending[self.batch_size :]
+            if self._pending:
+                self._wakeup.set()
+            if batch:
+                await self._flush(batch)
+            if self._closing and not self._pending:
+                return
+
+    async def _flush(self, batch: list[PendingTurn]) -> list[list[int]]:
+        for attempt in range(self.retries + 1):
+            try:
+                ids = await asyncio.to_thread(self._write, batch)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    if len(batch) > 1:
+                        logger.warning("message batch failed, writing turns one by one: %s", e)
+                        return [await self._flush_one(turn) for turn in batch]
+                    self.failures += 1
+                    if batch[0].future is None:
+                        raise
+                    batch[0].future.set_exception(e)
+                    return [[]]
+                self.retried += 1
+                await asyncio.sleep(0.05 * 2**attempt)
+
+        for turn, turn_ids in zip(batch, ids):
+            if turn.future is not None and not turn.future.done():
+                turn.future.set_result(turn_ids)
+        return ids
+
+    async def _flush_one(self, turn: PendingTurn) -> list[int]:
+        try:
+            ids = await asyncio.to_thread(self._write, [turn])
+        except Exception as e:
+            self.failures += 1
+            if not turn.future.done():
+                turn.future.set_exception(e)
+            return []
+        if not turn.future.done():
+            turn.future.set_result(ids[0])
+        return ids[0]
+
+    def _write(self, batch: list[PendingTurn]) -> list[list[int]]:
+        rows = [
+            {"conversation_id": turn.conversation_id, **message}
+            for turn in batch
+            for message in turn.messages
+        ]
+        # 같은 대화의 턴이 여러 개면 마지막 값만 반영한다
+        conversations = {
+            turn.conversation_id: {"id": turn.conversation_id, "title": turn.title, "updated_at": turn.updated_at}
+            for turn in batch
+        }
+
+        with self.session_factory() as db, db.begin():
+            ids = db.scalars(
+                insert(Message).returning(Message.id, sort_by_parameter_order=True), rows
+            ).all()
+            db.execute(update(Conversation), list(conversations.values()))
+
+        self.batches += 1
+        self.rows += len(rows)
+        self.max_batch = max(self.max_batch, len(batch))
+
+        result, start = [], 0
+        for turn in batch:
+            result.append(ids[start : start + len(turn.messages)])
+            start += len(turn.messages)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "turns": self.turns,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_turns": self.turns / self.batches if self.batches else 0.0,
+            "max_batch_turns": self.max_batch,
+            "retries": self.retried,
+            "failures": self.failures,
+        }
+
+
+message_writer = MessageWriter(
+    SessionLocal,
+    batch_size=MESSAGE_WRITE_BATCH_SIZE,
+    flush_interval=MESSAGE_WRITE_FLUSH_MS / 1000,
+    retries=MESSAGE_WRITE_RETRIES,
+)
+register_metrics("message_writer", message_writer.stats)
@@ -1,10 +1,11 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pgvector.sqlalchemy import Vector
 
+from .core.config import DOCUMENT_EMBEDDING_DIMS, FAQ_EMBEDDING_DIMS
 from .db import Base
 
 
@@ -24,8 +25,9 @@ class User(Base):
         DateTime, default=datetime.utcnow, nullable=False
     )
 
+    # 삭제는 FK 의 ON DELETE CASCADE 에 맡긴다 (자식 행을 세션으로 읽어오지 않음)
     conversations: Mapped[list["Conversation"]] = relationship(
-        "Conversation", back_populates="user", cascade="all, delete-orphan"
+        "Conversation", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -49,6 +51,7 @@ class Conversation(Base):
         "Message",
         back_populates="conversation",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         order_by="Message.created_at",
     )
 
@@ -79,7 +82,45 @@ class Document(Base):
     content: Mapped[str] = mapped_column(Text)
 
     content_tsvector = mapped_column(TSVECTOR)  # 키워드 검색
-    embedding = mapped_column(Vector(3072))  # 벡터 검색
+    embedding = mapped_column(Vector(DOCUMENT_EMBEDDING_DIMS))  # 벡터 검색
 
     metadata_: Mapped[dict] = mapped_column(JSONB, default={})
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class FaqIntent(Base):
+    """자주 묻는 첫 질문 묶음(의도). question 은 묶음을 처음 만든 질문이고 답변도 이 질문으로 만든다."""
+
+    __tablename__ = "faq_intents"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    question_hash: Mapped[str] = mapped_column(String(40), index=True, nullable=False)
+    embedding = mapped_column(Vector(FAQ_EMBEDDING_DIMS), nullable=False)
+    # "pending" (답변 없음/상위 N 밖) | "active" (검사를 통과한 답변) | "rejected" (검사 실패)
+    status: Mapped[str] = mapped_column(String(20), default="pending", index=True, nullable=False)
+    answer: Mapped[str | None] = mapped_column(Text, nullable=True)
+    answer_worker: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    grounding: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # 답변을 만들 때의 컬렉션 버전 (faq.corpus_version)
+    corpus_version: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+
+class FaqQuestion(Base):
+    """처리한 첫 질문 메시지 -> 의도. 메시지가 지워지면 함께 지워져서 질문 수에서 빠진다."""
+
+    __tablename__ = "faq_questions"
+
+    message_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("messages.id", ondelete="CASCADE"), primary_key=True
+    )
+    # 너무 길어서 묶지 않은 질문은 None (다음 실행에서 다시 읽지 않도록 남긴다)
+    intent_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("faq_intents.id", ondelete="CASCADE"), index=True, nullable=True
+    )
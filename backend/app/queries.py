@@ -0,0 +1,45 @@
+"""라우터와 벤치마크에서 같이 쓰는 조회 쿼리"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Conversation, Message
+
+PREVIEW_LENGTH = 80
+
+
+def list_conversation_summaries(db: Session, user_id: int) -> list[dict]:
+    """사이드바용 대화 목록. 마지막 메시지 미리보기, 메시지 수, 마지막 활동 시각을 한 쿼리로 가져온다.
+
+    대화마다 상관 서브쿼리가 messages(conversation_id) 인덱스만 타므로
+    대화 수가 많아도 list_messages 를 대화마다 부르는(N+1) 것보다 훨씬 싸다.
+    """
+    correlated = Message.conversation_id == Conversation.id
+    last_message_preview = (
+        select(func.substr(Message.content, 1, PREVIEW_LENGTH))
+        .where(correlated)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(1)
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+    message_count = (
+        select(func.count(Message.id)).where(correlated).correlate(Conversation).scalar_subquery()
+    )
+    last_message_at = (
+        select(func.max(Message.created_at)).where(correlated).correlate(Conversation).scalar_subquery()
+    )
+
+    rows = db.execute(
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.created_at,
+            Conversation.updated_at,
+            last_message_preview.label("last_message_preview"),
+            message_count.label("message_count"),
+            last_message_at.label("last_message_at"),
+        )
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.updated_at.desc())
+    ).mappings()
+    return [dict(row) for row in rows]
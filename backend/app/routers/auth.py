@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-import httpx
 
 from ..core.config import GOOGLE_CLIENT_ID
+from ..core.google_auth import (
+    GoogleKeysetUnavailable,
+    GoogleTokenError,
+    verify_google_id_token,
+)
 from ..core.security import create_access_token, get_password_hash, verify_password
-from ..deps import get_current_user
+from ..deps import CurrentUser, get_current_user, invalidate_cached_user
 from ..db import get_db
 from ..models import User
 from ..schemas import GoogleLoginRequest, Token, UserCreate, UserLogin, UserOut
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-GOOGLE_TOKEN_INFO_URL = "https://oauth2.googleapis.com/tokeninfo"
-
 
 # 회원 가입
 @router.post("/signup", response_model=Token)
@@ -60,20 +62,19 @@ async def google_login(payload: GoogleLoginRequest, db: Session = Depends(get_db
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Google login is not configured"
         )
-    # Google ID Token 검증
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            GOOGLE_TOKEN_INFO_URL,
-            params={"id_token": payload.credential}
-        )
-
-    if response.status_code != 200:
+    # Google ID Token 검증 (캐시된 Google 서명 키로 로컬에서 검증)
+    try:
+        token_info = await verify_google_id_token(payload.credential)
+    except GoogleTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Google token"
         )
-
-    token_info = response.json()
+    except GoogleKeysetUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google login is temporarily unavailable"
+        )
 
     # Client ID 검증
     if token_info.get("aud") != GOOGLE_CLIENT_ID:
@@ -97,6 +98,7 @@ async def google_login(payload: GoogleLoginRequest, db: Session = Depends(get_db
             user.google_id = google_id
             db.commit()
             db.refresh(user)
+            invalidate_cached_user(user.id)
         else:
             # 신규 사용자 생성
             user = User(
@@ -114,5 +116,5 @@ async def google_login(payload: GoogleLoginRequest, db: Session = Depends(get_db
 
 
 @router.get("/me", response_model=UserOut)
-def me(current_user: User = Depends(get_current_user)):
+def me(current_user: CurrentUser = Depends(get_current_user)):
     return UserOut.model_validate(current_user)
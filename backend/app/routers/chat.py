@@ -1,16 +1,41 @@
+import asyncio
 import json
+from dataclasses import dataclass
 from datetime import datetime
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import delete, func
 from sqlalchemy.orm import Session
 
-from langchain_core.messages import HumanMessage, AIMessage
-from ..agents.supervisor import graph as supervisor_agent
+from langchain_core.messages import HumanMessage, AIMessage, RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from ..agents.supervisor import NO_STREAM_TAG
+from ..agents.checkpoint import (
+    delete_thread,
+    get_chat_graph,
+    has_checkpointer,
+    thread_config,
+)
+from ..core.admission import AdmissionRejected, Slot, message_admission
+from ..core.tracing import start_trace
 from ..db import get_db
-from ..deps import get_current_user
-from ..models import Conversation, Message, User
-from ..schemas import ConversationCreate, ConversationOut, MessageCreate, MessageOut
+from ..deps import CurrentUser, get_current_user
+from ..export import iter_export
+from ..faq import faq_matcher
+from ..message_writer import message_writer
+from ..models import Conversation, Message
+from ..queries import list_conversation_summaries
+from ..schemas import (
+    ConversationBulkDeleteOut,
+    ConversationCreate,
+    ConversationOut,
+    ConversationSummaryOut,
+    MessageCreate,
+    MessageOut,
+)
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
@@ -29,25 +54,116 @@ def _get_conversation(db: Session, user_id: int, conversation_id: int) -> Conver
     return conversation
 
 
-@router.get("", response_model=list[ConversationOut])
+async def _delete_conversations(db: Session, user_id: int, *conditions) -> list[int]:
+    """조건에 맞는 사용자의 대화를 한 번의 DELETE 로 지우고 지운 id 를 반환한다.
+
+    메시지는 FK 의 ON DELETE CASCADE 로 DB 에서 함께 지워진다.
+    """
+    deleted_ids = list(
+        db.scalars(
+            delete(Conversation)
+            .where(Conversation.user_id == user_id, *conditions)
+            .returning(Conversation.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+    db.commit()
+    await asyncio.gather(*(delete_thread(conversation_id) for conversation_id in deleted_ids))
+    return deleted_ids
+
+
+def to_lc_messages(messages: list[Message]) -> list:
+    lc_messages = []
+    for m in messages:
+        if m.role == "user":
+            lc_messages.append(HumanMessage(content=m.content))
+        elif m.role == "assistant":
+            lc_messages.append(AIMessage(content=m.content))
+        else:
+            # 필요 시 system/tool 등도 매핑
+            pass
+    return lc_messages
+
+
+async def _build_turn_messages(db: Session, conversation: Conversation, user_text: str) -> list:
+    """이번 턴에 그래프로 보낼 메시지 목록
+
+    체크포인트에 저장된 대화 상태가 DB 기록과 일치하면 새 HumanMessage 만 보낸다.
+    체크포인트가 없거나(기존 대화, 실패한 턴 등) 어긋나면 DB 기록으로 상태를 다시 채운다.
+    """
+    new_message = HumanMessage(content=user_text)
+    if not has_checkpointer():
+        return to_lc_messages(conversation.messages) + [new_message]
+
+    state = await get_chat_graph().aget_state(thread_config(conversation.id))
+    saved_turns = sum(
+        1
+        for m in state.values.get("messages", [])
+        if isinstance(m, HumanMessage) and m.name is None
+    )
+    persisted_turns = (
+        db.query(func.count(Message.id))
+        .filter(Message.conversation_id == conversation.id, Message.role == "user")
+        .scalar()
+    )
+    if saved_turns == persisted_turns:
+        return [new_message]
+
+    return (
+        [RemoveMessage(id=REMOVE_ALL_MESSAGES)]
+        + to_lc_messages(conversation.messages)
+        + [new_message]
+    )
+
+
+def _is_first_turn(db: Session, conversation_id: int) -> bool:
+    return (
+        db.query(Message.id)
+        .filter(Message.conversation_id == conversation_id, Message.role == "user")
+        .first()
+        is None
+    )
+
+
+def _answer_chunk(event: dict) -> str | None:
+    """astream_events 이벤트 중 사용자에게 스트리밍할 답변 조각을 꺼낸다."""
+    if event["event"] == "on_chat_model_stream":
+        # router의 structured output 제외 (generate, llm 노드의 출력만 포함)
+        # 병렬/cascade 작업자의 토큰은 제외하고, 최종 답변(final_answer)으로 대신 보낸다
+        if NO_STREAM_TAG in event.get("tags", []):
+            return None
+        return event.get("data").get("chunk").content
+    if event["event"] == "on_custom_event" and event["name"] == "final_answer":
+        return event["data"]["content"]
+    return None
+
+
+@router.get("", response_model=list[ConversationSummaryOut])
 def list_conversations(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == current_user.id)
-        .order_by(Conversation.updated_at.desc())
-        .all()
+    return list_conversation_summaries(db, current_user.id)
+
+
+@router.get("/export")
+def export_conversations(
+    gzip: bool = False,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    filename = "conversations.ndjson.gz" if gzip else "conversations.ndjson"
+    return StreamingResponse(
+        iter_export(current_user.id, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return conversations
 
 
 @router.post("", response_model=ConversationOut)
 def create_conversation(
     payload: ConversationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     title = payload.title.strip() if payload.title else "새 대화"
     conversation = Conversation(user_id=current_user.id, title=title)
@@ -58,98 +174,158 @@ def create_conversation(
 
 
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    conversation = _get_conversation(db, current_user.id, conversation_id)
-    db.delete(conversation)
-    db.commit()
+    deleted_ids = await _delete_conversations(db, current_user.id, Conversation.id == conversation_id)
+    if not deleted_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="채팅방을 찾을 수 없습니다."
+        )
     return None
 
 
+@router.delete("", response_model=ConversationBulkDeleteOut)
+async def delete_conversations(
+    ids: list[int] | None = Query(None),
+    older_than: datetime | None = None,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """ids 로 지정한 대화, 또는 older_than 이전에 마지막으로 갱신된 대화를 한꺼번에 삭제한다."""
+    if not ids and older_than is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="ids 또는 older_than 을 지정해야 합니다."
+        )
+
+    conditions = []
+    if ids:
+        conditions.append(Conversation.id.in_(ids))
+    if older_than is not None:
+        conditions.append(Conversation.updated_at < older_than)
+
+    deleted_ids = await _delete_conversations(db, current_user.id, *conditions)
+    return ConversationBulkDeleteOut(deleted=len(deleted_ids), ids=deleted_ids)
+
+
 @router.get("/{conversation_id}/messages", response_model=list[MessageOut])
 def list_messages(
     conversation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     conversation = _get_conversation(db, current_user.id, conversation_id)
     return conversation.messages
 
 
-@router.post("/{conversation_id}/messages")
-async def create_message(
-    conversation_id: int,
-    payload: MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    conversation = _get_conversation(db, current_user.id, conversation_id)
+@dataclass
+class PreparedTurn:
+    """입장 허가를 받고 그래프 입력까지 만든 채팅 턴 (SSE / WebSocket 공용)"""
+
+    slot: Slot
+    conversation_id: int
+    title: str
+    content: str
+    lc_messages: list
+    user_created_at: datetime
+    # 대화 첫 질문이 FAQ 와 같으면 미리 만든 답변 (그래프를 실행하지 않는다)
+    faq_answer: str | None = None
+
+
+async def prepare_turn(db: Session, user_id: int, conversation_id: int, content: str) -> PreparedTurn:
+    """AdmissionRejected / HTTPException(404) 을 그대로 올린다. 반환 전에 db 세션을 닫는다."""
+    # 대기하는 동안 DB 커넥션을 잡지 않도록 대화 조회보다 먼저 자리를 받는다
+    slot = await message_admission.acquire(user_id)
+
+    try:
+        conversation = _get_conversation(db, user_id, conversation_id)
+        faq = await faq_matcher.match(content) if _is_first_turn(db, conversation.id) else None
+        # 체크포인트에는 이 턴이 남지 않지만, 다음 턴에 _build_turn_messages 가 DB 기록으로 다시 채운다
+        lc_messages = [] if faq else await _build_turn_messages(db, conversation, content)
+    except Exception:
+        slot.release()
+        raise
 
-    user_message = Message(
-        conversation_id=conversation.id, role="user", content=payload.content
+    # 사용자 메시지와 답변은 턴이 끝난 뒤 message_writer 가 다른 요청의 턴과 모아서 저장한다
+    title = conversation.title
+    if not title or title == "새 대화":
+        title = content.strip()[:40]
+    turn = PreparedTurn(
+        slot, conversation.id, title, content, lc_messages, datetime.utcnow(), faq.answer if faq else None
     )
-    db.add(user_message)
+    # 스트리밍하는 동안 커넥션/트랜잭션을 잡고 있지 않도록 세션을 먼저 반환한다
+    db.close()
+    return turn
 
-    if not conversation.title or conversation.title == "새 대화":
-        conversation.title = payload.content.strip()[:40]
 
-    conversation.updated_at = datetime.utcnow()
-    db.flush()
+async def stream_turn(turn: PreparedTurn) -> AsyncIterator[dict]:
+    """그래프를 실행하며 token -> done (실패하면 error) 이벤트를 낸다. 끝나거나 취소되면 자리를 돌려준다."""
+    full_answer = ""
+    trace = start_trace("chat_turn", conversation_id=turn.conversation_id, faq=turn.faq_answer is not None)
+    error = None
+    try:
+        if turn.faq_answer is not None:
+            full_answer = turn.faq_answer
+            yield {"type": "token", "content": full_answer}
+        else:
+            async for event in get_chat_graph().astream_events(
+                {"messages": turn.lc_messages},
+                config={**thread_config(turn.conversation_id), "callbacks": trace.callbacks},
+                version="v2",
+            ):
+                chunk = _answer_chunk(event)
+                if chunk:
+                    full_answer += chunk
+                    yield {"type": "token", "content": chunk}
+
+        user_message_id, assistant_message_id = await message_writer.submit(
+            turn.conversation_id,
+            turn.title,
+            [
+                {"role": "user", "content": turn.content, "created_at": turn.user_created_at},
+                {"role": "assistant", "content": full_answer, "created_at": datetime.utcnow()},
+            ],
+        )
 
-    all_messages = conversation.messages
-    chat_history = []
+        # 완료 이벤트
+        yield {
+            "type": "done",
+            "user_message_id": user_message_id,
+            "assistant_message_id": assistant_message_id,
+            "conversation_title": turn.title,
+        }
 
-    for msg in all_messages:
-        if msg.id != user_message.id:
-            chat_history.append({"role": msg.role, "content": msg.content})
+    except Exception as e:
+        error = e
+        yield {"type": "error", "message": str(e)}
+    finally:
+        turn.slot.release()
+        trace.finish(error)
 
-    def to_lc_messages(chat_history, user_text: str):
-        messages = []
-        for m in chat_history:
-            if m["role"] == "user":
-                messages.append(HumanMessage(content=m["content"]))
-            elif m["role"] == "assistant":
-                messages.append(AIMessage(content=m["content"]))
-            else:
-                # 필요 시 system/tool 등도 매핑
-                pass
 
-        messages.append(HumanMessage(content=user_text))
-        return messages
+@router.post("/{conversation_id}/messages")
+async def create_message(
+    conversation_id: int,
+    payload: MessageCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    try:
+        turn = await prepare_turn(db, current_user.id, conversation_id, payload.content)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
     async def event_generator():
-        lc_messages = to_lc_messages(chat_history, payload.content)
-        full_answer = ""
-        try:
-            async for event in supervisor_agent.astream_events(
-                {"messages": lc_messages},
-                version="v2",
-            ):
-                if event["event"] == "on_chat_model_stream":
-                    # router의 structured output 제외 (generate, llm 노드의 출력만 포함)
-                    chunk = event.get("data").get("chunk").content
-                    if chunk:
-                        full_answer += chunk
-                        yield f"data: {json.dumps({'type': 'token', 'content': chunk})}\n\n"
-
-            assistant_message = Message(
-                conversation_id=conversation.id, role="assistant", content=full_answer
-            )
-            db.add(assistant_message)
-            conversation.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(conversation)
-            db.refresh(user_message)
-            db.refresh(assistant_message)
-
-            # 완료 이벤트
-            yield f"data: {json.dumps({'type': 'done', 'user_message_id': user_message.id, 'assistant_message_id': assistant_message.id, 'conversation_title': conversation.title})}\n\n"
-
-        except Exception as e:
-            db.rollback()
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+        async for event in stream_turn(turn):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    # 스트리밍을 시작하기 전에 연결이 끊겨도 자리를 돌려주도록 background 에서도 한 번 더 해제한다
+    return StreamingResponse(
+        event_generator(), media_type="text/event-stream", background=BackgroundTask(turn.slot.release)
+    )
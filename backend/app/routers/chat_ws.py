@@ -0,0 +1,253 @@
+"""WebSocket 채팅: 연결 하나에서 한 번 인증하고 여러 대화의 턴을 동시에 스트리밍한다
+
+SSE(POST /conversations/{id}/messages)는 턴마다 새 요청이라 연결 수립과 get_current_user 를 매번 한다.
+SSE 경로는 그대로 두고, 같은 턴 처리(prepare_turn / stream_turn)를 이 연결 위에서 다중화한다.
+
+프레임은 모두 JSON 텍스트다. 턴은 클라이언트가 정한 id 로 구분한다.
+
+클라이언트 -> 서버
+- {"type": "auth", "token": "..."}  첫 프레임. 토큰이 만료되기 전에 다시 보내서 갱신할 수 있다
+- {"type": "message", "id": "t1", "conversation_id": 3, "content": "..."}
+- {"type": "cancel", "id": "t1"}
+- {"type": "ping"}
+
+서버 -> 클라이언트
+- {"type": "ready", "user_id": 1}
+- {"type": "token" | "done" | "error", "id": "t1", ...}  SSE 이벤트와 같은 필드에 id 를 붙인다
+- {"type": "cancelled", "id": "t1"}
+- {"type": "pong"}
+
+보낼 프레임은 모두 연결마다 크기 제한(WS_SEND_QUEUE_SIZE)이 있는 대기열을 거쳐 write_loop 하나가 보낸다.
+인증 실패/만료로 끊을 때도 오류 프레임을 대기열에 넣고, 앞서 넣은 프레임까지 보낸 뒤 write_loop 가 닫는다.
+클라이언트가 느리게 읽으면
+대기열이 차고, 그 연결의 스트림들은 자리가 날 때까지 그래프 이벤트를 더 읽지 않는다(backpressure).
+동시에 도는 턴 수는 SSE 와 같은 입장 제어(message_admission)로 제한한다.
+"""
+import asyncio
+import threading
+import time
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from ..core.admission import AdmissionRejected
+from ..core.config import WS_AUTH_TIMEOUT_SECONDS, WS_SEND_QUEUE_SIZE
+from ..core.metrics import register_metrics
+from ..core.security import decode_access_token
+from ..db import SessionLocal
+from ..deps import CurrentUser, authenticate_token
+from ..schemas import MessageCreate
+from .chat import prepare_turn, stream_turn
+
+router = APIRouter(prefix="/conversations", tags=["conversations"])
+
+# 정책 위반(인증 실패/만료) 종료 코드
+POLICY_VIOLATION = 1008
+
+# receive_json 이 잘못된 프레임에서 내는 예외. 바이너리 프레임에는 "text" 가 없고(KeyError, 서버에 따라 None 이면
+# TypeError), JSON 이 아닌 텍스트는 JSONDecodeError(ValueError) 다
+INVALID_FRAME_ERRORS = (KeyError, TypeError, ValueError)
+
+
+class SocketStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.auth_failures = 0
+        self.auths = 0
+        self.auth_seconds = 0.0
+        self.turns = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.backpressure_waits = 0
+
+    def add(self, **counts) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "active_connections": self.active,
+            "auth_failures": self.auth_failures,
+            "turns": self.turns,
+            "turns_per_connection": self.turns / self.connections if self.connections else 0.0,
+            # 연결(과 토큰 갱신)마다 한 번 하는 인증 시간을 턴 수로 나눈 값. SSE 는 턴마다 인증한다
+            "auth_ms_per_turn": self.auth_seconds * 1000 / self.turns if self.turns else 0.0,
+            "auth_ms_avg": self.auth_seconds * 1000 / self.auths if self.auths else 0.0,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+socket_stats = SocketStats()
+register_metrics("chat_ws", socket_stats.stats)
+
+
+class ChatConnection:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.user: CurrentUser | None = None
+        self.expires_at = 0.0
+        # None 은 "여기까지 보내고 연결을 닫으라" 는 표시
+        self.outbox: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.streams: dict[str, asyncio.Task] = {}
+
+    async def authenticate(self, token) -> bool:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            user = await asyncio.to_thread(authenticate_token, str(token), db)
+            if self.user is not None and user.id != self.user.id:
+                raise HTTPException(status_code=401, detail="다른 사용자의 토큰입니다.")
+            self.user = user
+            self.expires_at = float(decode_access_token(str(token)).get("exp") or 0)
+        except HTTPException as e:
+            socket_stats.add(auth_failures=1)
+            await self.close({"type": "error", "status": e.status_code, "message": e.detail})
+            return False
+        finally:
+            db.close()
+        socket_stats.add(auths=1, auth_seconds=time.perf_counter() - started)
+        return True
+
+    async def send(self, frame: dict) -> None:
+        if self.outbox.full():
+            socket_stats.add(backpressure_waits=1)
+        await self.outbox.put(frame)
+
+    async def close(self, frame: dict) -> None:
+        """frame 을 마지막으로 보내고 연결을 닫도록 write_loop 에 알린다."""
+        await self.send(frame)
+        await self.outbox.put(None)
+
+    async def write_loop(self) -> None:
+        while True:
+            frame = await self.outbox.get()
+            if frame is None:
+                await self.websocket.close(POLICY_VIOLATION)
+                return
+            await self.websocket.send_json(frame)
+
+    async def run_turn(self, stream_id: str, conversation_id: int, content: str) -> None:
+        try:
+            await self._run_turn(stream_id, conversation_id, content)
+        finally:
+            self.streams.pop(stream_id, None)
+
+    async def _run_turn(self, stream_id: str, conversation_id: int, content: str) -> None:
+        db = SessionLocal()
+        try:
+            turn = await prepare_turn(db, self.user.id, conversation_id, content)
+        except AdmissionRejected as e:
+            socket_stats.add(rejected=1)
+            await self.send(
+                {
+                    "type": "error",
+                    "id": stream_id,
+                    "status": e.status_code,
+                    "message": e.detail,
+                    "retry_after": e.retry_after,
+                }
+            )
+            return
+        except HTTPException as e:
+            await self.send({"type": "error", "id": stream_id, "status": e.status_code, "message": e.detail})
+            return
+        except Exception as e:
+            await self.send({"type": "error", "id": stream_id, "message": str(e)})
+            return
+        finally:
+            db.close()
+
+        socket_stats.add(turns=1)
+        try:
+            async for event in stream_turn(turn):
+                await self.send({**event, "id": stream_id})
+        finally:
+            # 스트림을 시작하기 전에 취소돼도 자리를 돌려준다 (release 는 여러 번 불러도 된다)
+            turn.slot.release()
+
+    async def handle(self, frame: dict) -> bool:
+        """프레임 하나를 처리한다. 연결을 끊어야 하면 False."""
+        kind = frame.get("type") if isinstance(frame, dict) else None
+        if kind == "ping":
+            await self.send({"type": "pong"})
+            return True
+        if kind == "auth":
+            if not await self.authenticate(frame.get("token")):
+                return False
+            await self.send({"type": "ready", "user_id": self.user.id})
+            return True
+        if kind == "cancel":
+            task = self.streams.pop(str(frame.get("id")), None)
+            if task is not None:
+                task.cancel()
+                socket_stats.add(cancelled=1)
+                await self.send({"type": "cancelled", "id": frame.get("id")})
+            return True
+        if kind != "message":
+            await self.send({"type": "error", "message": f"unknown frame type: {kind}"})
+            return True
+
+        stream_id = str(frame.get("id"))
+        if self.expires_at and time.time() >= self.expires_at:
+            await self.close({"type": "error", "id": stream_id, "status": 401, "message": "Token expired"})
+            return False
+        if stream_id in self.streams:
+            await self.send({"type": "error", "id": stream_id, "message": "이미 진행 중인 id 입니다."})
+            return True
+        try:
+            payload = MessageCreate(content=frame.get("content"))
+            conversation_id = int(frame["conversation_id"])
+        except (ValidationError, KeyError, TypeError, ValueError):
+            await self.send({"type": "error", "id": stream_id, "status": 422, "message": "잘못된 메시지입니다."})
+            return True
+        self.streams[stream_id] = asyncio.create_task(self.run_turn(stream_id, conversation_id, payload.content))
+        return True
+
+    async def receive(self) -> dict:
+        """다음 JSON 프레임. 바이너리 프레임이나 JSON 이 아닌 텍스트에는 오류를 보내고 건너뛴다."""
+        while True:
+            try:
+                return await self.websocket.receive_json()
+            except INVALID_FRAME_ERRORS:
+                await self.send({"type": "error", "message": "JSON 프레임이 아닙니다."})
+
+    async def serve(self) -> None:
+        try:
+            first = await asyncio.wait_for(self.websocket.receive_json(), WS_AUTH_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, *INVALID_FRAME_ERRORS):
+            await self.websocket.close(POLICY_VIOLATION)
+            return
+        if not isinstance(first, dict) or first.get("type") != "auth":
+            await self.websocket.close(POLICY_VIOLATION)
+            return
+
+        writer = asyncio.create_task(self.write_loop())
+        try:
+            frame = first
+            while await self.handle(frame):
+                frame = await self.receive()
+            # 대기열의 프레임과 마지막 오류 프레임을 보내고 write_loop 가 연결을 닫을 때까지 기다린다
+            await writer
+        finally:
+            # 끊긴 연결의 턴은 SSE 에서 연결이 끊긴 경우처럼 취소하고 저장하지 않는다
+            for task in self.streams.values():
+                task.cancel()
+            writer.cancel()
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    await websocket.accept()
+    socket_stats.add(connections=1, active=1)
+    try:
+        await ChatConnection(websocket).serve()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        socket_stats.add(active=-1)
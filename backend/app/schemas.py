@@ -48,6 +48,17 @@ class ConversationOut(BaseModel):
     updated_at: datetime
 
 
+class ConversationSummaryOut(ConversationOut):
+    last_message_preview: str | None = None
+    message_count: int = 0
+    last_message_at: datetime | None = None
+
+
+class ConversationBulkDeleteOut(BaseModel):
+    deleted: int
+    ids: list[int]
+
+
 class MessageCreate(BaseModel):
     content: str = Field(min_length=1, max_length=4000)
 
@@ -0,0 +1,66 @@
+"""운영 서버 실행 (uvicorn 멀티 프로세스)
+
+채팅 스트림 처리(이벤트 직렬화, 그래프 실행, JSON 처리)가 한 프로세스의 GIL 에 묶이지 않도록
+WEB_CONCURRENCY 개의 uvicorn 워커 프로세스로 실행한다. 지정하지 않으면 사용할 수 있는 CPU 코어 수
+(MAX_CONCURRENT_RUNS 이하).
+
+- 테이블 생성(init_db)은 워커들이 동시에 하지 않도록 부모 프로세스에서 한 번 하고,
+  워커의 startup 에서는 건너뛴다 (INIT_DB_ON_STARTUP=false).
+- 입장 제어(core/admission.py): 사용자별 상한(MAX_RUNS_PER_USER)은 워커들이 sqlite 파일 하나로 함께 센다
+  (ADMISSION_BACKEND). 전역 상한과 대기열은 워커마다 세므로 MAX_CONCURRENT_RUNS / ADMISSION_QUEUE_SIZE 를
+  서버 전체 값으로 보고 워커 수로 나눠(내림) 넘긴다. 전역 상한이 워커 수보다 작거나, 워커가 여러 개인데
+  ADMISSION_BACKEND=memory 면 시작하지 않는다.
+- 워커가 2개 이상이면 검색 결과 캐시는 기본으로 sqlite 파일을 공유한다 (RETRIEVAL_CACHE_BACKEND).
+  로컬 벡터 인덱스(RETRIEVER_BACKEND=local)는 mmap 이라 워커들이 같은 페이지 캐시를 쓴다.
+
+    python -m app.serve
+"""
+import os
+
+# 서버 전체 값 -> 워커마다 나눠 적용하는 입장 제어 설정과 기본값 (core/config.py 와 같게)
+PER_WORKER_LIMITS = {"MAX_CONCURRENT_RUNS": 16, "ADMISSION_QUEUE_SIZE": 32}
+
+
+def default_workers() -> int:
+    # 컨테이너 CPU 제한(affinity)을 반영한다
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    # 설정 모듈을 읽기 전에 워커 수를 정해야 워커 수에 따른 기본값(캐시 백엔드)이 맞게 잡힌다
+    max_runs = int(os.getenv("MAX_CONCURRENT_RUNS", str(PER_WORKER_LIMITS["MAX_CONCURRENT_RUNS"])))
+    # 기본 워커 수는 워커마다 실행 자리가 하나 이상 남도록 전역 상한을 넘지 않게 한다
+    os.environ.setdefault("WEB_CONCURRENCY", str(min(default_workers(), max_runs)))
+    workers = int(os.environ["WEB_CONCURRENCY"])
+    if workers > 1 and os.getenv("ADMISSION_BACKEND") == "memory":
+        raise SystemExit("ADMISSION_BACKEND=memory 로는 워커 사이에서 MAX_RUNS_PER_USER 를 지킬 수 없습니다.")
+    if max_runs < workers:
+        # 워커마다 최소 1 로 올리면 서버 전체 상한이 설정보다 커진다
+        raise SystemExit(
+            f"MAX_CONCURRENT_RUNS={max_runs} 가 WEB_CONCURRENCY={workers} 보다 작습니다. 워커 수를 줄이세요."
+        )
+    # 나머지는 버린다 (워커 합이 설정값을 넘지 않도록)
+    for name, default in PER_WORKER_LIMITS.items():
+        total = int(os.getenv(name, str(default)))
+        os.environ[name] = str(total // workers)
+
+    import uvicorn
+
+    from .core.config import SERVER_HOST, SERVER_PORT, WEB_CONCURRENCY
+    from .db import init_db
+
+    init_db()
+    os.environ["INIT_DB_ON_STARTUP"] = "false"
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=WEB_CONCURRENCY,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""시작 시 워밍업
+
+배포 직후 첫 채팅 요청이 커넥션 생성 비용을 모두 떠안지 않도록 미리 연결해 둔다.
+
+- database / vector_database: 풀에 WARMUP_DB_CONNECTIONS 개 연결을 동시에 열어 둔다.
+- retrieval: 컬렉션 버전, 조문 인덱스, 로컬 인덱스를 읽어 둔다.
+- llm / embeddings: 실제 요청에 쓰는 HTTP 클라이언트 풀로 TLS 연결을 맺는다 (WARMUP_NETWORK).
+- graph: supervisor 그래프와 체크포인터 연결을 한 번 사용한다.
+
+필수 단계(DB, graph)가 성공해야 /ready 가 200 을 반환한다. 나머지 단계는 실패해도 기록만 한다.
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from .core.config import WARMUP_DB_CONNECTIONS, WARMUP_ENABLED, WARMUP_NETWORK
+from .core.metrics import register_metrics
+from .db import engine
+
+logger = logging.getLogger(__name__)
+
+warmup_status: dict = {"ready": False, "steps": {}, "started_at": None, "seconds": None}
+register_metrics("warmup", lambda: warmup_status)
+
+
+def _fill_pool(target_engine, connections: int) -> None:
+    # 연결을 동시에 잡고 있어야 풀에 서로 다른 연결이 connections 개 만들어진다
+    # sqlite 처럼 QueuePool 이 아닌 풀은 연결 하나만 확인한다
+    pool = target_engine.pool
+    count = min(connections, pool.size()) if isinstance(pool, QueuePool) else 1
+    opened = []
+    try:
+        for _ in range(count):
+            conn = target_engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def _warm_vector_database() -> None:
+    from .agents.collections import get_vector_engine
+
+    _fill_pool(get_vector_engine(), WARMUP_DB_CONNECTIONS)
+
+
+def _warm_retrieval() -> None:
+    from .agents.collections import get_collection_version
+    from .agents.income import index_name as income_index, retriever as income_retriever
+    from .agents.real_estate import index_name as real_estate_index, retriever as real_estate_retriever
+
+    get_collection_version(income_index)
+    get_collection_version(real_estate_index)
+    # 조문 인덱스(StatuteRetriever), 로컬 인덱스(LocalIndexRetriever) 처럼 처음 검색할 때 만드는 인덱스
+    for retriever in (income_retriever, real_estate_retriever):
+        while retriever is not None:
+            if hasattr(retriever, "_get_index"):
+                retriever._get_index()
+            retriever = getattr(retriever, "retriever", None)
+
+
+def _warm_llm_sync() -> None:
+    from .agents.supervisor import router_llm
+
+    # langchain_openai 는 같은 설정의 ChatOpenAI 끼리 httpx 클라이언트를 공유하므로 하나만 연결하면 된다
+    router_llm.root_client.with_options(max_retries=0).models.list()
+
+
+async def _warm_llm_async() -> None:
+    from .agents.supervisor import router_llm
+
+    await router_llm.root_async_client.with_options(max_retries=0).models.list()
+
+
+def _warm_embeddings() -> None:
+    from .agents.income import embedding
+
+    embedding.embed_query("워밍업")
+
+
+async def _warm_graph() -> None:
+    from .agents.checkpoint import get_chat_graph, thread_config
+
+    graph = get_chat_graph()
+    graph.get_graph()
+    # 체크포인터가 있으면 커넥션 풀도 한 번 사용한다 (존재하지 않는 thread 0 조회)
+    if graph.checkpointer:
+        await graph.aget_state(thread_config(0))
+
+
+async def _step(name: str, fn, required: bool) -> bool:
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(fn):
+            await fn()
+        else:
+            await asyncio.to_thread(fn)
+        ok, error = True, None
+    except Exception as e:
+        logger.warning("warm-up step %s failed: %s", name, e)
+        ok, error = False, str(e)
+    warmup_status["steps"][name] = {
+        "ok": ok,
+        "required": required,
+        "ms": (time.perf_counter() - started) * 1000,
+        **({"error": error} if error else {}),
+    }
+    return ok or not required
+
+
+async def run_warmup() -> None:
+    warmup_status["started_at"] = time.time()
+    started = time.perf_counter()
+    if not WARMUP_ENABLED:
+        warmup_status["ready"] = True
+        warmup_status["seconds"] = 0.0
+        return
+
+    steps = [
+        ("database", lambda: _fill_pool(engine, WARMUP_DB_CONNECTIONS), True),
+        ("vector_database", _warm_vector_database, False),
+        ("retrieval", _warm_retrieval, False),
+        ("graph", _warm_graph, True),
+    ]
+    if WARMUP_NETWORK:
+        steps += [
+            ("llm", _warm_llm_sync, False),
+            ("llm_async", _warm_llm_async, False),
+            ("embeddings", _warm_embeddings, False),
+        ]
+
+    # 서로 독립적인 단계라서 동시에 실행한다
+    results = await asyncio.gather(*(_step(name, fn, required) for name, fn, required in steps))
+    warmup_status["seconds"] = time.perf_counter() - started
+    warmup_status["ready"] = all(results)
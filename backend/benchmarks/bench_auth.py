@@ -0,0 +1,50 @@
+"""요청당 인증 오버헤드 벤치마크 (get_current_user)
+
+- no_cache: JWT 디코딩 + 매 요청 db.get(User)
+- cached: JWT 디코딩 + user_cache 히트
+
+DATABASE_URL 을 실제 Postgres 로 지정하면 네트워크 왕복이 포함된 수치를 얻을 수 있다.
+
+    python -m benchmarks.bench_auth
+"""
+from .common import measure, print_table
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.security import create_access_token
+from app.db import SessionLocal, engine
+from app.deps import get_current_user, user_cache
+from app.models import User
+
+
+def main():
+    User.__table__.create(bind=engine, checkfirst=True)
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", display_name="bench")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=create_access_token(str(user_id))
+    )
+
+    def request(clear_cache: bool):
+        if clear_cache:
+            user_cache.clear()
+        db = SessionLocal()
+        try:
+            get_current_user(credentials, db)
+        finally:
+            db.close()
+
+    rows = {
+        "no_cache": measure(lambda: request(clear_cache=True), 2000),
+        "cached": measure(lambda: request(clear_cache=False), 2000),
+    }
+    print_table("auth overhead per request", rows)
+    print(f"- cache: {user_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""조문 구조 청크 + 부모-자식 검색 벤치마크: 적중률 / 컨텍스트 토큰 / 답변 지연
+
+legacy 소득세 그래프의 두 컬렉션 구성을 같은 법령 본문으로 만들어 비교한다.
+
+- recursive: 지금의 income_tax_recursive_splitter 처럼 글자 수(--chunk-size, --overlap)로 자른 청크, k=3
+- structure: chunk_statute 자식 청크를 k=STATUTE_CHILD_K 개 검색해서 부모 조문 STATUTE_MAX_PARENTS 개로 합친 결과
+
+본문은 --text 법령 파일, 없으면 합성 조문(bench_dedup.make_article)이다.
+질의는 임의의 항 문장에서 단어 일부를 빼고 순서를 섞어 만들고, 그 항 문장이 컨텍스트에 온전히 들어 있으면 적중으로 센다.
+임베딩은 외부 API 없이 문자 3-gram 해싱 벡터를 쓴다.
+
+기본은 입력 토큰 1k 당 --prefill-ms 로 지연을 추정한다 (generate + 환각 검사 두 번).
+--live 를 주면 실제 LLM 으로 generate 를 호출해서 잰다.
+
+    python -m benchmarks.bench_chunking --articles 200 --queries 300
+    python -m benchmarks.bench_chunking --text income_tax.txt
+"""
+from .common import print_table
+
+import argparse
+import random
+import statistics
+import time
+import zlib
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.agents.dedup import count_tokens
+from app.agents.statute_chunker import build_parents, chunk_statute
+from app.agents.statute_index import PARAGRAPH_HEADER
+from app.core.config import STATUTE_CHILD_K, STATUTE_MAX_PARENTS
+
+from .bench_dedup import chunk, make_article
+
+DIMS = 4096
+
+
+def embed(texts: list[str]) -> np.ndarray:
+    vectors = np.zeros((len(texts), DIMS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        text = "".join(text.split())
+        for i in range(len(text) - 2):
+            vectors[row, zlib.crc32(text[i : i + 3].encode()) % DIMS] += 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def recursive_chunks(text: str, size: int, overlap: int) -> tuple[list[str], str]:
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        return chunk(text, size, overlap), "character window"
+    splitter = RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=overlap)
+    return splitter.split_text(text), "RecursiveCharacterTextSplitter"
+
+
+def make_queries(text: str, count: int, rng: random.Random) -> list[tuple[str, str]]:
+    """(질의, 정답 항 문장)"""
+    sentences = [
+        s.strip()
+        for part in PARAGRAPH_HEADER.split(text)
+        for s in part.split("\n")
+        if len(s.strip()) > 40 and not PARAGRAPH_HEADER.fullmatch(s.strip())
+    ]
+    queries = []
+    for sentence in rng.sample(sentences, min(count, len(sentences))):
+        words = sentence.split()
+        kept = [w for w in words if rng.random() > 0.3] or words
+        rng.shuffle(kept)
+        queries.append((" ".join(kept), sentence))
+    return queries
+
+
+class Index:
+    def __init__(self, docs: list[Document]):
+        self.docs = docs
+        self.vectors = embed([doc.page_content for doc in docs])
+
+    def search(self, query: str, k: int) -> list[Document]:
+        scores = self.vectors @ embed([query])[0]
+        return [self.docs[i] for i in np.argsort(-scores)[:k]]
+
+
+def structure_search(index: Index, parents: dict[str, Document], query: str) -> list[Document]:
+    # ParentChildRetriever 와 같은 방식: 자식 검색 -> 처음 맞은 순서대로 부모, 같은 부모는 한 번만
+    results, seen = [], set()
+    for child in index.search(query, STATUTE_CHILD_K):
+        parent_id = child.metadata["parent_id"]
+        if parent_id not in seen:
+            seen.add(parent_id)
+            results.append(parents[parent_id])
+        if len(results) >= STATUTE_MAX_PARENTS:
+            break
+    return results
+
+
+def live_latency(contexts: dict[str, list[tuple[str, list[Document]]]]) -> dict:
+    from app.agents.legacy.income_tax_graph import generate_prompt, llm
+
+    rows = {}
+    for name, pairs in contexts.items():
+        generate_ms = []
+        for query, docs in pairs:
+            started = time.perf_counter()
+            (generate_prompt | llm).invoke({"question": query, "context": docs, "chat_history": []})
+            generate_ms.append((time.perf_counter() - started) * 1000)
+        rows[name] = {"generate_ms": statistics.fmean(generate_ms)}
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--text", help="법령 본문 텍스트 파일 (없으면 합성 조문)")
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=1500)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3, help="recursive 컬렉션 검색 개수")
+    parser.add_argument("--prefill-ms", type=float, default=30.0, help="입력 토큰 1k 당 지연(ms) 추정치")
+    parser.add_argument("--live", type=int, default=0, help="실제 LLM 으로 잴 질의 수")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    if args.text:
+        with open(args.text, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = "\n".join(make_article(n, rng) for n in range(1, args.articles + 1))
+    queries = make_queries(text, args.queries, rng)
+
+    pieces, splitter = recursive_chunks(text, args.chunk_size, args.overlap)
+    recursive_index = Index([Document(page_content=piece) for piece in pieces])
+    children = chunk_statute(text, "bench")
+    parents = build_parents(children)
+    structure_index = Index(children)
+
+    methods = {
+        "recursive": (recursive_index, lambda q: recursive_index.search(q, args.k)),
+        "structure": (structure_index, lambda q: structure_search(structure_index, parents, q)),
+    }
+    rows = {}
+    contexts = {}
+    for name, (index, search) in methods.items():
+        hits, tokens, search_ms = 0, [], []
+        contexts[name] = []
+        for query, answer in queries:
+            started = time.perf_counter()
+            docs = search(query)
+            search_ms.append((time.perf_counter() - started) * 1000)
+            hits += any(answer in doc.page_content for doc in docs)
+            tokens.append(sum(count_tokens(doc.page_content) for doc in docs))
+            if len(contexts[name]) < args.live:
+                contexts[name].append((query, docs))
+
+        context_tokens = statistics.fmean(tokens)
+        rows[name] = {
+            "chunks": len(index.docs),
+            "hit_rate": hits / len(queries),
+            "context_tokens": context_tokens,
+            "search_ms": statistics.fmean(search_ms),
+            # generate 와 환각 검사 두 번 모두 같은 documents 를 입력으로 받는다
+            "est_prefill_ms": 2 * context_tokens / 1000 * args.prefill_ms,
+        }
+
+    print_table(
+        f"legacy income tax retrieval (queries={len(queries)}, recursive={splitter} "
+        f"{args.chunk_size}/{args.overlap} k={args.k}, structure k={STATUTE_CHILD_K} -> {STATUTE_MAX_PARENTS} parents)",
+        rows,
+    )
+    print(f"- structure: {len(children)} children -> {len(parents)} parents")
+    if args.live:
+        print_table(f"live generate latency (queries={args.live})", live_latency(contexts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""사이드바 대화 목록 벤치마크 (대화 수백 개인 사용자)
+
+- n_plus_one: 대화 목록 + 대화마다 list_messages 로 메시지를 읽어서 미리보기/개수 계산
+- aggregate: list_conversation_summaries (한 쿼리)
+
+기본값은 임시 sqlite 파일이고 DATABASE_URL 을 Postgres 로 지정할 수 있다.
+
+    python -m benchmarks.bench_conversation_list --conversations 300 --messages 20
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_conversation_list.sqlite')}"
+)
+
+from .common import measure, print_table
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.db import Base, SessionLocal, engine
+from app.models import Conversation, Message, User
+from app.queries import PREVIEW_LENGTH, list_conversation_summaries
+
+
+def seed(conversations: int, messages: int) -> int:
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Conversation.__table__, Message.__table__])
+    started = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        user = User(email=f"list-{time.time()}@example.com", display_name="bench")
+        db.add(user)
+        db.flush()
+        items = [Conversation(user_id=user.id, title=f"대화 {c}") for c in range(conversations)]
+        db.add_all(items)
+        db.flush()
+        db.execute(
+            insert(Message),
+            [
+                {
+                    "conversation_id": conversation.id,
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "content": f"양도소득세 질문과 답변 {i} " * 30,
+                    "created_at": started + timedelta(seconds=i),
+                }
+                for conversation in items
+                for i in range(messages)
+            ],
+        )
+        db.commit()
+        return user.id
+
+
+def n_plus_one(user_id: int) -> list[dict]:
+    with SessionLocal() as db:
+        conversations = (
+            db.query(Conversation)
+            .filter(Conversation.user_id == user_id)
+            .order_by(Conversation.updated_at.desc())
+            .all()
+        )
+        result = []
+        for conversation in conversations:
+            messages = (
+                db.query(Message)
+                .filter(Message.conversation_id == conversation.id)
+                .order_by(Message.created_at)
+                .all()
+            )
+            result.append(
+                {
+                    "id": conversation.id,
+                    "last_message_preview": messages[-1].content[:PREVIEW_LENGTH] if messages else None,
+                    "message_count": len(messages),
+                }
+            )
+        return result
+
+
+def aggregate(user_id: int) -> list[dict]:
+    with SessionLocal() as db:
+        return list_conversation_summaries(db, user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = seed(args.conversations, args.messages)
+    expected = {row["id"]: row["message_count"] for row in n_plus_one(user_id)}
+    assert {row["id"]: row["message_count"] for row in aggregate(user_id)} == expected
+
+    rows = {
+        "n_plus_one": measure(lambda: n_plus_one(user_id), args.iterations),
+        "aggregate": measure(lambda: aggregate(user_id), args.iterations),
+    }
+    print_table(
+        f"conversation list ({args.conversations} conversations x {args.messages} messages, {engine.url.get_backend_name()})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
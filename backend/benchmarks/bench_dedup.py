@@ -0,0 +1,143 @@
+"""검색 문서 근접 중복 제거 벤치마크: 제거된 토큰 / generate·환각 검사 지연 변화
+
+legacy 그래프의 retrieve(MultiQuery 합집합)와 web_search 가 만드는 문서 목록을 흉내 낸다.
+
+- multi_query: 조문을 chunk_overlap 이 있는 청크로 나누고, 질의 3개가 각각 이웃한 청크 k=3 개를 찾는다.
+  여기에 조문 번호 직접 조회 결과(조문 전체)가 섞인다.
+- web_search: 같은 설명을 띄어쓰기/문장부호만 바꿔 옮긴 페이지가 섞인 검색 결과 3~5개.
+
+기본은 입력 토큰 1k 당 --prefill-ms 로 지연 변화를 추정한다.
+--live 를 주면 실제 LLM 으로 generate / 환각 검사 프롬프트를 중복 제거 전후로 호출해서 잰다.
+
+    python -m benchmarks.bench_dedup --requests 200
+"""
+from .common import print_table
+
+import argparse
+import random
+import statistics
+import time
+
+from langchain_core.documents import Document
+
+from app.agents.dedup import count_tokens, dedup_stats, dedupe_documents
+
+PHRASES = [
+    "거주자의 종합소득에 대한 소득세는 해당 과세기간의 종합소득과세표준에 다음의 세율을 적용하여 계산한다",
+    "근로소득이 있는 거주자에 대해서는 해당 과세기간에 받는 총급여액에서 다음의 금액을 공제한다",
+    "필요경비에 산입할 금액은 해당 과세기간의 총수입금액에 대응하는 비용으로서 일반적으로 용인되는 통상적인 것의 합계액으로 한다",
+    "양도소득과세표준은 양도소득금액에서 양도소득 기본공제를 한 금액으로 한다",
+    "납세지 관할 세무서장은 과세표준확정신고를 하여야 할 자가 신고를 하지 아니한 경우에는 과세표준과 세액을 결정한다",
+    "대통령령으로 정하는 바에 따라 계산한 금액을 해당 과세기간의 소득금액에서 공제한다",
+    "주택임대소득에 대한 총수입금액의 합계액이 2천만원 이하인 자는 분리과세를 선택할 수 있다",
+]
+
+
+def make_article(number: int, rng: random.Random) -> str:
+    paragraphs = []
+    for i, mark in enumerate("①②③④⑤"[: rng.randint(3, 5)]):
+        amount = rng.choice(["1천400만원", "5천만원", "8천800만원", "1억5천만원"])
+        rate = rng.choice(["6퍼센트", "15퍼센트", "24퍼센트", "35퍼센트"])
+        paragraphs.append(f"{mark} {rng.choice(PHRASES)}. 다만, {amount} 이하인 경우에는 {rate}를 적용한다.")
+    return f"제{number}조(세율 등) " + " ".join(paragraphs)
+
+
+def chunk(text: str, size: int = 160, overlap: int = 40) -> list[str]:
+    return [text[i : i + size] for i in range(0, max(len(text) - overlap, 1), size - overlap)]
+
+
+def multi_query_docs(rng: random.Random) -> list[Document]:
+    articles = [make_article(n, rng) for n in range(50, 56)]
+    chunks = [(n, c) for n, article in enumerate(articles) for c in chunk(article)]
+    target = rng.randrange(len(chunks) - 4)
+    docs = []
+    seen = set()
+    for _ in range(3):
+        # 질의마다 target 주변의 조금씩 다른 청크를 찾는다 (완전히 같은 청크는 MultiQuery 가 이미 합친다)
+        for index in sorted(rng.sample(range(target, target + 4), 3)):
+            if index not in seen:
+                seen.add(index)
+                docs.append(Document(page_content=chunks[index][1]))
+    # 조문 번호 직접 조회 결과 (조문 전체)
+    docs.append(Document(page_content=articles[chunks[target][0]]))
+    return docs
+
+
+def web_docs(rng: random.Random) -> list[Document]:
+    base = " ".join(rng.sample(PHRASES, 3)) + "."
+    variants = [
+        base,
+        base.replace(" ", "  ").replace(".", " ."),
+        "[세무 블로그] " + base + " 자세한 내용은 국세청에 문의하세요",
+    ]
+    others = [" ".join(rng.sample(PHRASES, 2)) for _ in range(rng.randint(0, 2))]
+    docs = [Document(page_content=text) for text in rng.sample(variants, rng.randint(2, 3)) + others]
+    rng.shuffle(docs)
+    return docs
+
+
+def live_latency(pairs: list[tuple[list[Document], list[Document]]]) -> dict:
+    from app.agents.legacy.income_tax_graph import generate_prompt, hallucination_prompt, llm, small_llm
+
+    rows = {}
+    for name, index in (("before", 0), ("after", 1)):
+        generate_ms, grade_ms = [], []
+        for pair in pairs:
+            docs = pair[index]
+            started = time.perf_counter()
+            answer = (generate_prompt | llm).invoke(
+                {"question": "연봉 5천만원의 소득세율은?", "context": docs, "chat_history": []}
+            )
+            generate_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            (hallucination_prompt | small_llm).invoke(
+                {"student_answer": answer.content, "documents": [d.page_content for d in docs]}
+            )
+            grade_ms.append((time.perf_counter() - started) * 1000)
+        rows[name] = {"generate_ms": statistics.fmean(generate_ms), "grade_ms": statistics.fmean(grade_ms)}
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--prefill-ms", type=float, default=30.0, help="입력 토큰 1k 당 지연(ms) 추정치")
+    parser.add_argument("--live", type=int, default=0, help="실제 LLM 으로 잴 요청 수")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = {}
+    pairs = []
+    for name, make in (("multi_query", multi_query_docs), ("web_search", web_docs)):
+        before_tokens, after_tokens, before_docs, after_docs, dedup_ms = [], [], [], [], []
+        for _ in range(args.requests):
+            docs = make(rng)
+            started = time.perf_counter()
+            kept = dedupe_documents(docs)
+            dedup_ms.append((time.perf_counter() - started) * 1000)
+            before_tokens.append(sum(count_tokens(d.page_content) for d in docs))
+            after_tokens.append(sum(count_tokens(d.page_content) for d in kept))
+            before_docs.append(len(docs))
+            after_docs.append(len(kept))
+            if len(pairs) < args.live:
+                pairs.append((docs, kept))
+
+        removed = statistics.fmean(before_tokens) - statistics.fmean(after_tokens)
+        rows[name] = {
+            "docs_before": statistics.fmean(before_docs),
+            "docs_after": statistics.fmean(after_docs),
+            "tokens_before": statistics.fmean(before_tokens),
+            "tokens_removed": removed,
+            "dedup_ms": statistics.fmean(dedup_ms),
+            # generate 와 환각 검사 두 번 모두 같은 documents 를 입력으로 받는다
+            "est_saved_ms": 2 * removed / 1000 * args.prefill_ms - statistics.fmean(dedup_ms),
+        }
+
+    print_table(f"near-duplicate removal per request (requests={args.requests})", rows)
+    print(f"- context_dedup: {dedup_stats.stats()}")
+    if pairs:
+        print_table(f"live generate / hallucination check latency (requests={len(pairs)})", live_latency(pairs))
+
+
+if __name__ == "__main__":
+    main()
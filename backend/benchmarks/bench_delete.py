@@ -0,0 +1,109 @@
+"""대화 삭제 벤치마크 (메시지 10k 개짜리 대화)
+
+- orm_cascade: 이전 방식. conversation.messages 를 전부 세션에 올린 뒤 한 행씩 DELETE
+- db_cascade: DELETE FROM conversations 한 번 + FK ON DELETE CASCADE
+- bulk_older_than: DELETE /conversations?older_than=... 처럼 여러 대화를 한 번에 삭제
+
+기본값은 임시 sqlite 파일이고 DATABASE_URL 을 Postgres 로 지정할 수 있다.
+
+    python -m benchmarks.bench_delete --messages 10000
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_delete.sqlite')}"
+)
+
+from .common import print_table
+
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+
+from app.db import Base, SessionLocal, engine
+from app.models import Conversation, Message, User
+
+
+def seed(user_id: int, conversations: int, messages: int, updated_at: datetime) -> list[int]:
+    with SessionLocal() as db:
+        items = [Conversation(user_id=user_id, title="대화", updated_at=updated_at) for _ in range(conversations)]
+        db.add_all(items)
+        db.flush()
+        for conversation in items:
+            db.execute(
+                insert(Message),
+                [
+                    {"conversation_id": conversation.id, "role": "user", "content": f"질문 {i} " * 20}
+                    for i in range(messages)
+                ],
+            )
+        db.commit()
+        return [c.id for c in items]
+
+
+def orm_cascade(conversation_ids: list[int]) -> None:
+    with SessionLocal() as db:
+        for conversation_id in conversation_ids:
+            conversation = db.get(Conversation, conversation_id)
+            for message in conversation.messages:
+                db.delete(message)
+            db.delete(conversation)
+        db.commit()
+
+
+def db_cascade(user_id: int, *conditions) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            delete(Conversation)
+            .where(Conversation.user_id == user_id, *conditions)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--bulk-conversations", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Conversation.__table__, Message.__table__])
+    with SessionLocal() as db:
+        user = User(email=f"delete-{time.time()}@example.com", display_name="bench")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    old = datetime(2020, 1, 1)
+    rows = {}
+
+    ids = seed(user_id, 1, args.messages, datetime.utcnow())
+    rows["orm_cascade"] = {"messages": args.messages, "ms": timed(orm_cascade, ids)}
+
+    ids = seed(user_id, 1, args.messages, datetime.utcnow())
+    rows["db_cascade"] = {"messages": args.messages, "ms": timed(db_cascade, user_id, Conversation.id == ids[0])}
+
+    seed(user_id, args.bulk_conversations, args.messages // args.bulk_conversations, old)
+    rows["bulk_older_than"] = {
+        "messages": args.messages,
+        "conversations": args.bulk_conversations,
+        "ms": timed(db_cascade, user_id, Conversation.updated_at < datetime(2021, 1, 1)),
+    }
+
+    with SessionLocal() as db:
+        left = db.scalar(select(func.count(Message.id)))
+    print_table(f"delete conversations ({engine.url.get_backend_name()})", rows)
+    print(f"- messages left after cascades: {left}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""질의 임베딩 마이크로 배치 벤치마크: API 호출 수 / 질의 지연 / 처리량
+
+--clients 개의 스레드가 서로 다른 질문을 계속 임베딩한다.
+임베딩 API 는 호출당 --call-ms + 문장당 --text-ms 지연을 흉내 내는 가짜 모델이다.
+
+- direct: 질의마다 embed_query 호출 (기존)
+- window=N: BatchingEmbeddings 가 N ms 동안 모은 질의를 embed_documents 한 번으로 보냄
+
+    python -m benchmarks.bench_embedding_batch --clients 32 --queries 20 --windows 2,5,10
+"""
+from .common import print_table
+
+import argparse
+import statistics
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from app.agents.embedding_batch import BatchingEmbeddings
+from app.core.config import EMBEDDING_BATCH_MAX_INFLIGHT, EMBEDDING_BATCH_MAX_SIZE
+
+
+class SlowEmbeddings(Embeddings):
+    def __init__(self, call_seconds: float, text_seconds: float):
+        self.call_seconds = call_seconds
+        self.text_seconds = text_seconds
+        self.model = "bench-embedding"
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.call_seconds + self.text_seconds * len(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run(embeddings: Embeddings, clients: int, queries: int) -> tuple[list[float], float]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def client(n: int):
+        samples = []
+        for i in range(queries):
+            started = time.perf_counter()
+            vector = embeddings.embed_query(f"연봉 {n}천만원 직장인의 {i}번째 소득세 질문")
+            samples.append((time.perf_counter() - started) * 1000)
+            assert vector[0] > 0
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=20, help="클라이언트당 질의 수")
+    parser.add_argument("--call-ms", type=float, default=120)
+    parser.add_argument("--text-ms", type=float, default=2)
+    parser.add_argument("--windows", default="2,5,10", help="비교할 배치 창(ms) 목록")
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_BATCH_MAX_SIZE)
+    args = parser.parse_args()
+
+    base = SlowEmbeddings(args.call_ms / 1000, args.text_ms / 1000)
+    candidates: dict[str, Embeddings] = {"direct": base}
+    for window in args.windows.split(","):
+        candidates[f"window={window}ms"] = BatchingEmbeddings(
+            base, float(window), args.max_batch, EMBEDDING_BATCH_MAX_INFLIGHT
+        )
+
+    rows = {}
+    total = args.clients * args.queries
+    for name, embeddings in candidates.items():
+        base.calls = 0
+        latencies, elapsed = run(embeddings, args.clients, args.queries)
+        latencies.sort()
+        rows[name] = {
+            "api_calls": base.calls,
+            "calls_per_query": base.calls / total,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "queries_per_s": total / elapsed,
+        }
+        if isinstance(embeddings, BatchingEmbeddings):
+            histogram = embeddings.stats.stats()["batch_size_histogram"]
+            print(f"- {name} batch sizes: {histogram}")
+
+    print_table(
+        f"query embeddings (clients={args.clients}, queries={total}, call {args.call_ms}ms + "
+        f"{args.text_ms}ms/text, max_batch={args.max_batch}, inflight={EMBEDDING_BATCH_MAX_INFLIGHT})",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""대화 기록 내보내기 벤치마크: 최대 RSS / 처리량
+
+- materialize: list_messages 처럼 대화마다 ORM 관계(conversation.messages)를 메모리에 올린 뒤 직렬화
+- stream: GET /conversations/export 의 iter_export (yield_per 서버 측 커서)
+- stream_gzip: iter_export(compress=True)
+
+최대 RSS 는 프로세스 단위라서 모드마다 별도 프로세스로 실행한다.
+기본값은 임시 sqlite 파일이고 DATABASE_URL 을 Postgres 로 지정할 수 있다.
+
+    python -m benchmarks.bench_export --conversations 200 --messages 250
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_export.sqlite')}"
+)
+
+from .common import print_table
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.db import Base, SessionLocal, engine
+from app.export import iter_export
+from app.models import Conversation, Message, User
+
+MODES = ("materialize", "stream", "stream_gzip")
+
+
+def seed(conversations: int, messages: int) -> int:
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Conversation.__table__, Message.__table__])
+    answer = "종합부동산세 과세표준은 공시가격 합계에서 공제금액을 뺀 금액에 공정시장가액비율을 곱해 계산합니다. " * 8
+    started = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        user = User(email=f"export-{time.time()}@example.com", display_name="bench")
+        db.add(user)
+        db.flush()
+        for c in range(conversations):
+            conversation = Conversation(user_id=user.id, title=f"대화 {c}")
+            db.add(conversation)
+            db.flush()
+            db.execute(
+                insert(Message),
+                [
+                    {
+                        "conversation_id": conversation.id,
+                        "role": "user" if i % 2 == 0 else "assistant",
+                        "content": f"질문 {i}" if i % 2 == 0 else answer,
+                        "created_at": started + timedelta(seconds=i),
+                    }
+                    for i in range(messages)
+                ],
+            )
+        db.commit()
+        return user.id
+
+
+def materialize(user_id: int):
+    with SessionLocal() as db:
+        conversations = db.query(Conversation).filter(Conversation.user_id == user_id).all()
+        lines = []
+        for conversation in conversations:
+            lines.append(json.dumps({"type": "conversation", "id": conversation.id, "title": conversation.title}))
+            for m in conversation.messages:
+                lines.append(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "id": m.id,
+                            "role": m.role,
+                            "content": m.content,
+                            "created_at": m.created_at.isoformat(),
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def run_mode(mode: str, user_id: int) -> dict:
+    chunks = materialize(user_id) if mode == "materialize" else iter_export(user_id, compress=mode == "stream_gzip")
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in chunks)
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "seconds": seconds,
+        "output_mb": size / 1024 / 1024,
+        "output_mb_per_s": size / 1024 / 1024 / seconds,
+        "peak_rss_mb": peak / 1024,
+        "rss_growth_mb": (peak - baseline) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=250)
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.user_id)))
+        return
+
+    user_id = seed(args.conversations, args.messages)
+    rows = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_export", "--mode", mode, "--user-id", str(user_id)],
+            env={**os.environ},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        rows[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print_table(f"export ({args.conversations} conversations x {args.messages} messages)", rows)
+
+
+if __name__ == "__main__":
+    main()
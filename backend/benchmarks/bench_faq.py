@@ -0,0 +1,184 @@
+"""FAQ 미리 만든 답변 벤치마크: 질문 묶기 / 첫 질문 적중률 / 조회 지연
+
+합성 질문 기록(의도별 표현 변형, 빈도는 Zipf 분포)을 leader_cluster 로 묶고, 상위 --top-n 의도에 답변을 넣은 뒤
+따로 만든 첫 질문 --queries 개를 FaqMatcher 로 찾는다. 임베딩은 외부 API 없이 문자 3-gram 해싱 벡터를 쓴다.
+FAQ 테이블은 임시 sqlite 파일이다 (운영에서는 postgres + pgvector).
+
+- 묶기: 의도 수, purity (묶음 안에서 가장 많은 실제 의도의 비율), 숫자가 다른 질문이 섞인 묶음 수
+- 적중률 / 잘못 적중한 비율 (다른 의도의 답변)
+- 첫 턴 평균 지연: 적중하면 조회 시간만, 아니면 조회 + --graph-ms (그래프 실행 추정치)
+
+    python -m benchmarks.bench_faq --history 5000 --queries 1000 --top-n 30
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_faq.sqlite")
+
+from .common import print_table  # noqa: E402
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from app import faq
+from app.agents.grounding import extract_numbers
+from app.agents.retrieval_cache import query_hash
+from app.db import Base, SessionLocal, engine
+from app.faq import FaqMatcher, faq_stats, leader_cluster
+from app.models import FaqIntent
+
+from .bench_chunking import embed
+
+INTENTS = [
+    "종합소득세 신고 기간이 언제인가요",
+    "연말정산 환급금은 언제 들어오나요",
+    "프리랜서 종합소득세 계산 방법",
+    "1세대 1주택 비과세 요건",
+    "종합부동산세 과세 기준일은 언제인가요",
+    "양도소득세 장기보유특별공제율",
+    "부양가족 인적공제 조건",
+    "월세 세액공제 받는 방법",
+    "의료비 세액공제 한도",
+    "신용카드 소득공제율",
+    "주택임대소득 분리과세",
+    "공동명의 종부세 계산",
+    "퇴직소득세 계산 방법",
+    "근로장려금 신청 자격",
+    "배당소득 종합과세 기준",
+    "사업소득 필요경비 인정 범위",
+    "종부세 1세대 1주자 세액공제",
+    "기부금 세액공제율",
+    "교육비 세액공제 대상",
+    "연금저축 세액공제 한도",
+]
+NUMBERED = [
+    "연봉 {n}천만원 직장인 소득세는 얼마인가요",
+    "공시가격 {n}억 아파트 종부세는 얼마인가요",
+]
+PREFIXES = ["", "혹시 ", "안녕하세요 ", "질문이요 ", "궁금한데 "]
+SUFFIXES = ["", "?", "??", " 알려주세요", " 궁금합니다", " 알려줘"]
+
+
+def phrase(base: str, rng: random.Random) -> str:
+    text = rng.choice(PREFIXES) + base + rng.choice(SUFFIXES)
+    if rng.random() < 0.3:
+        text = text.replace(" ", "", 1)
+    return text
+
+
+def make_questions(count: int, rng: random.Random) -> list[tuple[str, str]]:
+    """(의도, 질문) 목록. 의도 빈도는 Zipf, 숫자 의도는 숫자마다 다른 의도로 센다."""
+    bases = INTENTS + [template.format(n=n) for template in NUMBERED for n in (3, 5, 8)]
+    weights = [1 / (rank + 1) for rank in range(len(bases))]
+    rng.shuffle(bases)
+    picks = rng.choices(bases, weights=weights, k=count)
+    return [(base, phrase(base, rng)) for base in picks]
+
+
+class HashingEmbeddings:
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return embed(texts).tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return embed([text])[0].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=5000, help="과거 첫 질문 수")
+    parser.add_argument("--queries", type=int, default=1000, help="새 첫 질문 수")
+    parser.add_argument("--top-n", type=int, default=30)
+    parser.add_argument("--cluster-threshold", type=float, default=0.75)
+    parser.add_argument("--match-threshold", type=float, default=0.8)
+    parser.add_argument("--graph-ms", type=float, default=6000.0, help="그래프로 답하는 첫 턴 지연 추정치")
+    args = parser.parse_args()
+
+    # 해싱 벡터는 실제 임베딩보다 유사도가 낮게 나와서 기준값을 낮춰 쓴다
+    faq.FAQ_CLUSTER_THRESHOLD = args.cluster_threshold
+    faq.FAQ_MATCH_THRESHOLD = args.match_threshold
+    faq.corpus_version = lambda: "bench"
+    rng = random.Random(0)
+    history = make_questions(args.history, rng)
+
+    rows = {}
+    questions = [question for _, question in history]
+    started = time.perf_counter()
+    vectors = embed(questions)
+    labels = leader_cluster(vectors, questions, args.cluster_threshold)
+    cluster_seconds = time.perf_counter() - started
+
+    members = defaultdict(list)
+    for (intent, question), leader in zip(history, labels):
+        members[leader].append((intent, question))
+    purity = sum(Counter(i for i, _ in group).most_common(1)[0][1] for group in members.values()) / len(history)
+    mixed_numbers = sum(1 for group in members.values() if len({frozenset(extract_numbers(q)) for _, q in group}) > 1)
+    rows["clustering"] = {
+        "questions": len(history),
+        "true_intents": len({intent for intent, _ in history}),
+        "clusters": len(members),
+        "purity": purity,
+        "clusters_mixing_numbers": mixed_numbers,
+        "ms_total": cluster_seconds * 1000,
+    }
+
+    # 상위 N 묶음의 leader 질문에 답변을 넣는다 (답변 = 그 묶음의 실제 의도)
+    top = sorted(members, key=lambda leader: -len(members[leader]))[: args.top_n]
+    Base.metadata.create_all(bind=engine, tables=[FaqIntent.__table__])
+    leader_intent = {}
+    with SessionLocal() as db:
+        for leader in top:
+            intent = Counter(i for i, _ in members[leader]).most_common(1)[0][0]
+            leader_intent[leader] = intent
+            db.add(
+                FaqIntent(
+                    question=questions[leader],
+                    question_hash=query_hash(questions[leader]),
+                    embedding=vectors[leader].tolist(),
+                    status="active",
+                    answer=intent,
+                    corpus_version="bench",
+                )
+            )
+        db.commit()
+    covered = sum(len(members[leader]) for leader in top) / len(history)
+
+    matcher = FaqMatcher(refresh_seconds=3600)
+    matcher.embeddings = HashingEmbeddings()
+    matcher.load()
+    queries = make_questions(args.queries, random.Random(1))
+
+    async def run() -> list[tuple[str, str | None, float]]:
+        results = []
+        for intent, question in queries:
+            started = time.perf_counter()
+            found = await matcher.match(question)
+            results.append((intent, found.answer if found else None, (time.perf_counter() - started) * 1000))
+        return results
+
+    results = asyncio.run(run())
+    hits = [r for r in results if r[1] is not None]
+    wrong = sum(1 for intent, answer, _ in hits if answer != intent)
+    lookup_ms = [ms for _, _, ms in results]
+    rows["first_turn"] = {
+        "queries": len(queries),
+        "history_covered_by_top_n": covered,
+        "hit_rate": len(hits) / len(results),
+        "wrong_answer_rate": wrong / len(results),
+        "lookup_ms_mean": statistics.fmean(lookup_ms),
+        "lookup_ms_p99": float(np.percentile(lookup_ms, 99)),
+        "latency_ms_without_faq": args.graph_ms,
+        "latency_ms_with_faq": statistics.fmean(ms + (0 if answer else args.graph_ms) for _, answer, ms in results),
+    }
+
+    print_table(f"FAQ precomputation (top_n={args.top_n}, graph={args.graph_ms}ms)", rows)
+    print(f"- faq: {faq_stats.stats()}")
+
+
+if __name__ == "__main__":
+    main()
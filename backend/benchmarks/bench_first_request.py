@@ -0,0 +1,116 @@
+"""시작 직후 첫 채팅 요청 지연 벤치마크 (cold vs warm)
+
+uvicorn 을 새 프로세스로 띄우고 첫 메시지 요청의 첫 토큰 / 완료 시간을 잰다.
+
+- cold: WARMUP_ENABLED=false, /health 가 응답하자마자 요청
+- warm: WARMUP_ENABLED=true, /ready 가 200 이 된 뒤 요청 (워밍업 단계별 시간도 출력)
+
+실제 LLM / 임베딩 API 와 DB 를 사용하므로 .env 가 모두 채워진 환경에서 실행한다.
+
+    python -m benchmarks.bench_first_request --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+# common 이 채워 넣는 로컬 기본값(sqlite 등)이 서버 프로세스로 넘어가지 않도록 먼저 복사해 둔다
+SERVER_ENV = dict(os.environ)
+
+from .common import print_table  # noqa: E402
+
+QUESTION = "연봉 5천만원인 직장인의 소득세는 얼마인가요?"
+
+
+def _wait_for(client: httpx.Client, path: str, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = client.get(path)
+            if response.status_code == 200:
+                return response.json()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{path} did not become ready in {timeout}s")
+
+
+def first_request(port: int, warm: bool, timeout: float) -> dict:
+    env = {**SERVER_ENV, "WARMUP_ENABLED": "true" if warm else "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            started = time.perf_counter()
+            status = _wait_for(client, "/ready" if warm else "/health", timeout)
+            ready_ms = (time.perf_counter() - started) * 1000
+
+            email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+            token = client.post(
+                "/auth/signup",
+                json={"email": email, "display_name": "bench", "password": "benchmark-password"},
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            conversation_id = client.post("/conversations", json={}, headers=headers).json()["id"]
+
+            started = time.perf_counter()
+            first_token_ms = None
+            with client.stream(
+                "POST",
+                f"/conversations/{conversation_id}/messages",
+                json={"content": QUESTION},
+                headers=headers,
+            ) as response:
+                for line in response.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if event["type"] == "token" and first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    if event["type"] in ("done", "error"):
+                        break
+            total_ms = (time.perf_counter() - started) * 1000
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "ready_ms": ready_ms,
+        "first_token_ms": first_token_ms or total_ms,
+        "total_ms": total_ms,
+        "steps": status.get("steps", {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    rows = {}
+    steps = {}
+    for name, warm in (("cold", False), ("warm", True)):
+        results = [first_request(args.port, warm, args.timeout) for _ in range(args.runs)]
+        rows[name] = {
+            key: statistics.fmean(result[key] for result in results)
+            for key in ("ready_ms", "first_token_ms", "total_ms")
+        }
+        if warm:
+            steps = {step: {"ms": info["ms"], "ok": info["ok"]} for step, info in results[-1]["steps"].items()}
+
+    print_table(f"first chat request after startup (runs={args.runs})", rows)
+    print_table("warm-up steps (last run)", steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Google ID Token 로컬 검증 벤치마크
+
+로컬 RSA 키로 서명한 토큰을 StaticGoogleKeyset 으로 검증한다 (네트워크 없음).
+기존 tokeninfo 방식은 요청마다 oauth2.googleapis.com 왕복(수십~수백 ms)이 필요했다.
+
+    python -m benchmarks.bench_google_verify
+"""
+import asyncio
+import time
+
+from .common import measure, print_table
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.core.google_auth import StaticGoogleKeyset, set_google_keyset, verify_google_id_token
+
+
+def make_keyset_and_token() -> tuple[StaticGoogleKeyset, str]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk["kid"] = "bench-key"
+
+    now = int(time.time())
+    token = jwt.encode(
+        {
+            "iss": "https://accounts.google.com",
+            "aud": "bench-client-id",
+            "sub": "1234567890",
+            "email": "bench@example.com",
+            "iat": now,
+            "exp": now + 3600,
+        },
+        private_pem,
+        algorithm="RS256",
+        headers={"kid": "bench-key"},
+    )
+    return StaticGoogleKeyset([public_jwk]), token
+
+
+def main():
+    keyset, token = make_keyset_and_token()
+    set_google_keyset(keyset)
+
+    loop = asyncio.new_event_loop()
+    rows = {
+        "local_verify": measure(
+            lambda: loop.run_until_complete(verify_google_id_token(token)), 2000
+        ),
+    }
+    print_table("google id token verification", rows)
+
+
+if __name__ == "__main__":
+    main()
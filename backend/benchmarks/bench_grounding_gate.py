@@ -0,0 +1,103 @@
+"""환각 검사 로컬 사전 검사 벤치마크: 피한 LLM 호출 / 판정 일치율 / 지연
+
+합성 조문 문서에 대해 정답이 정해진 답변을 만든다.
+
+- grounded: 조문 문장을 그대로/조금 바꿔 쓴 답변 (금액 표기는 "1,400만원" 처럼 바꾸기도 함)
+- hallucinated: 금액/세율을 바꾼 답변, 문서에 없는 내용을 지어낸 답변
+
+LLM 검사기는 정답을 돌려주는 가짜 함수(--grader-ms 지연)다.
+절반으로 보정(calibrate)하고, 나머지 절반에 기본 임계값 / 보정 임계값을 적용해서 비교한다.
+
+    python -m benchmarks.bench_grounding_gate --samples 2000
+"""
+from .common import print_table
+
+import argparse
+import random
+import re
+import time
+
+from app.agents import hallucination_gate
+from app.agents.grounding import grounding_score
+from app.agents.hallucination_gate import GROUNDED, HALLUCINATED, calibrate, check_hallucination, gate_stats
+from app.core.config import GROUNDING_PRECHECK_HIGH, GROUNDING_PRECHECK_LOW
+
+from .bench_dedup import make_article
+
+INVENTED = [
+    "이 경우 지방소득세는 면제되며 별도의 신고 절차가 필요하지 않습니다.",
+    "2025년부터는 모든 근로자에게 일괄적으로 10퍼센트 세율이 적용됩니다.",
+    "해외 거주자는 소득 금액과 관계없이 3백만원을 추가로 공제받을 수 있습니다.",
+]
+
+
+def make_sample(rng: random.Random) -> tuple[str, list[str], str]:
+    docs = [make_article(rng.randint(40, 90), rng) for _ in range(3)]
+    sentences = [s.strip() for s in re.split(r"[①②③④⑤]", docs[0]) if len(s.strip()) > 20]
+    sentence = rng.choice(sentences)
+    kind = rng.random()
+    if kind < 0.5:
+        answer = sentence.replace("1천400만원", "1,400만원").replace("적용한다", "적용합니다") + " 참고하시기 바랍니다."
+        return answer, docs, GROUNDED
+    if kind < 0.75:
+        answer = re.sub(r"(\d+)퍼센트", lambda m: f"{int(m.group(1)) + 7}퍼센트", sentence)
+        answer = re.sub(r"(\d)천", lambda m: f"{int(m.group(1)) + 2}천", answer)
+        return answer, docs, HALLUCINATED
+    if kind < 0.9:
+        return rng.choice(INVENTED) + " " + rng.choice(INVENTED), docs, HALLUCINATED
+    # 애매한 경우: 일부만 문서 문장이고 나머지는 지어낸 내용
+    return sentence[: len(sentence) // 2] + " " + rng.choice(INVENTED), docs, HALLUCINATED
+
+
+def run(samples, grader_seconds: float) -> dict:
+    calls = 0
+    agree = 0
+    started = time.perf_counter()
+    for answer, docs, label in samples:
+
+        def grade() -> str:
+            nonlocal calls
+            calls += 1
+            time.sleep(grader_seconds)
+            return label
+
+        agree += check_hallucination(answer, docs, "소득세 세율", grade) == label
+    elapsed = time.perf_counter() - started
+    return {
+        "llm_calls": calls,
+        "llm_calls_avoided": len(samples) - calls,
+        "agreement": agree / len(samples),
+        "ms_per_check": elapsed * 1000 / len(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--grader-ms", type=float, default=0.0, help="가짜 LLM 검사기 지연")
+    parser.add_argument("--max-error", type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    samples = [make_sample(rng) for _ in range(args.samples)]
+    train, test = samples[: len(samples) // 2], samples[len(samples) // 2 :]
+
+    # 보정용 로그: 전부 LLM 으로 판정했다고 보고 (점수, 판정)을 기록
+    records = [{"score": grounding_score(a, d, "소득세 세율").score, "llm": label} for a, d, label in train]
+    calibration = calibrate(records, args.max_error)
+
+    rows = {"llm_only": {"llm_calls": len(test), "llm_calls_avoided": 0, "agreement": 1.0}}
+    for name, thresholds in (
+        ("default", (GROUNDING_PRECHECK_LOW, GROUNDING_PRECHECK_HIGH)),
+        ("calibrated", (calibration["low"], calibration["high"])),
+    ):
+        hallucination_gate.thresholds = thresholds
+        rows[name] = {"low": thresholds[0], "high": thresholds[1], **run(test, args.grader_ms / 1000)}
+
+    print_table(f"hallucination check on {len(test)} answers (calibrated on {len(train)})", rows)
+    print(f"- calibration: {calibration}")
+    print(f"- precheck: {gate_stats.stats()['precheck_us_avg']:.1f}us per answer")
+
+
+if __name__ == "__main__":
+    main()
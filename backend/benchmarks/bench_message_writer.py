@@ -0,0 +1,119 @@
+"""채팅 메시지 저장 처리량 벤치마크
+
+- per_turn: 이전 create_message 방식 (add + flush, add + commit, refresh x3)
+- write_behind: message_writer 로 여러 턴을 모아서 저장
+
+동시에 끝나는 턴을 --concurrency 개씩 흉내 낸다. 기본값은 임시 sqlite 파일이고,
+DATABASE_URL 을 실제 Postgres 로 지정하면 네트워크 왕복이 포함된 수치를 얻을 수 있다.
+
+    python -m benchmarks.bench_message_writer --turns 2000 --concurrency 50
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_message_writer.sqlite')}"
+)
+
+from .common import print_table
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from app.db import Base, SessionLocal, engine
+from app.message_writer import MessageWriter
+from app.models import Conversation, Message, User
+
+
+def setup(conversations: int) -> list[int]:
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Conversation.__table__, Message.__table__])
+    with SessionLocal() as db:
+        user = User(email=f"bench-{time.time()}@example.com", display_name="bench")
+        db.add(user)
+        db.flush()
+        items = [Conversation(user_id=user.id, title="새 대화") for _ in range(conversations)]
+        db.add_all(items)
+        db.commit()
+        return [c.id for c in items]
+
+
+def per_turn(conversation_id: int, content: str) -> None:
+    with SessionLocal() as db:
+        conversation = db.get(Conversation, conversation_id)
+        user_message = Message(conversation_id=conversation_id, role="user", content=content)
+        db.add(user_message)
+        conversation.title = content[:40]
+        conversation.updated_at = datetime.utcnow()
+        db.flush()
+
+        assistant_message = Message(conversation_id=conversation_id, role="assistant", content=content * 10)
+        db.add(assistant_message)
+        conversation.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(conversation)
+        db.refresh(user_message)
+        db.refresh(assistant_message)
+
+
+async def run_per_turn(conversation_ids: list[int], turns: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def turn(i: int):
+        async with semaphore:
+            await asyncio.to_thread(per_turn, conversation_ids[i % len(conversation_ids)], f"질문 {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(turn(i) for i in range(turns)))
+    return time.perf_counter() - started
+
+
+async def run_write_behind(writer: MessageWriter, conversation_ids: list[int], turns: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def turn(i: int):
+        async with semaphore:
+            content = f"질문 {i}"
+            await writer.submit(
+                conversation_ids[i % len(conversation_ids)],
+                content[:40],
+                [
+                    {"role": "user", "content": content, "created_at": datetime.utcnow()},
+                    {"role": "assistant", "content": content * 10, "created_at": datetime.utcnow()},
+                ],
+            )
+
+    await writer.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(turn(i) for i in range(turns)))
+    await writer.close()
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--flush-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    conversation_ids = setup(args.conversations)
+    writer = MessageWriter(SessionLocal, batch_size=args.concurrency, flush_interval=args.flush_ms / 1000, retries=3)
+
+    per_turn_seconds = await run_per_turn(conversation_ids, args.turns, args.concurrency)
+    write_behind_seconds = await run_write_behind(writer, conversation_ids, args.turns, args.concurrency)
+
+    print_table(
+        f"message persistence ({args.turns} turns, concurrency {args.concurrency}, {engine.url.get_backend_name()})",
+        {
+            "per_turn": {"seconds": per_turn_seconds, "turns_per_s": args.turns / per_turn_seconds},
+            "write_behind": {"seconds": write_behind_seconds, "turns_per_s": args.turns / write_behind_seconds},
+        },
+    )
+    print(f"- writer: {writer.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""라우팅 중 미리 검색(prefetch)으로 줄어드는 첫 토큰 전 지연 벤치마크
+
+실제 API 대신 지연 시간을 흉내 내는 router / 임베딩 / 벡터 검색으로
+"메시지 도착 -> 선택된 작업자가 검색 결과를 받음" 까지의 시간을 비교한다.
+
+- sequential: router 호출이 끝난 뒤 작업자가 임베딩 + 검색
+- prefetch: router 호출과 동시에 후보 컬렉션 검색 (임베딩은 한 번만), 작업자는 결과를 넘겨받음
+
+    python -m benchmarks.bench_prefetch --router-ms 700 --embed-ms 150 --search-ms 80
+"""
+from .common import print_table
+
+import argparse
+import statistics
+import time
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from app.agents.prefetch import (
+    PrefetchedRetriever,
+    SharedQueryEmbeddings,
+    prefetch_stats,
+    start_prefetch,
+    use_prefetched,
+)
+
+
+class SlowEmbeddings(Embeddings):
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.model = "bench-embedding"
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        time.sleep(self.seconds)
+        return [0.0]
+
+
+class SlowRetriever(BaseRetriever):
+    embeddings: Embeddings
+    seconds: float
+    name: str
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun):
+        self.embeddings.embed_query(query)
+        time.sleep(self.seconds)
+        return [Document(page_content=f"{self.name}: {query}")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--router-ms", type=float, default=700)
+    parser.add_argument("--embed-ms", type=float, default=150)
+    parser.add_argument("--search-ms", type=float, default=80)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    base = SlowEmbeddings(args.embed_ms / 1000)
+    embeddings = SharedQueryEmbeddings(base)
+    retrievers = {
+        worker: SlowRetriever(embeddings=embeddings, seconds=args.search_ms / 1000, name=worker)
+        for worker in ("income_tax_agent", "real_estate_tax_agent")
+    }
+    candidates = {
+        "income_tax_agent": (("소득세",), retrievers["income_tax_agent"]),
+        "real_estate_tax_agent": (("종부세",), retrievers["real_estate_tax_agent"]),
+    }
+
+    def route():
+        time.sleep(args.router_ms / 1000)
+        return ["income_tax_agent"]
+
+    def sequential(question: str):
+        plan = route()
+        return PrefetchedRetriever(retriever=retrievers[plan[0]]).invoke(question)
+
+    def prefetched(question: str):
+        prefetch = start_prefetch(question, candidates)
+        plan = route()
+        result = prefetch.collect(plan)
+        with use_prefetched(result.get(plan[0])):
+            return PrefetchedRetriever(retriever=retrievers[plan[0]]).invoke(question)
+
+    rows = {}
+    for name, fn in (("sequential", sequential), ("prefetch", prefetched)):
+        base.calls = 0
+        samples = []
+        for i in range(args.iterations):
+            question = f"연봉 5천만원 직장인의 소득세와 종부세는 얼마인가요? ({name} {i})"
+            started = time.perf_counter()
+            fn(question)
+            samples.append((time.perf_counter() - started) * 1000)
+        rows[name] = {
+            "mean_ms": statistics.fmean(samples),
+            "embed_calls_per_turn": base.calls / args.iterations,
+        }
+    rows["saved"] = {"ms": rows["sequential"]["mean_ms"] - rows["prefetch"]["mean_ms"]}
+
+    print_table(
+        f"time to worker documents (router {args.router_ms}ms, embed {args.embed_ms}ms, search {args.search_ms}ms)",
+        rows,
+    )
+    print(f"- prefetch: {prefetch_stats.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""양자화 검색 벤치마크: 인덱스 크기 / 메모리 / 검색 지연 / recall@k
+
+pgvector 가 설치된 Postgres 가 필요하다. 임시 테이블에 무작위 벡터를 넣고
+full(현재 방식: float32 전체 스캔), halfvec, binary(+rescore) 를 비교한다.
+
+    BENCH_DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_quantized_search --rows 20000
+"""
+import argparse
+import os
+import time
+
+from .common import print_table
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from app.agents.quantized_search import build_search_sql, index_ddl, to_vector_literal
+
+TABLE = "bench_quantized_vectors"
+
+
+def seed(conn, rows: int, dims: int, rng) -> np.ndarray:
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    conn.execute(text(f"CREATE TABLE {TABLE} (id bigint PRIMARY KEY, embedding vector({dims}))"))
+
+    # 실제 임베딩처럼 몇 개의 군집으로 뭉친 벡터를 만든다
+    centers = rng.normal(size=(64, dims)).astype(np.float32)
+    vectors = centers[rng.integers(0, 64, rows)] + 0.5 * rng.normal(size=(rows, dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    for start in range(0, rows, 500):
+        batch = [
+            {"id": start + i, "embedding": to_vector_literal(v.tolist())}
+            for i, v in enumerate(vectors[start : start + 500])
+        ]
+        conn.execute(text(f"INSERT INTO {TABLE} VALUES (:id, CAST(:embedding AS vector))"), batch)
+    return vectors
+
+
+def relation_size(conn, name: str) -> int:
+    return conn.execute(text("SELECT pg_relation_size(:name)"), {"name": name}).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--candidates", type=int, default=40)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    engine = create_engine(os.getenv("BENCH_DATABASE_URL", os.environ["DATABASE_URL"]))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        vectors = seed(conn, args.rows, args.dims, rng)
+        conn.execute(text(f"VACUUM ANALYZE {TABLE}"))
+        conn.execute(text("SET maintenance_work_mem = '1GB'"))
+
+        sizes = {"table": relation_size(conn, TABLE)}
+        for mode in ("halfvec", "binary"):
+            if mode == "halfvec" and args.dims > 4000:
+                continue
+            index_name = f"ix_{TABLE}_{mode}"
+            conn.execute(text(index_ddl(TABLE, index_name, mode, args.dims)))
+            sizes[index_name] = relation_size(conn, index_name)
+
+        queries = vectors[rng.integers(0, args.rows, args.queries)] + 0.1 * rng.normal(
+            size=(args.queries, args.dims)
+        ).astype(np.float32)
+        exact = [set(np.argsort(-(vectors @ q))[: args.k].tolist()) for q in queries]
+
+        conn.execute(text("SET hnsw.ef_search = 100"))
+        rows = {}
+        for mode in ("full", "halfvec", "binary"):
+            if f"ix_{TABLE}_{mode}" not in sizes and mode != "full":
+                continue
+            sql = build_search_sql(TABLE, "id", mode, args.dims)
+            latencies, recalls = [], []
+            for q, truth in zip(queries, exact):
+                started = time.perf_counter()
+                ids = conn.execute(
+                    sql,
+                    {"query": to_vector_literal(q.tolist()), "k": args.k, "candidates": args.candidates},
+                ).scalars().all()
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len(truth & set(ids)) / args.k)
+            latencies.sort()
+            rows[mode] = {
+                "p50_ms": latencies[len(latencies) // 2],
+                "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+                f"recall@{args.k}": float(np.mean(recalls)),
+            }
+
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+
+    print_table("relation sizes (MB, index size ~= memory needed to keep it cached)", {
+        name: {"mb": size / 1024 / 1024} for name, size in sizes.items()
+    })
+    print_table(f"search ({args.rows} rows x {args.dims} dims, {args.candidates} rescore candidates)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""트레이싱 오버헤드 벤치마크: 요청당 CPU / 지연 (꺼짐 vs 전체 vs 샘플링)
+
+supervisor -> 작업자 2개(검색 + 프롬프트 + 가짜 LLM)를 흉내 내는 LangChain 체인을 --requests 번 실행한다.
+
+- off: 콜백 없음
+- always_full: 모든 요청에 입력/출력까지 기록하고 파일로 내보냄 (항상 켜진 트레이싱)
+- sampled: start_trace (TRACING_SAMPLE_RATE 로 head 샘플링, 나머지는 가볍게 기록했다가 버림)
+- always_langsmith (--langsmith): 모든 요청에 LangChainTracer. 모든 요청에 200 으로 답하는 로컬 HTTP 서버로 보낸다
+
+CPU 는 process_time 이라 내보내기 스레드에서 쓴 시간도 포함된다.
+
+    python -m benchmarks.bench_tracing --requests 500 --sample-rate 0.05
+"""
+from .common import print_table
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
+
+from app.core import tracing
+from app.core.tracing import FileExporter, start_trace, tracing_stats
+
+from .bench_dedup import PHRASES
+
+ANSWER = "종합소득세 세율은 과세표준 구간에 따라 6퍼센트에서 45퍼센트까지 적용됩니다. " * 8
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    def _ok(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_GET = do_POST = do_PATCH = _ok
+
+    def log_message(self, *args):
+        pass
+
+
+def build_chain():
+    def worker(name: str):
+        retriever = RunnableLambda(
+            lambda question: "\n".join(
+                Document(page_content=" ".join(PHRASES[i:] + PHRASES[:i])).page_content for i in range(3)
+            )
+        ).with_config(run_name=f"{name}_retriever")
+        prompt = ChatPromptTemplate.from_messages([("system", "문서:\n{context}"), ("human", "{question}")])
+        model = FakeListChatModel(responses=[ANSWER])
+        return (
+            {"context": retriever, "question": RunnablePassthrough()} | prompt | model | StrOutputParser()
+        ).with_config(run_name=name)
+
+    router = RunnableLambda(lambda question: question).with_config(run_name="supervisor")
+    workers = RunnableParallel(income=worker("income_tax_agent"), real_estate=worker("real_estate_tax_agent"))
+    return router | workers
+
+
+async def run(chain, requests: int, callbacks_for) -> dict:
+    latencies = []
+    cpu_started = time.process_time()
+    for i in range(requests):
+        started = time.perf_counter()
+        callbacks, finish = callbacks_for()
+        await chain.ainvoke(f"연봉 {i}천만원 직장인의 소득세는?", config={"callbacks": callbacks})
+        finish()
+        latencies.append((time.perf_counter() - started) * 1000)
+    # 내보내기 스레드가 남은 작업을 끝낼 때까지 기다린 뒤 CPU 시간을 잰다
+    tracing._export_executor.submit(lambda: None).result()
+    cpu_ms = (time.process_time() - cpu_started) * 1000
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "cpu_ms_per_request": cpu_ms / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--sample-rate", type=float, default=0.05)
+    parser.add_argument("--langsmith", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    tracing._exporter = FileExporter(path)
+    tracing.TRACING_ENABLED = True
+    tracing.TRACING_EXPORTER = "file"
+    chain = build_chain()
+
+    def off():
+        return [], lambda: None
+
+    def traced():
+        trace = start_trace("bench")
+        return trace.callbacks, lambda: trace.finish()
+
+    # 모드 -> (콜백, head 샘플링 비율)
+    modes = {"off": (off, 0.0), "always_full": (traced, 1.0), "sampled": (traced, args.sample_rate)}
+    if args.langsmith:
+        from langchain_core.tracers.langchain import LangChainTracer
+        from langsmith import Client
+
+        logging.getLogger("langsmith").setLevel(logging.CRITICAL)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SinkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = Client(api_url=f"http://127.0.0.1:{server.server_port}", api_key="bench")
+
+        def always_langsmith():
+            return [LangChainTracer(client=client, project_name="bench")], lambda: None
+
+        modes["always_langsmith"] = (always_langsmith, 0.0)
+
+    # 첫 실행의 import / 초기화 비용은 빼고 잰다
+    asyncio.run(run(chain, 20, off))
+    rows = {}
+    for name, (callbacks_for, rate) in modes.items():
+        tracing.TRACING_SAMPLE_RATE = rate
+        rows[name] = asyncio.run(run(chain, args.requests, callbacks_for))
+        if name == "always_langsmith":
+            client.flush()
+    for name in list(rows)[1:]:
+        rows[name]["cpu_overhead_ms"] = rows[name]["cpu_ms_per_request"] - rows["off"]["cpu_ms_per_request"]
+
+    print_table(f"tracing overhead per request (requests={args.requests}, sample_rate={args.sample_rate})", rows)
+    print(f"- tracing (all modes): {tracing_stats.stats()}")
+    print(f"- trace file: {os.path.getsize(path) / 1024:.0f}KB ({path})")
+
+
+if __name__ == "__main__":
+    main()
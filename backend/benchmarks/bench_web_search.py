@@ -0,0 +1,101 @@
+"""legacy web_search 재시도 루프의 외부 호출 수 벤치마크
+
+환각/유용성 검사 실패로 web_search 가 질문마다 --retries 번 실행되는 상황을 흉내 낸다.
+검색 제공자는 fixture(JSON) 제공자에 --search-ms 지연을 더하고, 질의 재작성은 --rewrite-ms 지연의 가짜 LLM 이다.
+
+- uncached: 매번 재작성 LLM + 검색 API 호출 (기존 web_search)
+- cached: WebSearch (재작성 메모 + sqlite 결과 캐시)
+- restarted: 프로세스를 다시 띄운 상황 (재작성 메모는 비고, 결과 캐시 파일은 남아 있음)
+
+    python -m benchmarks.bench_web_search --questions 20 --retries 3
+"""
+from .common import print_table
+
+import argparse
+import os
+import tempfile
+import time
+
+from app.agents import web_search as web_search_module
+from app.agents.web_search import FixtureProvider, WebSearch, web_search_stats
+from app.core.config import WEB_SEARCH_FIXTURES
+from app.core.disk_cache import DiskTTLCache
+
+# (사용자 질문, 재작성된 검색 질의)
+QUESTIONS = [
+    ("연봉 {i}천만원 직장인의 종합소득세 세율은 얼마인가요?", "종합소득세 세율 과세표준 구간 2024"),
+    ("총급여 {i}천만원이면 근로소득공제는 얼마인가요?", "근로소득공제 총급여액 공제금액"),
+    ("주택 임대 수입이 연 {i}백만원이면 분리과세를 선택할 수 있나요?", "주택임대소득 분리과세 2천만원 이하"),
+]
+
+
+class SlowFixtureProvider(FixtureProvider):
+    def __init__(self, path: str, seconds: float):
+        super().__init__(path)
+        self.seconds = seconds
+        self.calls = 0
+
+    def search(self, query: str) -> list[dict]:
+        self.calls += 1
+        time.sleep(self.seconds)
+        return super().search(query)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--rewrite-ms", type=float, default=400)
+    parser.add_argument("--search-ms", type=float, default=1200)
+    args = parser.parse_args()
+
+    optimized = {}
+    questions = []
+    for i in range(args.questions):
+        question, query = QUESTIONS[i % len(QUESTIONS)]
+        questions.append(question.format(i=i + 1))
+        optimized[questions[-1]] = query
+    provider = SlowFixtureProvider(WEB_SEARCH_FIXTURES, args.search_ms / 1000)
+    rewrite_calls = 0
+
+    def rewrite(query: str) -> str:
+        nonlocal rewrite_calls
+        rewrite_calls += 1
+        time.sleep(args.rewrite_ms / 1000)
+        return optimized[query]
+
+    def uncached(question: str):
+        return provider.search(rewrite(question))
+
+    cache = DiskTTLCache(os.path.join(tempfile.mkdtemp(), "web_search.sqlite"), 32 * 1024 * 1024, 3600)
+    searcher = WebSearch(rewrite=rewrite, provider=provider, cache=cache)
+
+    rows = {}
+    for name, search in (("uncached", uncached), ("cached", searcher.search), ("restarted", searcher.search)):
+        if name == "restarted":
+            web_search_module._rewrite_memo.clear()
+        provider.calls = rewrite_calls = 0
+        started = time.perf_counter()
+        for question in questions:
+            for _ in range(args.retries):
+                search(question)
+        elapsed = time.perf_counter() - started
+        external = provider.calls + rewrite_calls
+        loops = len(questions)
+        rows[name] = {
+            "external_calls_per_loop": external / loops,
+            "avoided_per_loop": (2 * args.retries * loops - external) / loops,
+            "search_ms_per_loop": elapsed * 1000 / loops,
+        }
+
+    print_table(
+        f"web_search retry loop (questions={args.questions}, retries={args.retries}, "
+        f"rewrite {args.rewrite_ms}ms, search {args.search_ms}ms)",
+        rows,
+    )
+    print(f"- web_search: {web_search_stats.stats()}")
+    print(f"- web_search_cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""워커 프로세스 수에 따른 처리량 / 메모리 벤치마크
+
+python -m app.serve 를 WEB_CONCURRENCY=1,2,4.. 로 띄우고 동시 클라이언트로 인증 + DB 조회 + JSON
+직렬화가 있는 엔드포인트(기본 GET /conversations)를 두드려서 초당 요청 수를 잰다.
+메모리는 부모 + 워커 프로세스 전체의 RSS 합과 PSS 합(공유 페이지를 프로세스 수로 나눈 값)을 본다.
+RSS 합은 공유 페이지(mmap 인덱스, 공유 라이브러리)를 여러 번 세므로 실제 사용량은 PSS 쪽에 가깝다.
+
+기본값은 임시 sqlite 파일 DB 이고 DATABASE_URL 을 Postgres 로 지정할 수 있다. (Linux 전용: /proc 사용)
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --clients 64 --seconds 10
+"""
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_workers.sqlite')}"
+)
+
+from .common import print_table
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids += _process_tree(int(child))
+        except FileNotFoundError:
+            pass
+    return pids
+
+
+def _memory_kb(pid: int, field: str, path: str) -> int:
+    try:
+        with open(f"/proc/{pid}/{path}") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def tree_memory_mb(pid: int) -> tuple[float, float]:
+    pids = _process_tree(pid)
+    rss = sum(_memory_kb(p, "VmRSS", "status") for p in pids)
+    pss = sum(_memory_kb(p, "Pss", "smaps_rollup") for p in pids)
+    return rss / 1024, pss / 1024
+
+
+def _wait_for_health(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("server did not start")
+
+
+async def _load(base_url: str, path: str, token: str, clients: int, seconds: float) -> tuple[int, int]:
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.monotonic() + seconds
+    done = errors = 0
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal done, errors
+        while time.monotonic() < deadline:
+            response = await client.get(path, headers=headers)
+            if response.status_code == 200:
+                done += 1
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    return done, errors
+
+
+def run(workers: int, port: int, path: str, clients: int, seconds: float) -> dict:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "WARMUP_NETWORK": "false",
+        "CHECKPOINT_BACKEND": "none",
+    }
+    server = subprocess.Popen([sys.executable, "-m", "app.serve"], env=env, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for_health(base_url)
+        token = httpx.post(
+            f"{base_url}/auth/signup",
+            json={
+                "email": f"bench-{uuid.uuid4().hex[:8]}@example.com",
+                "display_name": "bench",
+                "password": "benchmark-password",
+            },
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(20):
+            httpx.post(f"{base_url}/conversations", json={"title": f"대화 {i}"}, headers=headers)
+
+        # 워커마다 한 번씩 요청을 받아서 import / 연결이 끝난 상태에서 잰다
+        asyncio.run(_load(base_url, path, token, clients, 1.0))
+        idle_rss, idle_pss = tree_memory_mb(server.pid)
+        done, errors = asyncio.run(_load(base_url, path, token, clients, seconds))
+        rss, pss = tree_memory_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "req_per_s": done / seconds,
+        "errors": errors,
+        "rss_mb": rss,
+        "pss_mb": pss,
+        "idle_rss_mb": idle_rss,
+        "idle_pss_mb": idle_pss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--path", default="/conversations")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    rows = {
+        f"workers={workers}": run(workers, args.port, args.path, args.clients, args.seconds)
+        for workers in args.workers
+    }
+    print_table(f"GET {args.path} with {args.clients} clients for {args.seconds}s", rows)
+
+
+if __name__ == "__main__":
+    main()
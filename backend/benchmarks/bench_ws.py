@@ -0,0 +1,135 @@
+"""채팅 전송 방식별 턴당 오버헤드 벤치마크: SSE(턴마다 요청 + 인증) vs WebSocket(연결당 한 번 인증)
+
+그래프는 --tokens 개의 토큰을 바로 내는 가짜 그래프로 바꾸고, 서버는 프로세스 안에서(TestClient) 실행한다.
+그래서 측정값은 LLM 을 뺀 서버 쪽 턴 처리 비용(라우팅, 인증, DB 세션, 스트림 프레이밍)이다.
+
+- sse: 턴마다 POST /conversations/{id}/messages (Authorization 헤더 -> get_current_user)
+- ws: 연결 하나에서 auth 한 번 + 턴마다 message 프레임
+
+TLS 연결 수립은 프로세스 안에서는 잴 수 없어서 --rtt-ms 로 추정한다.
+SSE 턴이 새 연결을 쓰면 TCP + TLS 1.3 핸드셰이크로 2 RTT 가 더 든다 (keep-alive 로 재사용되면 0).
+
+    python -m benchmarks.bench_ws --turns 200 --tokens 50 --rtt-ms 30
+"""
+import os
+import tempfile
+
+# 요청은 스레드 풀에서도 DB 를 쓰므로 스레드마다 따로 생기는 메모리 sqlite 대신 임시 파일을 쓴다
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_ws.sqlite")
+
+from .common import measure, print_table  # noqa: E402
+
+import argparse
+import statistics
+import time
+
+from fastapi import FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.db import Base, SessionLocal, engine
+from app.deps import get_current_user, user_cache
+from app.message_writer import message_writer
+from app.models import Conversation, Message, User
+from app.routers import chat, chat_ws
+
+
+class EchoGraph:
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+
+    async def astream_events(self, payload, config=None, version=None):
+        for i in range(self.tokens):
+            yield {"event": "on_custom_event", "name": "final_answer", "data": {"content": f"토큰{i} "}}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=50, help="턴당 스트리밍 토큰 수")
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="클라이언트-서버 왕복 지연 추정치")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Conversation.__table__, Message.__table__])
+    with SessionLocal() as db:
+        user = User(email="bench-ws@example.com", display_name="bench")
+        db.add(user)
+        db.commit()
+        conversation = Conversation(user_id=user.id, title="bench")
+        db.add(conversation)
+        db.commit()
+        user_id, conversation_id = user.id, conversation.id
+    token = create_access_token(str(user_id))
+
+    chat.get_chat_graph = lambda: EchoGraph(args.tokens)
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.include_router(chat_ws.router)
+
+    @app.on_event("startup")
+    async def start_writer():
+        await message_writer.start()
+
+    rows = {}
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        samples = []
+        for i in range(args.turns):
+            started = time.perf_counter()
+            with client.stream(
+                "POST", f"/conversations/{conversation_id}/messages", json={"content": f"질문 {i}"}, headers=headers
+            ) as response:
+                for _ in response.iter_lines():
+                    pass
+            samples.append((time.perf_counter() - started) * 1000)
+        rows["sse"] = {"server_ms_per_turn": statistics.fmean(samples)}
+
+        started = time.perf_counter()
+        with client.websocket_connect("/conversations/ws") as ws:
+            ws.send_json({"type": "auth", "token": token})
+            ws.receive_json()
+            connect_ms = (time.perf_counter() - started) * 1000
+            samples = []
+            for i in range(args.turns):
+                started = time.perf_counter()
+                ws.send_json({"type": "message", "id": str(i), "conversation_id": conversation_id, "content": f"질문 {i}"})
+                while ws.receive_json()["type"] not in ("done", "error"):
+                    pass
+                samples.append((time.perf_counter() - started) * 1000)
+        rows["ws"] = {
+            "server_ms_per_turn": statistics.fmean(samples),
+            "connect_auth_ms": connect_ms,
+        }
+
+    # 요청마다 하는 인증(get_current_user) 비용: 캐시 히트 / 미스
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def authenticate(clear_cache: bool):
+        if clear_cache:
+            user_cache.clear()
+        db = SessionLocal()
+        try:
+            get_current_user(credentials, db)
+        finally:
+            db.close()
+
+    auth_hit = measure(lambda: authenticate(False), 1000)["mean_us"] / 1000
+    auth_miss = measure(lambda: authenticate(True), 1000)["mean_us"] / 1000
+    handshake_ms = 2 * args.rtt_ms
+    rows["sse"].update(
+        auth_ms_per_turn=auth_hit,
+        auth_ms_per_turn_cache_miss=auth_miss,
+        est_new_connection_ms_per_turn=handshake_ms,
+    )
+    rows["ws"].update(
+        auth_ms_per_turn=rows["ws"]["connect_auth_ms"] / args.turns,
+        est_new_connection_ms_per_turn=(handshake_ms + rows["ws"]["connect_auth_ms"]) / args.turns,
+    )
+
+    print_table(f"per-turn transport overhead (turns={args.turns}, tokens={args.tokens}, rtt={args.rtt_ms}ms)", rows)
+    print(f"- chat_ws: {chat_ws.socket_stats.stats()}")
+
+
+if __name__ == "__main__":
+    main()
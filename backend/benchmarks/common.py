@@ -0,0 +1,38 @@
+"""벤치마크 공통 헬퍼
+
+`backend` 디렉터리에서 `python -m benchmarks.<name>` 형태로 실행한다.
+.env 가 없어도 돌아가도록 필수 환경 변수에 로컬 기본값을 넣어준다.
+"""
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+
+def measure(fn, iterations: int = 1000) -> dict:
+    """fn 을 반복 실행하고 호출당 지연시간(us) 통계를 반환한다."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def print_table(title: str, rows: dict[str, dict]) -> None:
+    print(f"\n## {title}")
+    for name, row in rows.items():
+        values = ", ".join(
+            f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in row.items()
+        )
+        print(f"- {name}: {values}")
@@ -0,0 +1,36 @@
+"""환각 검사 로그로 로컬 사전 검사 임계값(low / high) 보정
+
+    python -m scripts.calibrate_grounding --max-error 0.02
+
+GROUNDING_LOG_PATH 의 JSONL 을 읽어서 GROUNDING_CALIBRATION_PATH 에 저장한다.
+서버는 시작할 때 보정 파일을 읽으므로 저장 후 재시작해야 반영된다.
+"""
+import argparse
+import json
+
+from app.agents.hallucination_gate import calibrate
+from app.core.config import GROUNDING_CALIBRATION_PATH, GROUNDING_LOG_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", default=GROUNDING_LOG_PATH)
+    parser.add_argument("--output", default=GROUNDING_CALIBRATION_PATH)
+    parser.add_argument("--max-error", type=float, default=0.02)
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.log, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    result = calibrate(records, args.max_error, args.min_samples)
+    print(json.dumps(result, indent=2))
+    if not args.dry_run:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""양자화 검색용 HNSW 표현식 인덱스 생성 (EMBEDDING_SEARCH_MODE=halfvec|binary 전에 실행)
+
+    python -m scripts.create_quantized_indexes --mode binary --target langchain
+
+float32 vector 는 2000 차원을 넘으면 HNSW 인덱스를 만들 수 없어서 지금은 전체 스캔을 한다.
+검색은 PGVector 컬렉션(langchain_pg_embedding)만 한다. documents 테이블은 검색하는 곳이 없어서 대상에서 뺐다.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.agents.quantized_search import index_ddl
+from app.core.config import CONNECTION_STRING, LANGCHAIN_EMBEDDING_DIMS
+
+TARGETS = {
+    # target: (접속 문자열, 테이블, 차원)
+    "langchain": (CONNECTION_STRING, "langchain_pg_embedding", LANGCHAIN_EMBEDDING_DIMS),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["halfvec", "binary"], required=True)
+    parser.add_argument("--target", choices=list(TARGETS), default="langchain")
+    args = parser.parse_args()
+
+    url, table, dims = TARGETS[args.target]
+    index_name = f"ix_{table}_embedding_{args.mode}"
+    engine = create_engine(url)
+
+    # CREATE INDEX 는 오래 걸리므로 인덱스 빌드 메모리를 늘리고 트랜잭션 밖에서 실행한다
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text("SET maintenance_work_mem = '1GB'"))
+
+        started = time.perf_counter()
+        conn.execute(text(index_ddl(table, index_name, args.mode, dims)))
+        print(f"created {index_name} in {time.perf_counter() - started:.1f}s")
+
+        size = conn.execute(
+            text("SELECT pg_size_pretty(pg_relation_size(:name))"), {"name": index_name}
+        ).scalar()
+        print(f"{index_name}: {size}")
+
+
+if __name__ == "__main__":
+    main()
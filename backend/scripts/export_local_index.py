@@ -0,0 +1,31 @@
+"""RETRIEVER_BACKEND=local 용 로컬 인덱스 미리 만들기
+
+    python -m scripts.export_local_index income-tax-index house-tax-index
+
+서버는 처음 검색할 때 없는 버전을 직접 내보내지만, 배포 전에 만들어 두면 첫 요청이 느려지지 않는다.
+"""
+import argparse
+import time
+
+from app.agents.collections import get_collection_version
+from app.agents.local_index import LocalIndex, export_collection, prune_versions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("collections", nargs="+")
+    args = parser.parse_args()
+
+    for collection in args.collections:
+        version = get_collection_version(collection)
+        started = time.perf_counter()
+        path = export_collection(collection, version)
+        index = LocalIndex(path)
+        print(f"{collection} v{version}: {len(index)} chunks -> {path} ({time.perf_counter() - started:.1f}s)")
+        index.close()
+        for removed in prune_versions(collection, version):
+            print(f"  removed {removed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""법령 본문을 조문 구조 청크(자식)로 나눠 PGVector 컬렉션에 적재한다 (LEGACY_INCOME_TAX_CHUNKING=structure 용)
+
+    python -m scripts.ingest_statute income_tax.txt --source income_tax
+    python -m scripts.ingest_statute income_tax.txt --dry-run
+
+기존 컬렉션 내용은 지우고 다시 넣는다. 적재 후 컬렉션 버전을 올려서 부모/조문 인덱스와 검색 캐시를 무효화한다.
+"""
+import argparse
+import time
+from collections import Counter
+
+from app.agents.statute_chunker import build_parents, chunk_statute
+from app.core.config import (
+    CONNECTION_STRING,
+    LEGACY_STATUTE_COLLECTION,
+    STATUTE_CHILD_MAX_CHARS,
+    STATUTE_PARENT_MAX_CHARS,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="법령 본문 텍스트 파일 (UTF-8)")
+    parser.add_argument("--collection", default=LEGACY_STATUTE_COLLECTION)
+    parser.add_argument("--source", default="income_tax")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="청크 통계만 출력하고 적재하지 않는다")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        text = f.read()
+
+    children = chunk_statute(text, args.source)
+    parents = build_parents(children)
+    levels = Counter(child.metadata["parent_level"] for child in children)
+    print(
+        f"{len(children)} children (<= {STATUTE_CHILD_MAX_CHARS} chars) -> {len(parents)} parents "
+        f"(articles over {STATUTE_PARENT_MAX_CHARS} chars split by paragraph: {levels['paragraph']} children)"
+    )
+    if args.dry_run or not children:
+        return
+
+    from langchain_postgres import PGVector
+
+    from app.agents.collections import bump_collection_version
+    from app.agents.llm import get_embeddings
+
+    vectorstore = PGVector(
+        embeddings=get_embeddings(),
+        connection=CONNECTION_STRING,
+        collection_name=args.collection,
+        distance_strategy="cosine",
+        pre_delete_collection=True,
+        use_jsonb=True,
+    )
+
+    started = time.perf_counter()
+    ids = [f"{child.metadata['parent_id']}#{child.metadata['position']}" for child in children]
+    for start in range(0, len(children), args.batch_size):
+        vectorstore.add_documents(
+            children[start : start + args.batch_size], ids=ids[start : start + args.batch_size]
+        )
+    version = bump_collection_version(args.collection)
+    print(f"{args.collection} v{version}: {len(children)} chunks in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
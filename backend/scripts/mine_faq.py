@@ -0,0 +1,115 @@
+"""대화 첫 질문을 의도로 묶고, 자주 묻는 의도의 답변을 미리 만든다 (app/faq.py)
+
+    python -m scripts.mine_faq
+    python -m scripts.mine_faq --dry-run            # 묶기만 하고 상위 의도를 출력한다
+    python -m scripts.mine_faq --top-n 100 --min-count 3
+
+여러 번 실행해도 된다. 지난 실행 뒤에 들어온 첫 질문만 묶고, 답변은 다음 의도만 다시 만든다.
+- 아직 답변이 없는 상위 의도
+- 컬렉션 버전(corpus_version)이 바뀐 뒤에 만든 답변이 아닌 의도 (검사에 실패했던 의도 포함)
+상위 N 에서 빠진 active 의도는 pending 으로 돌려서 더 이상 바로 답하지 않는다.
+
+답변은 supervisor 그래프로 만들고, 답변한 작업자의 컬렉션 검색 결과로 grounding_score 를 계산해서
+FAQ_MIN_GROUNDING 이상이고 불확실 표현이 없을 때만 active 로 둔다.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from langchain_core.messages import HumanMessage
+
+from app.agents.grounding import grounding_score
+from app.core.config import FAQ_EMBEDDING_MODEL, FAQ_MIN_COUNT, FAQ_MIN_GROUNDING, FAQ_TOP_N
+from app.db import Base, SessionLocal, engine
+from app.faq import corpus_version, ensure_faq_index, mine_questions, top_intents
+from app.models import FaqIntent, FaqQuestion
+
+
+async def generate_answer(question: str) -> tuple[str, str, list[str]]:
+    """(답변, 답변한 작업자, 근거 문서) 를 반환한다."""
+    from app.agents.supervisor import graph, income_tax_retriever, real_estate_tax_retriever
+
+    # 작업자 -> 답변 근거를 다시 찾아볼 retriever (house/call_llm 은 검색 결과를 근거로 쓰지 않는다)
+    worker_retrievers = {
+        "income_tax_agent": [income_tax_retriever],
+        "real_estate_tax_agent": [real_estate_tax_retriever],
+        "supervisor": [income_tax_retriever, real_estate_tax_retriever],
+    }
+    state = await graph.ainvoke({"messages": [HumanMessage(content=question)]})
+    message = state["messages"][-1]
+    worker = message.name or "supervisor"
+    sources = [
+        doc.page_content
+        for retriever in worker_retrievers.get(worker, [])
+        for doc in await retriever.ainvoke(question)
+    ]
+    return message.content, worker, sources
+
+
+async def refresh_answers(db, top: list[tuple[FaqIntent, int]], version: str, regenerate: bool) -> dict:
+    counts = {"generated": 0, "active": 0, "rejected": 0, "reactivated": 0, "demoted": 0}
+    for intent, _ in top:
+        if not regenerate and intent.corpus_version == version and intent.answer is not None:
+            # 상위 N 에서 빠졌다가 돌아온 의도는 답변이 그대로 유효하므로 다시 켜기만 한다
+            if intent.status == "pending":
+                intent.status = "active"
+                db.commit()
+                counts["reactivated"] += 1
+            continue
+        started = time.perf_counter()
+        answer, worker, sources = await generate_answer(intent.question)
+        result = grounding_score(answer, sources, intent.question)
+        intent.answer = answer
+        intent.answer_worker = worker
+        intent.grounding = result.score
+        intent.corpus_version = version
+        intent.status = "active" if result.passed(FAQ_MIN_GROUNDING) else "rejected"
+        intent.updated_at = datetime.utcnow()
+        db.commit()
+        counts["generated"] += 1
+        counts[intent.status] += 1
+        print(
+            f"[{intent.status}] #{intent.id} {intent.question[:40]!r} "
+            f"worker={worker} grounding={result.score:.2f} ({time.perf_counter() - started:.1f}s)"
+        )
+
+    top_ids = [intent.id for intent, _ in top]
+    demoted = db.query(FaqIntent).filter(FaqIntent.status == "active", FaqIntent.id.notin_(top_ids or [0]))
+    counts["demoted"] = demoted.update({"status": "pending"}, synchronize_session=False)
+    db.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top-n", type=int, default=FAQ_TOP_N)
+    parser.add_argument("--min-count", type=int, default=FAQ_MIN_COUNT)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="묶기만 하고 답변은 만들지 않는다")
+    parser.add_argument("--regenerate", action="store_true", help="상위 의도의 답변을 모두 다시 만든다")
+    args = parser.parse_args()
+
+    from app.agents.llm import get_embeddings
+
+    Base.metadata.create_all(bind=engine, tables=[FaqIntent.__table__, FaqQuestion.__table__])
+    with SessionLocal() as db:
+        ensure_faq_index(db)
+
+        started = time.perf_counter()
+        counts = mine_questions(db, get_embeddings(FAQ_EMBEDDING_MODEL), args.batch_size)
+        print(f"mined in {time.perf_counter() - started:.1f}s: {counts}")
+
+        top = top_intents(db, args.top_n, args.min_count)
+        version = corpus_version()
+        print(f"top {len(top)} intents (min_count={args.min_count}, corpus_version={version})")
+        for intent, questions in top:
+            print(f"  #{intent.id} x{questions} [{intent.status}] {intent.question[:60]!r}")
+        if args.dry_run:
+            return
+
+        print(asyncio.run(refresh_answers(db, top, version, args.regenerate)))
+
+
+if __name__ == "__main__":
+    main()
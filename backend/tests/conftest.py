@@ -0,0 +1,6 @@
+import os
+
+# app.core.config 는 import 할 때 필수 환경 변수를 읽는다
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected, SqliteUserSlots
+
+
+def test_rejected_users_do_not_accumulate():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_per_user=2, max_queue=1, queue_timeout=0.01)
+        slot = await controller.acquire(1)
+        # 2 번은 대기하다 시간 초과, 3 번은 대기열이 차서 거절
+        waiting = asyncio.create_task(controller.acquire(2))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as queue_full:
+            await controller.acquire(3)
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await waiting
+        slot.release()
+        return controller, queue_full.value, timed_out.value
+
+    controller, queue_full, timed_out = asyncio.run(run())
+    assert queue_full.status_code == 503
+    assert timed_out.status_code == 503
+    assert controller.user_slots.users() == 0
+    assert controller.active == 0
+
+
+def test_per_user_limit():
+    async def run():
+        controller = AdmissionController(max_concurrent=4, max_per_user=1, max_queue=4, queue_timeout=0.01)
+        slot = await controller.acquire(1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(1)
+        other = await controller.acquire(2)
+        slot.release()
+        again = await controller.acquire(1)
+        other.release()
+        again.release()
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(run())
+    assert rejected.status_code == 429
+    assert controller.rejected_user_limit == 1
+    assert controller.user_slots.users() == 0
+
+
+def test_sqlite_user_slots_are_shared(tmp_path):
+    path = str(tmp_path / "admission.sqlite")
+    first, second = SqliteUserSlots(path), SqliteUserSlots(path)
+
+    token = first.acquire(1, limit=2)
+    assert second.acquire(1, limit=2) is not None
+    # 다른 워커(인스턴스)에서 잡은 자리도 센다
+    assert first.acquire(1, limit=2) is None
+    assert second.acquire(2, limit=2) is not None
+
+    first.release(token)
+    assert first.acquire(1, limit=2) is not None
+    assert first.users() == 2
+
+
+def test_sqlite_user_slots_drop_dead_workers(tmp_path):
+    slots = SqliteUserSlots(str(tmp_path / "admission.sqlite"))
+    # 종료된 워커가 남긴 행
+    slots._connect().execute("INSERT INTO user_slots (user_id, pid) VALUES (1, ?)", (2**22 + 12345,))
+    assert slots.acquire(1, limit=1) is not None
@@ -0,0 +1,36 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from app.agents.dedup import _MERSENNE_PRIME, _PERM_A, _PERM_B, minhash
+
+
+def overlapping_sets(size: int, jaccard: float) -> tuple[set[str], set[str]]:
+    # |A∩B| / |A∪B| = jaccard 가 되도록 공통 원소와 각자의 원소를 나눈다
+    shared = round(2 * size * jaccard / (1 + jaccard))
+    a = {f"s{i}" for i in range(size)}
+    b = {f"s{i}" for i in range(size - shared, 2 * size - shared)}
+    return a, b
+
+
+def estimate(a: set[str], b: set[str]) -> float:
+    return float(np.mean(minhash(a) == minhash(b)))
+
+
+@pytest.mark.parametrize("jaccard", [0.0, 0.2, 0.5, 0.8, 1.0])
+def test_minhash_estimate_tracks_true_jaccard(jaccard):
+    a, b = overlapping_sets(400, jaccard)
+    true = len(a & b) / len(a | b)
+
+    # 128 개 해시면 표준편차가 0.05 이하라서 0.15 안에 들어와야 한다
+    assert estimate(a, b) == pytest.approx(true, abs=0.15)
+
+
+def test_minhash_matches_exact_universal_hash():
+    shingle_set = {"소득세", "득세법", "세법제", "법제55", "제55조"}
+    expected = [
+        min((int(a) * zlib.crc32(s.encode()) + int(b)) % _MERSENNE_PRIME for s in shingle_set)
+        for a, b in zip(_PERM_A, _PERM_B)
+    ]
+    assert minhash(shingle_set).tolist() == expected
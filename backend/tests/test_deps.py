@@ -0,0 +1,45 @@
+import dataclasses
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.db import Base
+from app.deps import CurrentUser, authenticate_token, user_cache
+from app.models import User
+from app.schemas import UserOut
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    user_cache.clear()
+
+
+def test_cached_user_is_an_immutable_snapshot(db):
+    user = User(email="a@example.com", display_name="tester")
+    db.add(user)
+    db.commit()
+    token = create_access_token(str(user.id))
+
+    first = authenticate_token(token, db)
+    second = authenticate_token(token, db)
+
+    assert isinstance(first, CurrentUser)
+    assert second is first
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.display_name = "changed"
+    # ORM 객체는 요청 세션에 그대로 남아 있다
+    assert user in db
+    assert UserOut.model_validate(first).email == "a@example.com"
+
+
+def test_unknown_user_is_rejected(db):
+    with pytest.raises(HTTPException) as error:
+        authenticate_token(create_access_token("999"), db)
+    assert error.value.status_code == 401
@@ -0,0 +1,43 @@
+import pytest
+
+from app.agents.grounding import extract_numbers, grounding_score, parse_korean_amount
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("1천400만", 14_000_000),
+        ("1,400만", 14_000_000),
+        ("1억5천만", 150_000_000),
+        ("1억 5천만", 150_000_000),
+        ("84만", 840_000),
+        ("2천", 2_000),
+        ("3억", 300_000_000),
+    ],
+)
+def test_parse_korean_amount(expression, expected):
+    assert parse_korean_amount(expression) == expected
+
+
+def test_amount_spellings_compare_equal():
+    assert extract_numbers("1천400만원") == extract_numbers("1,400만원") == extract_numbers("14,000,000원")
+    assert extract_numbers("14,000,000원") == {"14000000"}
+
+
+def test_article_number_is_not_an_amount():
+    assert extract_numbers("제55조") == {"55"}
+    assert extract_numbers("제55조에 따라 1천만원") == {"55", "10000000"}
+
+
+def test_number_support_uses_normalized_amounts():
+    result = grounding_score("과세표준 1,400만원 이하는 6% 입니다.", ["과세표준 14,000,000원 이하: 6%"])
+    assert result.number_support == 1.0
+
+    result = grounding_score("과세표준 1,500만원 이하는 6% 입니다.", ["과세표준 14,000,000원 이하: 6%"])
+    assert result.number_support == 0.5
+
+
+def test_uncertain_answer_fails_regardless_of_score():
+    result = grounding_score("관련 정보가 없습니다.", ["관련 정보가 없습니다."])
+    assert result.score == 1.0
+    assert not result.passed(0.5)
@@ -0,0 +1,79 @@
+import pytest
+
+from app.agents.grounding import GroundingResult
+from app.agents.hallucination_gate import GROUNDED, HALLUCINATED, calibrate, local_verdict
+
+
+def records(scores: list[float], verdict: str, weight: float = 1.0) -> list[dict]:
+    return [{"score": score, "llm": verdict, "weight": weight} for score in scores]
+
+
+def separated_log() -> list[dict]:
+    # 0.10~0.39 는 모두 hallucinated, 0.70~0.99 는 모두 grounded, 0.5/0.55 는 섞여 있다
+    return (
+        records([round(0.10 + i / 100, 2) for i in range(30)], HALLUCINATED)
+        + records([round(0.70 + i / 100, 2) for i in range(30)], GROUNDED)
+        + records([0.5, 0.55], GROUNDED)
+        + records([0.5, 0.55], HALLUCINATED)
+    )
+
+
+def test_calibrate_picks_band_around_mixed_scores():
+    result = calibrate(separated_log(), max_error=0.02, min_samples=20)
+
+    assert result["low"] == 0.5
+    assert result["high"] == 0.7
+    assert result["samples"] == 64
+    assert result["local_share"] == pytest.approx(60 / 64)
+    assert result["disagreement"] == 0.0
+
+
+def test_calibrate_tolerates_errors_up_to_max_error():
+    log = separated_log() + records([0.2], GROUNDED)
+
+    # 0.5 아래 31 개 중 grounded 1 개 (3.2%)
+    assert calibrate(log, max_error=0.02)["low"] < 0.5
+    assert calibrate(log, max_error=0.05)["low"] == 0.5
+
+
+def test_calibrate_weights_audited_records():
+    hallucinated = records([round(0.10 + i / 200, 3) for i in range(60)], HALLUCINATED)
+    grounded = records([round(0.70 + i / 100, 2) for i in range(30)], GROUNDED)
+
+    # 가중치 1 이면 61 개 중 1 개 (1.6%) 라서 허용, 감사 비율 0.2 로 기록된 레코드(가중치 5)면 5/65 라서 불허
+    light = calibrate(hallucinated + grounded + records([0.2], GROUNDED), max_error=0.02)
+    heavy = calibrate(hallucinated + grounded + records([0.2], GROUNDED, weight=5.0), max_error=0.02)
+
+    assert light["low"] == 0.7
+    assert heavy["low"] < light["low"]
+
+
+def test_calibrate_without_enough_samples_decides_nothing_locally():
+    log = records([0.1, 0.2], HALLUCINATED) + records([0.8, 0.9], GROUNDED)
+    result = calibrate(log, min_samples=20)
+
+    assert result["low"] == 0.0
+    assert result["high"] > 1.0
+    assert result["local_share"] == 0.0
+
+
+def test_calibrate_ignores_unlabeled_records():
+    log = separated_log() + [{"score": 0.9, "llm": "yes"}, {"score": 0.1}]
+    assert calibrate(log) == calibrate(separated_log())
+
+
+def test_local_verdict_band():
+    def result(score: float) -> GroundingResult:
+        return GroundingResult(score=score, ngram_overlap=score, number_support=score, uncertain=False)
+
+    assert local_verdict(result(0.7), 0.5, 0.7) == GROUNDED
+    assert local_verdict(result(0.49), 0.5, 0.7) == HALLUCINATED
+    assert local_verdict(result(0.6), 0.5, 0.7) is None
+
+
+def test_local_verdict_sends_uncertain_answers_to_grader():
+    def result(score: float) -> GroundingResult:
+        return GroundingResult(score=score, ngram_overlap=score, number_support=score, uncertain=True)
+
+    assert local_verdict(result(1.0), 0.5, 0.7) is None
+    assert local_verdict(result(0.0), 0.5, 0.7) is None
@@ -0,0 +1,42 @@
+from langchain_core.documents import Document
+
+from app.agents.statute_index import StatuteIndex, extract_article_refs, extract_law_names
+
+
+def income_tax_index() -> StatuteIndex:
+    docs = [
+        Document(page_content="제8조(납세지) ① 거주자의 소득세 납세지는 그 주소지로 한다.", metadata={"article": "제8조"}),
+        Document(page_content="제55조(세율) ① 거주자의 종합소득에 대한 소득세는 ...", metadata={"article": "제55조"}),
+    ]
+    return StatuteIndex(docs, laws=("소득세법",))
+
+
+def test_extract_refs_with_law_names():
+    query = "종합부동산세법 제8조 제1항과 소득세법 시행령 제55조의2"
+    assert extract_article_refs(query) == ["제8조", "제55조의2"]
+    assert extract_law_names(query) == {"종합부동산세법", "소득세법시행령"}
+    assert extract_law_names("제8조") == set()
+
+
+def test_lookup_without_law_name():
+    docs = income_tax_index().lookup("제8조", k=3)
+    assert [doc.metadata["article"] for doc in docs] == ["제8조"]
+
+
+def test_lookup_with_own_law_name():
+    docs = income_tax_index().lookup("소득세법 제8조", k=3)
+    assert [doc.metadata["article"] for doc in docs] == ["제8조"]
+
+
+def test_lookup_other_law_falls_back_to_search():
+    index = income_tax_index()
+    assert index.lookup("종합부동산세법 제8조", k=3) is None
+    assert index.lookup("소득세법 시행령 제8조", k=3) is None
+    # 여러 조문 중 하나라도 다른 법령이면 직접 조회하지 않는다
+    assert index.lookup("소득세법 제55조와 종합부동산세법 제8조", k=3) is None
+
+
+def test_lookup_named_law_without_known_laws_falls_back():
+    index = StatuteIndex(income_tax_index().articles["제8조"])
+    assert index.lookup("제8조", k=3) is not None
+    assert index.lookup("소득세법 제8조", k=3) is None
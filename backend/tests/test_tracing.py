@@ -0,0 +1,107 @@
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.core import tracing
+from app.core.tracing import Trace, TracingStats, _span_ends, _span_order
+
+
+class CapturingExecutor:
+    def __init__(self):
+        self.records = []
+
+    def submit(self, fn, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    executor = CapturingExecutor()
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACING_EXPORTER", "file")
+    monkeypatch.setattr(tracing, "TRACING_SLOW_MS", 1000)
+    monkeypatch.setattr(tracing, "tracing_stats", TracingStats())
+    monkeypatch.setattr(tracing, "_export_executor", executor)
+    return executor.records
+
+
+def test_sampled_trace_is_exported_with_payloads(exported):
+    trace = Trace("chat_turn", sampled=True, attributes={"conversation_id": 3})
+    run_id = uuid4()
+    trace.recorder.on_chain_start({"name": "supervisor"}, {"messages": "hi"}, run_id=run_id)
+    trace.recorder.on_chain_end({"answer": "ok"}, run_id=run_id)
+
+    assert trace.finish() == "sampled"
+    (record,) = exported
+    assert record["reason"] == "sampled"
+    assert record["spans"][0]["id"] == str(run_id)
+    assert record["spans"][0]["outputs"] == "{'answer': 'ok'}"
+    assert tracing.tracing_stats.sampled == 1
+
+
+def test_unsampled_error_is_forced(exported):
+    trace = Trace("chat_turn", sampled=False, attributes={})
+    run_id = uuid4()
+    trace.recorder.on_chain_start({"name": "supervisor"}, {"messages": "hi"}, run_id=run_id)
+    trace.recorder.on_chain_error(RuntimeError("boom"), run_id=run_id)
+
+    assert trace.finish(error=RuntimeError("boom")) == "error"
+    (record,) = exported
+    assert record["error"] == "boom"
+    assert record["spans"][0]["error"] == "RuntimeError: boom"
+    # 샘플링되지 않은 요청은 입력/출력을 남기지 않는다
+    assert "inputs" not in record["spans"][0]
+    assert tracing.tracing_stats.forced_error == 1
+
+
+def test_unsampled_slow_request_is_forced(exported):
+    trace = Trace("chat_turn", sampled=False, attributes={})
+    trace.start = time.time() - 2
+
+    assert trace.finish() == "slow"
+    assert [record["reason"] for record in exported] == ["slow"]
+    assert tracing.tracing_stats.forced_slow == 1
+
+
+def test_fast_unsampled_request_is_dropped(exported):
+    trace = Trace("chat_turn", sampled=False, attributes={})
+
+    assert trace.finish() is None
+    assert exported == []
+    assert tracing.tracing_stats.dropped == 1
+    assert tracing.tracing_stats.stats()["exported_share"] == 0.0
+
+
+def span(span_id: str, parent: str | None, start: float, end: float | None) -> dict:
+    return {"id": span_id, "parent": parent, "start": start, "end": end, "kind": "chain", "name": span_id}
+
+
+def test_span_order_puts_parents_before_children():
+    # 자식이 부모와 같은 시각이나 더 먼저 시작한 것으로 기록돼도 부모가 먼저 온다
+    spans = [
+        span("child", "parent", 1.0, 2.0),
+        span("grandchild", "child", 1.0, 1.5),
+        span("parent", None, 1.0, 3.0),
+        span("orphan", "missing", 0.5, 0.6),
+    ]
+    order = [s["id"] for s in _span_order(spans)]
+
+    assert order.index("parent") < order.index("child") < order.index("grandchild")
+    assert set(order) == {"parent", "child", "grandchild", "orphan"}
+
+
+def test_unfinished_span_ends_at_latest_descendant():
+    spans = [
+        span("graph", None, 0.0, None),
+        span("worker", "graph", 1.0, None),
+        span("llm", "worker", 1.5, 4.0),
+        span("idle", "graph", 5.0, None),
+    ]
+    ends = _span_ends(_span_order(spans))
+
+    assert ends["llm"] == 4.0
+    assert ends["worker"] == 4.0
+    # 자식 없이 끝나지 않은 span 은 자기 시작 시각에서 닫는다
+    assert ends["idle"] == 5.0
+    assert ends["graph"] == 5.0
@@ -9,7 +9,7 @@ import { Sidebar } from "../../components/Sidebar";
 import { MessageItem } from "../../components/MessageItem";
 import { apiFetch } from "../../lib/api";
 import { clearAuth } from "../../lib/auth";
-import { API_BASE } from "../../lib/config";
+import { streamMessage } from "../../lib/chatStream";
 import type { Conversation, Message, User } from "../../lib/types";
 
 function sortConversations(list: Conversation[]) {
@@ -172,91 +172,58 @@ export default function ChatPage() {
     setLoading(true);
 
     try {
-      const token = localStorage.getItem("token");
-      const response = await fetch(
-        `${API_BASE}/conversations/${conversationId}/messages`,
-        {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${token}`,
-          },
-          body: JSON.stringify({ content }),
-        },
-      );
-
-      if (!response.ok) {
-        throw new Error("Failed to send message");
-      }
-
-      const reader = response.body?.getReader();
-      const decoder = new TextDecoder();
       let assistantContent = "";
 
-      while (reader) {
-        const { done, value } = await reader.read();
-        if (done) break;
-
-        const text = decoder.decode(value);
-        const lines = text.split("\n");
-
-        for (const line of lines) {
-          if (line.startsWith("data: ")) {
-            try {
-              const data = JSON.parse(line.slice(6));
-
-              if (data.type === "token") {
-                assistantContent += data.content;
-                setMessages((prev) =>
-                  prev.map((m) =>
-                    m.id === optimisticAssistant.id
-                      ? { ...m, content: assistantContent }
-                      : m,
-                  ),
-                );
-              } else if (data.type === "done") {
-                // Finalize messages with real IDs
-                setMessages((prev) =>
-                  prev.map((m) => {
-                    if (m.id === optimisticUser.id) {
-                      return { ...m, id: data.user_message_id };
-                    }
-                    if (m.id === optimisticAssistant.id) {
-                      return {
-                        ...m,
-                        id: data.assistant_message_id,
-                        isStreaming: false,
-                      };
-                    }
-                    return m;
-                  }),
-                );
-
-                // Update conversation title if generated
-                if (data.conversation_title) {
-                  setConversations((prev) =>
-                    sortConversations(
-                      prev.map((c) =>
-                        c.id === conversationId
-                          ? {
-                              ...c,
-                              title: data.conversation_title,
-                              updated_at: new Date().toISOString(),
-                            }
-                          : c,
-                      ),
-                    ),
-                  );
-                }
-              } else if (data.type === "error") {
-                setError(data.message);
+      await streamMessage(conversationId, content, (data) => {
+        if (data.type === "token") {
+          assistantContent += data.content;
+          setMessages((prev) =>
+            prev.map((m) =>
+              m.id === optimisticAssistant.id
+                ? { ...m, content: assistantContent }
+                : m,
+            ),
+          );
+        } else if (data.type === "done") {
+          // Finalize messages with real IDs
+          setMessages((prev) =>
+            prev.map((m) => {
+              if (m.id === optimisticUser.id) {
+                return { ...m, id: data.user_message_id };
+              }
+              if (m.id === optimisticAssistant.id) {
+                return {
+                  ...m,
+                  id: data.assistant_message_id,
+                  isStreaming: false,
+                };
               }
-            } catch (parseError) {
-              // Ignore parse errors for incomplete chunks
-            }
-          }
+              return m;
+            }),
+          );
+
+          // Update conversation title, preview and count
+          const now = new Date().toISOString();
+          setConversations((prev) =>
+            sortConversations(
+              prev.map((c) =>
+                c.id === conversationId
+                  ? {
+                      ...c,
+                      title: data.conversation_title || c.title,
+                      updated_at: now,
+                      last_message_preview: assistantContent.slice(0, 80),
+                      message_count: (c.message_count ?? 0) + 2,
+                      last_message_at: now,
+                    }
+                  : c,
+              ),
+            ),
+          );
+        } else if (data.type === "error") {
+          setError(data.message);
         }
-      }
+      });
     } catch (err: any) {
       // Rollback on error
       setMessages((prev) =>
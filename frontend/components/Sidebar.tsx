@@ -111,9 +111,21 @@ export const Sidebar: React.FC<SidebarProps> = ({
                       : "text-slate-400 dark:text-gray-400 group-hover:text-slate-600 dark:group-hover:text-white"
                   }
                 />
-                <div className="flex-1 truncate text-sm font-medium relative z-10 text-left pr-8">
-                  {chat.title}
+                <div className="flex-1 min-w-0 relative z-10 text-left pr-8">
+                  <div className="truncate text-sm font-medium">
+                    {chat.title}
+                  </div>
+                  {chat.last_message_preview && (
+                    <div className="truncate text-xs text-slate-400 dark:text-gray-500 mt-0.5">
+                      {chat.last_message_preview}
+                    </div>
+                  )}
                 </div>
+                {!!chat.message_count && (
+                  <span className="text-[10px] text-slate-400 dark:text-gray-500 relative z-10 group-hover:opacity-0">
+                    {chat.message_count}
+                  </span>
+                )}
                 {/* Fade effect for text overflow */}
                 <div
                   className={`absolute inset-y-0 right-0 w-8 bg-gradient-to-l to-transparent z-20 ${
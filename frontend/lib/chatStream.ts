@@ -0,0 +1,192 @@
+import { API_BASE } from "./config";
+
+// 백엔드 stream_turn 이 내는 이벤트 (SSE / WebSocket 공통)
+export type StreamEvent =
+  | { type: "token"; content: string }
+  | {
+      type: "done";
+      user_message_id: number;
+      assistant_message_id: number;
+      conversation_title: string;
+    }
+  | { type: "error"; message: string; status?: number };
+
+// 서버가 연결을 거절한 경우(인증 실패 등). 전송 계층 문제가 아니므로 WebSocket 을 끄지 않는다
+class SocketRejectedError extends Error {
+  constructor(
+    message: string,
+    readonly status?: number,
+  ) {
+    super(message);
+  }
+}
+
+type Pending = {
+  onEvent: (event: StreamEvent) => void;
+  resolve: () => void;
+  reject: (err: Error) => void;
+};
+
+// 연결 하나에서 한 번 인증하고 여러 대화의 턴을 id 로 나눠 받는다 (backend/app/routers/chat_ws.py)
+class ChatSocket {
+  private ready: Promise<WebSocket> | null = null;
+  private token: string | null = null;
+  private socket: WebSocket | null = null;
+  private streams = new Map<string, Pending>();
+  private nextId = 0;
+
+  connect(token: string): Promise<WebSocket> {
+    if (this.ready && this.token === token) {
+      return this.ready;
+    }
+    // 다른 사용자로 다시 로그인했으면 새로 연결한다
+    this.socket?.close();
+    this.token = token;
+
+    const url = `${API_BASE.replace(/^http/, "ws")}/conversations/ws`;
+    const ready = new Promise<WebSocket>((resolve, reject) => {
+      const socket = new WebSocket(url);
+      this.socket = socket;
+      socket.onopen = () => socket.send(JSON.stringify({ type: "auth", token }));
+      socket.onmessage = (message) => {
+        const data = JSON.parse(message.data);
+        if (data.type === "ready") {
+          resolve(socket);
+          return;
+        }
+        if (data.id === undefined) {
+          if (data.type === "error") {
+            reject(new SocketRejectedError(data.message, data.status));
+          }
+          return;
+        }
+
+        const id = String(data.id);
+        const pending = this.streams.get(id);
+        if (!pending) return;
+        if (data.type !== "cancelled") pending.onEvent(data as StreamEvent);
+        if (["done", "error", "cancelled"].includes(data.type)) {
+          this.streams.delete(id);
+          pending.resolve();
+        }
+      };
+      socket.onclose = () => {
+        if (this.socket === socket) {
+          this.socket = null;
+          this.ready = null;
+        }
+        reject(new Error("WebSocket closed"));
+        this.streams.forEach((pending) =>
+          pending.reject(new Error("연결이 끊겼습니다.")),
+        );
+        this.streams.clear();
+      };
+    });
+    this.ready = ready;
+    return ready;
+  }
+
+  stream(
+    socket: WebSocket,
+    conversationId: number,
+    content: string,
+    onEvent: (event: StreamEvent) => void,
+    signal?: AbortSignal,
+  ): Promise<void> {
+    const id = String(++this.nextId);
+    return new Promise((resolve, reject) => {
+      this.streams.set(id, { onEvent, resolve, reject });
+      socket.send(
+        JSON.stringify({
+          type: "message",
+          id,
+          conversation_id: conversationId,
+          content,
+        }),
+      );
+      signal?.addEventListener("abort", () => {
+        if (this.streams.has(id)) {
+          socket.send(JSON.stringify({ type: "cancel", id }));
+        }
+      });
+    });
+  }
+}
+
+const chatSocket = new ChatSocket();
+// WebSocket 연결이 안 되는 환경(프록시 등)에서는 이번 세션 동안 SSE 만 쓴다
+let socketUnavailable = false;
+
+async function streamSse(
+  conversationId: number,
+  content: string,
+  token: string | null,
+  onEvent: (event: StreamEvent) => void,
+  signal?: AbortSignal,
+) {
+  const response = await fetch(
+    `${API_BASE}/conversations/${conversationId}/messages`,
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ content }),
+      signal,
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error("Failed to send message");
+  }
+
+  const reader = response.body?.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (reader) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    // 마지막 줄은 아직 다 받지 못했을 수 있으므로 다음 조각과 합친다
+    buffer = lines.pop() ?? "";
+
+    for (const line of lines) {
+      if (line.startsWith("data: ")) {
+        try {
+          onEvent(JSON.parse(line.slice(6)) as StreamEvent);
+        } catch (parseError) {
+          // Ignore parse errors for incomplete chunks
+        }
+      }
+    }
+  }
+}
+
+export async function streamMessage(
+  conversationId: number,
+  content: string,
+  onEvent: (event: StreamEvent) => void,
+  signal?: AbortSignal,
+): Promise<void> {
+  const token = localStorage.getItem("token");
+
+  if (token && !socketUnavailable && typeof WebSocket !== "undefined") {
+    let socket: WebSocket | null = null;
+    try {
+      socket = await chatSocket.connect(token);
+    } catch (err) {
+      if (!(err instanceof SocketRejectedError)) {
+        socketUnavailable = true;
+      }
+    }
+    if (socket) {
+      return chatSocket.stream(socket, conversationId, content, onEvent, signal);
+    }
+  }
+
+  return streamSse(conversationId, content, token, onEvent, signal);
+}
@@ -16,6 +16,10 @@ export type Conversation = {
   title: string;
   created_at: string;
   updated_at: string;
+  // GET /conversations 목록에만 포함됨
+  last_message_preview?: string | null;
+  message_count?: number;
+  last_message_at?: string | null;
 };
 
 export type Message = {